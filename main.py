@@ -1,12 +1,29 @@
 """Módulo principal da aplicação."""
 
+import argparse
+
 from dotenv import load_dotenv
 
+from src.common.profiling import profiling_session
 from src.repositories.ai_repository import AiRespository
 
 # Carrega as variáveis de ambiente do arquivo .env
 load_dotenv()
 
 if __name__ == "__main__":
-    deepseek_app = AiRespository()
-    deepseek_app.run(prompt="Qual a capital do Brasil?")
+    parser = argparse.ArgumentParser(description="Executa uma consulta à API de IA.")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=None,
+        help="Perfila a execução, gravando os resultados em `logs/profiling/`.",
+    )
+    args = parser.parse_args()
+
+    # A sessão cobre também a inicialização (YAML, logger, SQLite) do cliente
+    with profiling_session("main", enabled=args.profile):
+        deepseek_app = AiRespository(profile=args.profile)
+        try:
+            deepseek_app.run(prompt="Qual a capital do Brasil?")
+        finally:
+            deepseek_app.close()
@@ -0,0 +1,8 @@
+CREATE TABLE IF NOT EXISTS api_usage_choices (
+    usage_id TEXT NOT NULL REFERENCES api_usages (id),
+    choice_index INTEGER NOT NULL,
+    completion TEXT NOT NULL,
+    finish_reason TEXT,
+    logprobs TEXT,
+    PRIMARY KEY (usage_id, choice_index)
+);
@@ -0,0 +1,23 @@
+CREATE TABLE IF NOT EXISTS job_queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    prompt TEXT NOT NULL,
+    n INTEGER NOT NULL DEFAULT 1,
+    tenant TEXT NOT NULL DEFAULT 'default',
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_token TEXT,
+    lease_expires_at REAL,
+    usage_id TEXT,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_job_queue_available
+    ON job_queue (status, available_at);
+
+CREATE INDEX IF NOT EXISTS idx_job_queue_lease_expires
+    ON job_queue (status, lease_expires_at);
@@ -0,0 +1,7 @@
+CREATE TABLE IF NOT EXISTS raw_archive_index (
+    usage_id TEXT PRIMARY KEY,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    archived_at TEXT NOT NULL
+);
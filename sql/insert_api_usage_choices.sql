@@ -0,0 +1,7 @@
+INSERT INTO api_usage_choices (
+    usage_id,
+    choice_index,
+    completion,
+    finish_reason,
+    logprobs
+) VALUES (?, ?, ?, ?, ?)
@@ -0,0 +1,8 @@
+INSERT INTO conversation_messages (
+    conversation_id,
+    role,
+    content,
+    tokens,
+    usage_id,
+    created_at
+) VALUES (?, ?, ?, ?, ?, ?)
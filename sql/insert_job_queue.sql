@@ -0,0 +1,9 @@
+INSERT OR IGNORE INTO job_queue (
+    idempotency_key,
+    prompt,
+    n,
+    tenant,
+    available_at,
+    created_at,
+    updated_at
+) VALUES (?, ?, ?, ?, ?, ?, ?)
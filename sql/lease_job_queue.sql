@@ -0,0 +1,16 @@
+UPDATE job_queue
+SET status = 'leased',
+    attempts = attempts + 1,
+    lease_owner = :owner,
+    lease_token = :token,
+    lease_expires_at = :expires_at,
+    updated_at = :now
+WHERE id IN (
+    SELECT id
+    FROM job_queue
+    WHERE (status = 'queued' AND available_at <= :now)
+       OR (status = 'leased' AND lease_expires_at <= :now)
+    ORDER BY available_at, id
+    LIMIT :limit
+)
+RETURNING id, idempotency_key, prompt, n, tenant, attempts
@@ -0,0 +1,8 @@
+SELECT
+    role,
+    content,
+    tokens
+FROM conversation_messages
+WHERE conversation_id = ?
+ORDER BY id DESC
+LIMIT ?
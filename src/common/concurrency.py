@@ -0,0 +1,189 @@
+"""Módulo com o controle adaptativo de concorrência das chamadas à API.
+
+O `AimdLimiter` ajusta o número de chamadas simultâneas a partir do que observa:
+cada sucesso aumenta o limite de forma aditiva (cerca de +1 a cada janela completa), e
+respostas 429, timeouts ou latência muito acima da linha de base o reduzem de forma
+multiplicativa. Assim, o limite converge para a capacidade real do provedor sem ajuste manual.
+
+A linha de base acompanha a latência de todas as chamadas bem-sucedidas, e a latência sozinha
+reduz o limite no máximo `max_latency_decreases` vezes seguidas: uma mudança permanente na
+latência normal (prompts maiores, `n > 1`, outro modelo) não derruba o limite ao mínimo.
+"""
+
+from collections.abc import Callable
+import threading
+import time
+from typing import Any, TypeVar
+
+from src.common.logger import LoggerSingleton
+
+T = TypeVar("T")
+
+OUTCOMES: tuple[str, ...] = ("success", "rate_limited", "timeout", "error")
+"""Resultados aceitos por `AimdLimiter.release`."""
+
+
+class AimdLimiter:
+    """Limitador de concorrência com aumento aditivo e redução multiplicativa (AIMD)."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        initial_limit: float = 4,
+        min_limit: float = 1,
+        max_limit: float = 64,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        latency_smoothing: float = 0.05,
+        max_latency_decreases: int = 2,
+    ) -> None:
+        """Inicializa o limitador com o limite inicial e os parâmetros de ajuste."""
+        if not 0 < min_limit <= initial_limit <= max_limit:
+            raise ValueError("Os limites devem respeitar 0 < mínimo <= inicial <= máximo.")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("O fator de redução deve estar entre 0 e 1.")
+
+        self.min_limit = min_limit
+        """Limite mínimo de chamadas simultâneas."""
+
+        self.max_limit = max_limit
+        """Limite máximo de chamadas simultâneas."""
+
+        self.decrease_factor = decrease_factor
+        """Fator aplicado ao limite a cada sinal de sobrecarga."""
+
+        self.latency_tolerance = latency_tolerance
+        """Múltiplo da latência de base a partir do qual a chamada indica sobrecarga."""
+
+        self.latency_smoothing = latency_smoothing
+        """Peso da amostra mais recente na média móvel da latência de base."""
+
+        self.max_latency_decreases = max_latency_decreases
+        """Número máximo de reduções seguidas causadas apenas pela latência."""
+
+        self.logger = LoggerSingleton().logger or LoggerSingleton.get_logger()
+        """Instancia o logger da aplicação."""
+
+        self._limit: float = initial_limit
+        """Limite atual, fracionário para permitir o aumento aditivo por chamada."""
+
+        self._in_flight: int = 0
+        """Chamadas em andamento."""
+
+        self._baseline_latency: float | None = None
+        """Média móvel da latência de todas as chamadas bem-sucedidas."""
+
+        self._latency_decreases: int = 0
+        """Reduções seguidas causadas apenas pela latência, zeradas por uma chamada normal."""
+
+        self._pending_before_decrease: int = 0
+        """Chamadas iniciadas antes da última redução que ainda não foram liberadas."""
+
+        self._counters: dict[str, int] = dict.fromkeys(OUTCOMES, 0)
+        """Número de chamadas por resultado."""
+
+        self._condition = threading.Condition()
+        """Sincroniza a aquisição e a liberação das vagas."""
+
+    @property
+    def limit(self) -> int:
+        """Retorna o limite atual de chamadas simultâneas."""
+        return max(int(self._limit), 1)
+
+    @property
+    def in_flight(self) -> int:
+        """Retorna o número de chamadas em andamento."""
+        return self._in_flight
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        """Aguarda uma vaga livre; retorna False se o tempo limite for atingido."""
+        with self._condition:
+            acquired = self._condition.wait_for(lambda: self._in_flight < self.limit, timeout)
+            if acquired:
+                self._in_flight += 1
+            return acquired
+
+    def release(self, outcome: str, latency: float) -> None:
+        """Libera a vaga e ajusta o limite conforme o resultado e a latência observados."""
+        if outcome not in OUTCOMES:
+            msg = f"Resultado inválido: '{outcome}'. Esperado: {OUTCOMES}"
+            raise ValueError(msg)
+        with self._condition:
+            self._in_flight -= 1
+            self._counters[outcome] += 1
+            latency_overload = outcome == "success" and self._is_latency_overload(latency)
+            if outcome == "success":
+                self._update_baseline(latency)
+            if outcome in {"rate_limited", "timeout"}:
+                self._decrease(outcome)
+                self._condition.notify_all()
+                return
+            # Sem 429 nem timeout, a latência sozinha reduz o limite poucas vezes seguidas,
+            # enquanto a linha de base se ajusta a uma mudança permanente
+            if latency_overload and self._latency_decreases < self.max_latency_decreases:
+                if self._decrease("latência"):
+                    self._latency_decreases += 1
+                self._condition.notify_all()
+                return
+            if self._pending_before_decrease > 0:
+                self._pending_before_decrease -= 1
+            if outcome == "success":
+                if not latency_overload:
+                    self._latency_decreases = 0
+                self._increase()
+            self._condition.notify_all()
+
+    def _is_latency_overload(self, latency: float) -> bool:
+        """Indica se a latência está acima da tolerância em relação à linha de base."""
+        baseline = self._baseline_latency
+        return baseline is not None and latency > baseline * self.latency_tolerance
+
+    def _update_baseline(self, latency: float) -> None:
+        """Atualiza a média móvel da latência de base com uma chamada bem-sucedida."""
+        if self._baseline_latency is None:
+            self._baseline_latency = latency
+        else:
+            self._baseline_latency += self.latency_smoothing * (latency - self._baseline_latency)
+
+    def _increase(self) -> None:
+        """Aumenta o limite em `1 / limite`, isto é, cerca de +1 a cada janela completa."""
+        self._limit = min(self._limit + 1 / self._limit, self.max_limit)
+
+    def _decrease(self, outcome: str) -> bool:
+        """Reduz o limite multiplicativamente, no máximo uma vez por janela de chamadas.
+
+        Os sinais de sobrecarga das chamadas já em andamento no momento da redução são
+        ignorados, pois refletem o limite anterior. Retorna se o limite foi reduzido.
+        """
+        if self._pending_before_decrease > 0:
+            self._pending_before_decrease -= 1
+            return False
+        self._pending_before_decrease = self._in_flight
+        previous = self.limit
+        self._limit = max(self._limit * self.decrease_factor, self.min_limit)
+        self.logger.info(
+            f"Limite de concorrência reduzido de {previous} para {self.limit} ({outcome})."
+        )
+        return True
+
+    def call(self, func: Callable[[], T], classify: Callable[[T], str]) -> T:
+        """Executa a função em uma vaga, classificando o resultado para ajustar o limite."""
+        self.acquire()
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = func()
+            outcome = classify(result)
+        finally:
+            self.release(outcome, time.perf_counter() - started)
+        return result
+
+    def metrics(self) -> dict[str, Any]:
+        """Retorna as métricas atuais do limitador, incluindo o limite de concorrência."""
+        with self._condition:
+            return {
+                "concurrency_limit": self.limit,
+                "in_flight": self._in_flight,
+                "baseline_latency_seconds": self._baseline_latency,
+                **{f"calls_{outcome}": count for outcome, count in self._counters.items()},
+            }
@@ -0,0 +1,192 @@
+"""Módulo com a representação compacta e limitada do histórico de conversas.
+
+Mantém as mensagens de uma sessão em memória com contagem incremental de tokens estimados,
+descartando as mensagens mais antigas quando o orçamento é excedido e condensando-as em um
+resumo de tamanho fixo. Assim, o tamanho do payload e o custo por turno permanecem constantes.
+"""
+
+from collections import deque
+from collections.abc import Callable, Iterable
+from typing import NamedTuple
+
+ROLES: tuple[str, ...] = ("system", "user", "assistant")
+"""Papéis aceitos no histórico; o índice na tupla é o código armazenado em memória."""
+
+_ROLE_CODES: dict[str, int] = {role: code for code, role in enumerate(ROLES)}
+"""Mapeia o nome do papel para o código compacto."""
+
+CHARS_PER_TOKEN: int = 4
+"""Quantidade média de caracteres por token usada na estimativa."""
+
+MESSAGE_OVERHEAD_TOKENS: int = 4
+"""Tokens adicionais estimados por mensagem (papel e delimitadores)."""
+
+SUMMARY_PREFIX: str = "Resumo da conversa anterior:"
+"""Prefixo da mensagem de sistema que carrega o resumo das mensagens descartadas."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Estima a quantidade de tokens de uma mensagem sem depender de um tokenizador."""
+    return len(text) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+class HistoryMessage(NamedTuple):
+    """Mensagem compacta do histórico."""
+
+    role_code: int
+    content: str
+    tokens: int
+
+    @property
+    def role(self) -> str:
+        """Retorna o nome do papel da mensagem."""
+        return ROLES[self.role_code]
+
+
+class HistorySnapshot(NamedTuple):
+    """Estado do histórico salvo antes de um turno."""
+
+    messages: tuple[HistoryMessage, ...]
+    total_tokens: int
+    summary: str
+
+
+type Summarizer = Callable[[str, list[HistoryMessage], int], str]
+"""Função que recebe o resumo atual, as mensagens descartadas e o limite de caracteres."""
+
+
+def extractive_summary(summary: str, evicted: list[HistoryMessage], max_chars: int) -> str:
+    """Condensa as mensagens descartadas em um resumo extrativo de tamanho limitado."""
+    excerpt_chars = max(max_chars // 4, 40)
+    parts = [summary] if summary else []
+    for message in evicted:
+        content = " ".join(message.content.split())
+        if len(content) > excerpt_chars:
+            content = f"{content[:excerpt_chars]}…"
+        parts.append(f"{message.role}: {content}")
+    joined = " | ".join(parts)
+    # Mantém o trecho mais recente quando o resumo excede o limite
+    return joined if len(joined) <= max_chars else f"…{joined[-(max_chars - 1) :]}"
+
+
+class ConversationHistory:
+    """Histórico de conversa com orçamento de tokens e resumo das mensagens descartadas."""
+
+    def __init__(
+        self,
+        max_tokens: int,
+        max_messages: int,
+        summary_max_tokens: int = 0,
+        summarizer: Summarizer | None = None,
+    ) -> None:
+        """Inicializa o histórico vazio."""
+        if max_tokens <= 0 or max_messages <= 0:
+            raise ValueError("Os limites do histórico devem ser maiores que zero.")
+
+        self.max_tokens = max_tokens
+        """Orçamento máximo de tokens estimados das mensagens mantidas."""
+
+        self.max_messages = max_messages
+        """Número máximo de mensagens mantidas."""
+
+        self.summary_max_tokens = summary_max_tokens
+        """Tamanho máximo do resumo em tokens estimados; `0` desativa o resumo."""
+
+        self.summarizer = summarizer or extractive_summary
+        """Função usada para condensar as mensagens descartadas."""
+
+        self.summary: str = ""
+        """Resumo acumulado das mensagens descartadas."""
+
+        self._messages: deque[HistoryMessage] = deque()
+        """Mensagens mantidas, da mais antiga para a mais recente."""
+
+        self._total_tokens: int = 0
+        """Soma incremental dos tokens estimados das mensagens mantidas."""
+
+    def __len__(self) -> int:
+        """Retorna o número de mensagens mantidas."""
+        return len(self._messages)
+
+    @property
+    def total_tokens(self) -> int:
+        """Retorna a soma dos tokens estimados das mensagens mantidas."""
+        return self._total_tokens
+
+    @property
+    def messages(self) -> tuple[HistoryMessage, ...]:
+        """Retorna uma cópia imutável das mensagens mantidas."""
+        return tuple(self._messages)
+
+    @property
+    def last_message(self) -> HistoryMessage | None:
+        """Retorna a mensagem mais recente sem copiar o histórico."""
+        return self._messages[-1] if self._messages else None
+
+    def append(self, role: str, content: str, tokens: int | None = None) -> list[HistoryMessage]:
+        """Adiciona uma mensagem e retorna as mensagens descartadas para caber no orçamento."""
+        try:
+            role_code = _ROLE_CODES[role]
+        except KeyError:
+            msg = f"Papel de mensagem inválido: '{role}'. Esperado: {ROLES}"
+            raise ValueError(msg) from None
+        message = HistoryMessage(
+            role_code, content, tokens if tokens is not None else estimate_tokens(content)
+        )
+        self._messages.append(message)
+        self._total_tokens += message.tokens
+        return self._evict()
+
+    def extend(self, messages: Iterable[tuple[str, str, int | None]]) -> list[HistoryMessage]:
+        """Adiciona várias mensagens `(papel, conteúdo, tokens)` de uma vez."""
+        evicted: list[HistoryMessage] = []
+        for role, content, tokens in messages:
+            evicted.extend(self.append(role, content, tokens))
+        return evicted
+
+    def discard_last(self) -> HistoryMessage | None:
+        """Remove e retorna a mensagem mais recente, usada ao desfazer um turno com falha."""
+        if not self._messages:
+            return None
+        message = self._messages.pop()
+        self._total_tokens -= message.tokens
+        return message
+
+    def snapshot(self) -> HistorySnapshot:
+        """Retorna o estado atual, para desfazer um turno com `restore`."""
+        return HistorySnapshot(tuple(self._messages), self._total_tokens, self.summary)
+
+    def restore(self, snapshot: HistorySnapshot) -> None:
+        """Restaura o estado salvo, incluindo as mensagens já descartadas e o resumo."""
+        self._messages = deque(snapshot.messages)
+        self._total_tokens = snapshot.total_tokens
+        self.summary = snapshot.summary
+
+    def _evict(self) -> list[HistoryMessage]:
+        """Descarta as mensagens mais antigas até respeitar os limites, mantendo a mais recente."""
+        evicted: list[HistoryMessage] = []
+        while len(self._messages) > 1 and (
+            self._total_tokens > self.max_tokens or len(self._messages) > self.max_messages
+        ):
+            message = self._messages.popleft()
+            self._total_tokens -= message.tokens
+            evicted.append(message)
+        if evicted and self.summary_max_tokens > 0:
+            max_chars = self.summary_max_tokens * CHARS_PER_TOKEN
+            self.summary = self.summarizer(self.summary, evicted, max_chars)
+        return evicted
+
+    def to_messages(self, system_content: str | None = None) -> list[dict[str, str]]:
+        """Monta a lista de mensagens no formato esperado pelo payload da API."""
+        payload_messages: list[dict[str, str]] = []
+        if system_content:
+            payload_messages.append({"role": "system", "content": system_content})
+        if self.summary:
+            payload_messages.append(
+                {"role": "system", "content": f"{SUMMARY_PREFIX} {self.summary}"}
+            )
+        payload_messages.extend(
+            {"role": ROLES[message.role_code], "content": message.content}
+            for message in self._messages
+        )
+        return payload_messages
@@ -64,6 +64,15 @@ class Echo:
         self._enabled: bool = True
         """Indica se o echo está ativo ou não."""
 
+        self._interactive: bool = self.is_interactive_terminal()
+        """Indica se a saída padrão era um terminal interativo na inicialização."""
+
+        self._PLAIN_SYMBOL_MAP: dict[str, str] = {
+            message_type: self._ANSI_ESCAPE.sub("", symbol)
+            for message_type, symbol in self._SYMBOL_MAP.items()
+        }
+        """Mapeia tipos de mensagens para símbolos sem códigos ANSI."""
+
     def is_interactive_terminal(self) -> bool:
         """Retorna True se a saída padrão for um terminal interativo."""
         return hasattr(sys, "stdout") and hasattr(sys.stdout, "isatty") and sys.stdout.isatty()
@@ -75,17 +84,17 @@ class Echo:
             return
 
         try:
-            symbol = self._SYMBOL_MAP.get(message_type.lower())
+            # Usa os símbolos já sem ANSI fora de terminais, evitando a regex a cada mensagem
+            symbol_map = self._SYMBOL_MAP if self._interactive else self._PLAIN_SYMBOL_MAP
+            symbol = symbol_map.get(message_type.lower())
             if symbol is None:
                 print(f"{self._error} [ECHO-ERRO] Tipo de mensagem inválido: {message_type}")
-                symbol = self._INFO_SYMBOL
+                symbol = symbol_map["info"]
 
-            formatted_message = f"{symbol} {message}"
+            if not self._interactive and "\x1b" in message:
+                message = self._ANSI_ESCAPE.sub("", message)
 
-            if self.is_interactive_terminal():
-                print(formatted_message)
-            else:
-                print(self._ANSI_ESCAPE.sub("", formatted_message))
+            print(f"{symbol} {message}")
 
         except Exception as e:  # noqa: BLE001
             print(
@@ -111,8 +120,9 @@ class Echo:
                 self.echo(message_type, message_type)
 
     def reset(self) -> None:
-        """Reativa a saída estilizada após falha."""
+        """Reativa a saída estilizada após falha e reavalia se o terminal é interativo."""
         self._enabled = True
+        self._interactive = self.is_interactive_terminal()
 
 
 _default_echo = Echo()
@@ -127,6 +137,11 @@ def echo(message: str, message_type: str = "info") -> None:
         print(f"[ECHO-ERRO] Falha detectada: {e}. Futuras chamadas usarão `print()`.")
 
 
+def is_interactive_terminal() -> bool:
+    """Retorna True se a saída padrão for um terminal interativo."""
+    return _default_echo.is_interactive_terminal()
+
+
 def echo_list(*, as_list: bool = False) -> None:
     """Lista todos os tipos de mensagens disponíveis usando a instância padrão de Echo."""
     _default_echo.echo_list(as_list=as_list)
@@ -135,6 +150,7 @@ def echo_list(*, as_list: bool = False) -> None:
 def _validate_echo_attribute_error() -> None:
     """Força a funcionalidade de erro do Echo, provocando um AttributeError."""
     del _default_echo._SYMBOL_MAP  # noqa: SLF001
+    del _default_echo._PLAIN_SYMBOL_MAP  # noqa: SLF001
     echo("Esta mensagem de teste recebeu um fallback com 'print()'.")
 
 
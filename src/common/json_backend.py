@@ -0,0 +1,121 @@
+"""Módulo com o backend de serialização JSON usado no caminho crítico da aplicação.
+
+Usa o `orjson` quando instalado (dependência opcional `fast`) e recorre ao módulo `json`
+da biblioteca padrão caso contrário. A saída é sempre compacta e em UTF-8; a indentação
+fica restrita à exibição interativa.
+"""
+
+from collections.abc import Callable
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+
+class JsonBackend:
+    """Backend de serialização JSON com implementação substituível."""
+
+    def __init__(
+        self,
+        name: str,
+        dumps_bytes: Callable[[Any], bytes],
+        loads: Callable[[bytes | str], Any],
+        dumps_pretty: Callable[[Any], str],
+    ) -> None:
+        """Inicializa o backend com as funções de codificação e decodificação."""
+        self.name = name
+        """Nome do backend, ex: `orjson` ou `json`."""
+
+        self.dumps_bytes = dumps_bytes
+        """Serializa um objeto em bytes UTF-8 compactos."""
+
+        self.loads = loads
+        """Desserializa bytes ou string JSON."""
+
+        self.dumps_pretty = dumps_pretty
+        """Serializa um objeto em string indentada para exibição."""
+
+    def dumps(self, obj: Any) -> str:
+        """Serializa um objeto em string JSON compacta."""
+        return self.dumps_bytes(obj).decode("utf-8")
+
+
+def _stdlib_backend() -> JsonBackend:
+    """Cria o backend baseado no módulo `json` da biblioteca padrão."""
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    return JsonBackend(
+        name="json",
+        dumps_bytes=lambda obj: encoder.encode(obj).encode("utf-8"),
+        loads=json.loads,
+        dumps_pretty=lambda obj: json.dumps(obj, indent=4, ensure_ascii=False),
+    )
+
+
+def _orjson_backend() -> JsonBackend:
+    """Cria o backend baseado no `orjson`."""
+    if orjson is None:
+        raise ImportError("O backend 'orjson' requer a dependência opcional `orjson`.")
+    return JsonBackend(
+        name="orjson",
+        dumps_bytes=orjson.dumps,
+        loads=orjson.loads,
+        dumps_pretty=lambda obj: orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8"),
+    )
+
+
+_BACKENDS: dict[str, Callable[[], JsonBackend]] = {
+    "json": _stdlib_backend,
+    "orjson": _orjson_backend,
+}
+"""Mapeia o nome de cada backend para sua função de criação."""
+
+
+def get_backend(name: str = "auto") -> JsonBackend:
+    """Retorna o backend pelo nome; `auto` escolhe o mais rápido disponível."""
+    if name == "auto":
+        name = "orjson" if orjson is not None else "json"
+    try:
+        factory = _BACKENDS[name]
+    except KeyError:
+        msg = f"Backend JSON inválido: '{name}'. Esperado: {['auto', *_BACKENDS]}"
+        raise ValueError(msg) from None
+    return factory()
+
+
+_backend: JsonBackend = get_backend()
+"""Backend ativo usado pelas funções do módulo."""
+
+
+def use_backend(name: str) -> JsonBackend:
+    """Define o backend ativo usado pelas funções do módulo e o retorna."""
+    global _backend  # noqa: PLW0603
+    _backend = get_backend(name)
+    return _backend
+
+
+def backend_name() -> str:
+    """Retorna o nome do backend ativo."""
+    return _backend.name
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serializa um objeto em bytes UTF-8 compactos usando o backend ativo."""
+    return _backend.dumps_bytes(obj)
+
+
+def dumps(obj: Any) -> str:
+    """Serializa um objeto em string JSON compacta usando o backend ativo."""
+    return _backend.dumps(obj)
+
+
+def dumps_pretty(obj: Any) -> str:
+    """Serializa um objeto em string JSON indentada usando o backend ativo."""
+    return _backend.dumps_pretty(obj)
+
+
+def loads(data: bytes | str) -> Any:
+    """Desserializa bytes ou string JSON usando o backend ativo."""
+    return _backend.loads(data)
@@ -0,0 +1,198 @@
+"""Módulo com um provedor simulado de `/v1/chat/completions` para testes e benchmarks.
+
+As respostas podem ser sintéticas (no formato da DeepSeek) ou reproduzidas a partir do
+arquivo bruto de respostas, casando cada requisição pelo corpo original quando possível.
+"""
+
+from collections.abc import Iterable
+from hashlib import blake2b
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import cycle
+import threading
+import time
+from types import TracebackType
+from typing import Any, Self
+import uuid
+
+from src.common import json_backend
+from src.common.conversation_history import estimate_tokens
+
+
+def synthetic_response(payload: dict[str, Any]) -> dict[str, Any]:
+    """Gera uma resposta sintética no formato da DeepSeek para o payload informado."""
+    messages = payload["messages"]
+    prompt = messages[-1]["content"] if messages else ""
+    prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+    choices_count = int(payload.get("n", 1))
+    choices = [
+        {
+            "index": idx,
+            "message": {"role": "assistant", "content": f"Resposta {idx} para: {prompt}"},
+            "logprobs": None,
+            "finish_reason": "stop",
+        }
+        for idx in range(choices_count)
+    ]
+    completion_tokens = sum(estimate_tokens(choice["message"]["content"]) for choice in choices)
+    return {
+        "id": str(uuid.uuid4()),
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": payload.get("model", "mock-chat"),
+        "choices": choices,
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+            "prompt_cache_hit_tokens": 0,
+            "prompt_cache_miss_tokens": prompt_tokens,
+        },
+        "system_fingerprint": "fp_mock",
+    }
+
+
+def _body_key(body: bytes) -> bytes:
+    """Retorna a chave de casamento de uma requisição a partir do corpo bruto."""
+    return blake2b(body, digest_size=16).digest()
+
+
+class MockProvider:
+    """Servidor HTTP local que simula o endpoint de chat completions de um provedor."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_seconds: float = 0.0,
+        replay: Iterable[tuple[bytes, bytes]] | None = None,
+        max_concurrency: int | None = None,
+    ) -> None:
+        """Inicializa o servidor; `replay` recebe pares `(requisição, resposta)` brutos."""
+        self.latency_seconds = latency_seconds
+        """Atraso artificial aplicado a cada resposta."""
+
+        self.max_concurrency = max_concurrency
+        """Capacidade simulada; requisições acima dela recebem status 429."""
+
+        self.requests: int = 0
+        """Número de requisições atendidas."""
+
+        self.rate_limited: int = 0
+        """Número de requisições recusadas com status 429."""
+
+        self.peak_concurrency: int = 0
+        """Maior número de requisições simultâneas observado."""
+
+        self._active: int = 0
+        """Requisições em andamento."""
+
+        self._replay_by_body: dict[bytes, bytes] = {}
+        """Respostas arquivadas indexadas pelo corpo da requisição original."""
+
+        replay_responses: list[bytes] = []
+        for request, response in replay or ():
+            self._replay_by_body[_body_key(request)] = response
+            replay_responses.append(response)
+
+        self._replay_cycle = cycle(replay_responses) if replay_responses else None
+        """Respostas arquivadas em ordem, usadas quando o corpo não é encontrado."""
+
+        self._lock = threading.Lock()
+        """Protege o contador e o ciclo de respostas entre as threads do servidor."""
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        """Servidor HTTP subjacente."""
+
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+        """Thread que executa o laço do servidor."""
+
+    @property
+    def url(self) -> str:
+        """Retorna a URL do endpoint de chat completions simulado."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def begin_request(self) -> bool:
+        """Registra o início de uma requisição; retorna False se exceder a capacidade."""
+        with self._lock:
+            if self.max_concurrency is not None and self._active >= self.max_concurrency:
+                self.rate_limited += 1
+                return False
+            self._active += 1
+            self.peak_concurrency = max(self.peak_concurrency, self._active)
+            return True
+
+    def end_request(self) -> None:
+        """Registra o fim de uma requisição."""
+        with self._lock:
+            self._active -= 1
+
+    def respond(self, body: bytes) -> bytes:
+        """Retorna a resposta bruta para o corpo de requisição informado."""
+        with self._lock:
+            self.requests += 1
+            if self._replay_cycle is not None:
+                return self._replay_by_body.get(_body_key(body)) or next(self._replay_cycle)
+        return json_backend.dumps_bytes(synthetic_response(json_backend.loads(body)))
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        """Cria a classe de tratamento das requisições ligada a esta instância."""
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if not provider.begin_request():
+                    self._send(429, b'{"error": "rate limited"}')
+                    return
+                try:
+                    if provider.latency_seconds:
+                        time.sleep(provider.latency_seconds)
+                    content, status = provider.respond(body), 200
+                except (ValueError, KeyError, TypeError) as exc:
+                    content, status = json_backend.dumps_bytes({"error": str(exc)}), 400
+                finally:
+                    provider.end_request()
+                self._send(status, content)
+
+            def _send(self, status: int, content: bytes) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+                """Silencia o log de acesso do servidor."""
+
+        return Handler
+
+    def start(self) -> Self:
+        """Inicia o servidor em uma thread em segundo plano."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Encerra o servidor."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> Self:
+        """Inicia o servidor ao entrar no contexto."""
+        return self.start()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Encerra o servidor ao sair do contexto."""
+        self.stop()
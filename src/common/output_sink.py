@@ -0,0 +1,204 @@
+"""Módulo com os destinos de saída dos resultados da API.
+
+Separa a exibição dos resultados da execução: em lotes, os modos `quiet` e `jsonl` não fazem
+nenhuma formatação por item, e o modo `buffered` agrupa as escritas no console. O modo `auto`
+usa `tty` em terminais e `jsonl` na saída padrão fora deles, sem formatação por item.
+
+Os destinos com conteúdo pendente são descarregados por um único `atexit` do módulo, que os
+referencia sem mantê-los vivos; `close` descarrega e libera o destino antes disso.
+"""
+
+import atexit
+import io
+from pathlib import Path
+import shutil
+import sys
+from typing import Any, BinaryIO, TextIO
+import weakref
+
+from src.common import json_backend
+from src.common.echo import is_interactive_terminal
+from src.config.constypes import PathLike
+
+OUTPUT_MODES: tuple[str, ...] = ("auto", "tty", "buffered", "jsonl", "quiet")
+"""Modos de saída aceitos por `create_output_sink`."""
+
+_open_sinks: "weakref.WeakSet[OutputSink]" = weakref.WeakSet()
+"""Destinos com escrita em buffer ainda não fechados, descarregados ao final do processo."""
+
+
+@atexit.register
+def _flush_open_sinks() -> None:
+    """Descarrega os destinos ainda abertos ao final do processo."""
+    for sink in list(_open_sinks):
+        sink.flush()
+
+
+class OutputSink:
+    """Destino de saída base, que descarta tudo."""
+
+    def emit_raw(self, result: dict[str, Any]) -> None:
+        """Registra o resultado bruto da API."""
+
+    def emit_summary(
+        self, prompt: str, completions: list[str], model: str, total_tokens: int
+    ) -> None:
+        """Registra o resumo legível de um resultado."""
+
+    def flush(self) -> None:
+        """Descarrega o conteúdo pendente."""
+
+    def close(self) -> None:
+        """Descarrega o conteúdo pendente e libera o destino."""
+        self.flush()
+        _open_sinks.discard(self)
+
+
+class QuietSink(OutputSink):
+    """Destino de saída silencioso para execuções em lote."""
+
+
+class TtySink(OutputSink):
+    """Destino de saída interativo, com JSON indentado e resumo formatado."""
+
+    def __init__(self, stream: TextIO | None = None, *, show_raw: bool = True) -> None:
+        """Inicializa o destino, calculando a largura do terminal uma única vez."""
+        self.stream = stream
+        """Fluxo de saída; `None` usa o `sys.stdout` do momento da escrita."""
+
+        self.show_raw = show_raw
+        """Indica se o JSON completo do resultado deve ser exibido."""
+
+        self.separator = "-" * shutil.get_terminal_size((80, 20)).columns
+        """Linha separadora ajustada à largura do terminal."""
+
+    def _write(self, text: str) -> None:
+        """Escreve o texto no fluxo de saída."""
+        (self.stream or sys.stdout).write(text)
+
+    def format_summary(
+        self, prompt: str, completions: list[str], model: str, total_tokens: int
+    ) -> str:
+        """Formata o resumo legível de um resultado em um único bloco de texto."""
+        if len(completions) == 1:
+            answers = f"💡 Resposta: {completions[0]}\n"
+        else:
+            answers = "".join(
+                f"💡 Resposta {idx}: {completion}\n"
+                for idx, completion in enumerate(completions, start=1)
+            )
+        return (
+            f"{self.separator}\n"
+            f"📌 Prompt: {prompt}\n"
+            f"{answers}"
+            f"{self.separator}\n"
+            "🔍 Detalhes:\n"
+            f"   • Modelo: {model}\n"
+            f"   • Tokens Utilizados: {total_tokens}\n"
+        )
+
+    def emit_raw(self, result: dict[str, Any]) -> None:
+        """Exibe o JSON indentado do resultado, se habilitado."""
+        if self.show_raw:
+            self._write(f"{json_backend.dumps_pretty(result)}\n")
+
+    def emit_summary(
+        self, prompt: str, completions: list[str], model: str, total_tokens: int
+    ) -> None:
+        """Exibe o resumo formatado do resultado."""
+        self._write(self.format_summary(prompt, completions, model, total_tokens))
+
+
+class BufferedSink(TtySink):
+    """Destino de saída que acumula o resumo formatado e o escreve em blocos."""
+
+    def __init__(self, stream: TextIO | None = None, buffer_size: int = 64 * 1024) -> None:
+        """Inicializa o buffer e registra a descarga ao final do processo."""
+        super().__init__(stream, show_raw=False)
+
+        self.buffer_size = buffer_size
+        """Tamanho, em caracteres, a partir do qual o buffer é descarregado."""
+
+        self._buffer = io.StringIO()
+        """Conteúdo pendente de escrita."""
+
+        _open_sinks.add(self)
+
+    def _write(self, text: str) -> None:
+        """Acumula o texto e descarrega quando o buffer atinge o limite."""
+        self._buffer.write(text)
+        if self._buffer.tell() >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Escreve o conteúdo pendente no fluxo de saída em uma única chamada."""
+        pending = self._buffer.getvalue()
+        if not pending:
+            return
+        stream = self.stream or sys.stdout
+        stream.write(pending)
+        stream.flush()
+        self._buffer = io.StringIO()
+
+
+class JsonlSink(OutputSink):
+    """Destino de saída que grava cada resultado bruto como uma linha JSON compacta."""
+
+    def __init__(self, path: PathLike | None = None, stream: BinaryIO | None = None) -> None:
+        """Inicializa o destino em um arquivo ou fluxo binário (padrão: `sys.stdout`)."""
+        self.path = Path(path) if path else None
+        """Arquivo de destino, se houver."""
+
+        self._file: BinaryIO | None = None
+        """Arquivo aberto sob demanda na primeira escrita."""
+
+        self.stream = stream
+        """Fluxo binário de destino quando nenhum arquivo é informado."""
+
+        _open_sinks.add(self)
+
+    def _target(self) -> BinaryIO:
+        """Retorna o fluxo binário de destino, abrindo o arquivo se necessário."""
+        if self.path is None:
+            return self.stream or sys.stdout.buffer
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("ab")
+        return self._file
+
+    def emit_raw(self, result: dict[str, Any]) -> None:
+        """Grava o resultado bruto como uma linha JSON."""
+        self._target().write(json_backend.dumps_bytes(result) + b"\n")
+
+    def flush(self) -> None:
+        """Descarrega o fluxo de destino."""
+        if self.path is None or self._file is not None:
+            self._target().flush()
+
+    def close(self) -> None:
+        """Descarrega o destino e fecha o arquivo, se aberto."""
+        super().close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def create_output_sink(mode: str = "auto", path: PathLike | None = None) -> OutputSink:
+    """Cria o destino de saída do modo informado.
+
+    `auto` usa `tty` em terminais e, fora deles, `jsonl` na saída padrão, sem formatação.
+    """
+    if mode == "auto":
+        if not is_interactive_terminal():
+            return JsonlSink()
+        mode = "tty"
+    if mode == "tty":
+        return TtySink()
+    if mode == "buffered":
+        return BufferedSink()
+    if mode == "jsonl":
+        return JsonlSink(path)
+    if mode == "quiet":
+        return QuietSink()
+    msg = f"Modo de saída inválido: '{mode}'. Esperado: {OUTPUT_MODES}"
+    raise ValueError(msg)
@@ -0,0 +1,265 @@
+"""Módulo com o perfilamento opcional das execuções da aplicação.
+
+Quando habilitado (flag `--profile`, variável de ambiente `AI_API_PROFILE` ou
+`profiling_settings.enabled`), uma sessão grava em `logs/profiling/`:
+
+- `<sessão>.pstats`: perfil determinístico do `cProfile` da thread principal (`pstats`);
+- `<sessão>.folded`: pilhas amostradas de todas as threads, no formato "collapsed stacks" do
+  `flamegraph.pl`/speedscope;
+- `<sessão>.tracemalloc` e `<sessão>-memory.txt`: snapshot do `tracemalloc` e as maiores
+  alocações por linha;
+- `<sessão>-spans.json`: duração de cada etapa (`span`) no formato Trace Event do Chrome,
+  aberto no `chrome://tracing` ou no Perfetto.
+
+Desabilitado, nenhum perfilador, thread ou `tracemalloc` é iniciado e `span` retorna um
+contexto vazio compartilhado.
+"""
+
+from collections import Counter
+from collections.abc import Iterator
+import contextlib
+import cProfile
+from datetime import datetime
+import os
+from pathlib import Path
+import sys
+import threading
+import time
+import tracemalloc
+from types import FrameType, TracebackType
+from typing import Any
+
+import yaml
+
+from src.common import json_backend
+from src.common.logger import LoggerSingleton
+from src.config.constants import SETTINGS_FILE
+from src.config.constypes import PathLike
+
+PROFILE_ENV_VAR: str = "AI_API_PROFILE"
+"""Variável de ambiente que habilita (`1`, `true`) ou desabilita (`0`, `false`) o perfil."""
+
+_TRUTHY: frozenset[str] = frozenset({"1", "true", "yes", "on"})
+"""Valores da variável de ambiente interpretados como habilitado."""
+
+_NULL_SPAN = contextlib.nullcontext()
+"""Contexto vazio retornado por `span` quando não há sessão ativa."""
+
+_active: "Profiler | None" = None
+"""Perfilador da sessão ativa, se houver."""
+
+
+def profiling_enabled(*, flag: bool | None = None, settings: dict[str, Any] | None = None) -> bool:
+    """Indica se o perfil está habilitado: flag, depois variável de ambiente, depois settings."""
+    if flag is not None:
+        return flag
+    env = os.getenv(PROFILE_ENV_VAR)
+    if env is not None:
+        return env.strip().lower() in _TRUTHY
+    if settings is None:
+        settings = load_profiling_settings()
+    return bool(settings.get("enabled"))
+
+
+def load_profiling_settings(file_path: PathLike = SETTINGS_FILE) -> dict[str, Any]:
+    """Carrega a seção `profiling_settings` do arquivo de configurações."""
+    with Path(file_path).open(encoding="utf-8") as file:
+        return yaml.safe_load(file).get("profiling_settings", {})
+
+
+class _Span:
+    """Etapa cronometrada de uma sessão de perfil."""
+
+    __slots__ = ("name", "profiler", "started")
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.started = 0
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter_ns()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.profiler.record_span(self.name, self.started, time.perf_counter_ns())
+
+
+class Profiler:
+    """Perfilador de uma sessão: CPU (determinístico e amostrado), memória e etapas."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        name: str,
+        output_dir: PathLike = "logs/profiling",
+        *,
+        cprofile: bool = True,
+        sampling_interval: float = 0.005,
+        trace_memory: bool = True,
+        tracemalloc_frames: int = 10,
+    ) -> None:
+        """Inicializa o perfilador; `sampling_interval=0` desabilita a amostragem."""
+        self.name = f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"  # noqa: DTZ005
+        """Nome da sessão, usado como prefixo dos arquivos gerados."""
+
+        self.output_dir = Path(output_dir)
+        """Diretório dos arquivos gerados."""
+
+        self.sampling_interval = sampling_interval
+        """Intervalo, em segundos, entre as amostras das pilhas."""
+
+        self.trace_memory = trace_memory
+        """Indica se o `tracemalloc` é iniciado na sessão."""
+
+        self.tracemalloc_frames = tracemalloc_frames
+        """Número de quadros guardados por alocação no `tracemalloc`."""
+
+        self.spans: list[tuple[str, int, int, int]] = []
+        """Etapas registradas: nome, início e fim (ns) e id da thread."""
+
+        self.stacks: Counter[str] = Counter()
+        """Contagem de amostras por pilha no formato "collapsed"."""
+
+        self._cprofile = cProfile.Profile() if cprofile else None
+        """Perfilador determinístico da thread que inicia a sessão."""
+
+        self._started_tracemalloc = False
+        """Indica se esta sessão iniciou o `tracemalloc` (e deve pará-lo)."""
+
+        self._stop_sampling = threading.Event()
+        """Sinaliza o fim da amostragem."""
+
+        self._sampler: threading.Thread | None = None
+        """Thread de amostragem das pilhas."""
+
+        self._origin_ns = 0
+        """Início da sessão, referência dos tempos das etapas."""
+
+    def span(self, name: str) -> _Span:
+        """Retorna um contexto que cronometra a etapa informada."""
+        return _Span(self, name)
+
+    def record_span(self, name: str, started_ns: int, ended_ns: int) -> None:
+        """Registra a duração de uma etapa."""
+        self.spans.append((name, started_ns, ended_ns, threading.get_ident()))
+
+    def start(self) -> None:
+        """Inicia os perfiladores habilitados."""
+        self._origin_ns = time.perf_counter_ns()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(self.tracemalloc_frames)
+            self._started_tracemalloc = True
+        if self.sampling_interval > 0:
+            self._sampler = threading.Thread(
+                target=self._sample, name="profiling-sampler", daemon=True
+            )
+            self._sampler.start()
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    def stop(self) -> list[Path]:
+        """Para os perfiladores e grava os arquivos da sessão, retornando seus caminhos."""
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._sampler is not None:
+            self._stop_sampling.set()
+            self._sampler.join()
+        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        prefix = self.output_dir / self.name
+        written: list[Path] = []
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(prefix.with_suffix(".pstats"))
+            written.append(prefix.with_suffix(".pstats"))
+        if self._sampler is not None:
+            folded = "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+            prefix.with_suffix(".folded").write_text(folded, encoding="utf-8")
+            written.append(prefix.with_suffix(".folded"))
+        if snapshot is not None:
+            snapshot.dump(str(prefix.with_suffix(".tracemalloc")))
+            top = snapshot.statistics("lineno")[:25]
+            memory = Path(f"{prefix}-memory.txt")
+            memory.write_text("".join(f"{stat}\n" for stat in top), encoding="utf-8")
+            written.extend([prefix.with_suffix(".tracemalloc"), memory])
+        spans = Path(f"{prefix}-spans.json")
+        spans.write_bytes(json_backend.dumps_bytes(self._trace_events()))
+        written.append(spans)
+        return written
+
+    def _trace_events(self) -> dict[str, Any]:
+        """Converte as etapas para o formato Trace Event do Chrome (tempos em µs)."""
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": (started - self._origin_ns) / 1000,
+                    "dur": (ended - started) / 1000,
+                    "pid": pid,
+                    "tid": tid,
+                }
+                for name, started, ended, tid in self.spans
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def _sample(self) -> None:
+        """Amostra periodicamente as pilhas de todas as threads, exceto a própria."""
+        own = threading.get_ident()
+        while not self._stop_sampling.wait(self.sampling_interval):
+            for thread_id, frame in sys._current_frames().items():  # noqa: SLF001
+                if thread_id != own:
+                    self.stacks[_collapse(frame)] += 1
+
+
+def _collapse(frame: FrameType | None) -> str:
+    """Converte a pilha do quadro em uma linha "collapsed", da raiz para a folha."""
+    names: list[str] = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def span(name: str) -> contextlib.AbstractContextManager[None]:
+    """Cronometra a etapa na sessão ativa; sem sessão, retorna um contexto vazio."""
+    profiler = _active
+    return _NULL_SPAN if profiler is None else profiler.span(name)
+
+
+@contextlib.contextmanager
+def profiling_session(
+    name: str, *, enabled: bool | None = None, settings: dict[str, Any] | None = None
+) -> Iterator[Profiler | None]:
+    """Executa o bloco em uma sessão de perfil, se habilitado e sem outra sessão ativa."""
+    global _active  # noqa: PLW0603
+    if _active is not None or not profiling_enabled(flag=enabled, settings=settings):
+        yield _active
+        return
+    settings = settings if settings is not None else load_profiling_settings()
+    profiler = Profiler(
+        name,
+        settings.get("output_dir", "logs/profiling"),
+        cprofile=settings.get("cprofile", True),
+        sampling_interval=settings.get("sampling_interval_seconds", 0.005),
+        trace_memory=settings.get("tracemalloc", True),
+        tracemalloc_frames=settings.get("tracemalloc_frames", 10),
+    )
+    _active = profiler
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        _active = None
+        logger = LoggerSingleton().logger or LoggerSingleton.get_logger()
+        for path in profiler.stop():
+            logger.info(f"Perfil gravado em '{path}'.")
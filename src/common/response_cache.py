@@ -0,0 +1,78 @@
+"""Módulo com o cache em memória das respostas da API por payload exato.
+
+As entradas são indexadas por um hash do payload serializado e descartadas pela ordem de uso
+menos recente (LRU) ao atingir o limite de entradas, ou ao expirar o tempo de vida.
+"""
+
+from collections import OrderedDict
+from hashlib import blake2b
+import threading
+import time
+from typing import Any
+
+from src.common import json_backend
+
+
+def payload_key(payload: dict[str, Any]) -> bytes:
+    """Retorna a chave de cache de um payload a partir da sua serialização compacta."""
+    return blake2b(json_backend.dumps_bytes(payload), digest_size=16).digest()
+
+
+class ResponseCache:
+    """Cache LRU com tempo de vida das respostas da API, seguro entre threads."""
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float | None = 3600.0) -> None:
+        """Inicializa o cache com o limite de entradas e o tempo de vida informados."""
+        self.max_entries = max_entries
+        """Número máximo de respostas mantidas em memória."""
+
+        self.ttl_seconds = ttl_seconds
+        """Tempo de vida de cada resposta; `None` mantém até ser descartada por uso."""
+
+        self.hits: int = 0
+        """Número de consultas atendidas pelo cache."""
+
+        self.misses: int = 0
+        """Número de consultas não encontradas ou expiradas."""
+
+        self._entries: OrderedDict[bytes, tuple[float, dict[str, Any]]] = OrderedDict()
+        """Respostas e instante de gravação, do menos ao mais recentemente usado."""
+
+        self._lock = threading.Lock()
+        """Protege as entradas e os contadores."""
+
+    def __len__(self) -> int:
+        """Retorna o número de respostas em cache."""
+        return len(self._entries)
+
+    def get(self, key: bytes) -> dict[str, Any] | None:
+        """Retorna a resposta em cache para a chave, ou None se ausente ou expirada."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                self.ttl_seconds is None or time.monotonic() - entry[0] <= self.ttl_seconds
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: bytes, response: dict[str, Any]) -> None:
+        """Grava a resposta, descartando as menos usadas recentemente acima do limite."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def metrics(self) -> dict[str, int]:
+        """Retorna as métricas do cache."""
+        with self._lock:
+            return {
+                "cache_entries": len(self._entries),
+                "cache_hits": self.hits,
+                "cache_misses": self.misses,
+            }
@@ -0,0 +1,236 @@
+"""Módulo com o escalonador de chamadas à API por prioridade, prazo e divisão justa.
+
+As chamadas aguardam em filas por classe de prioridade: uma vaga livre do `AimdLimiter` é
+sempre entregue à classe mais prioritária com chamadas pendentes. Dentro de cada classe, as
+vagas são divididas entre os tenants (ex: usuários ou jobs) conforme seus pesos, usando
+enfileiramento justo por tempo virtual de início (SFQ). Chamadas com prazo são recusadas na
+entrada quando a espera estimada já o excede e descartadas se o prazo vencer na fila.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+import heapq
+from itertools import count
+import threading
+import time
+from typing import Any, TypeVar
+
+from src.common.concurrency import AimdLimiter
+from src.core.errors import DeadlineExceededError
+from src.enums.priority import Priority
+
+T = TypeVar("T")
+
+
+@dataclass(order=True)
+class _Request:
+    """Chamada pendente na fila de uma classe de prioridade."""
+
+    start_tag: float
+    """Tempo virtual de início, que ordena as chamadas dentro da classe."""
+
+    sequence: int
+    """Ordem de chegada, usada como desempate."""
+
+    priority: Priority = field(compare=False)
+    tenant: str = field(compare=False)
+    deadline: float | None = field(compare=False)
+    """Instante limite (`time.monotonic`) para iniciar a chamada, se houver."""
+
+    granted: threading.Event = field(default_factory=threading.Event, compare=False)
+    """Sinaliza que a chamada recebeu uma vaga ou foi descartada."""
+
+    state: str = field(default="queued", compare=False)
+    """Estado da chamada: `queued`, `granted` ou `expired`."""
+
+
+class PriorityScheduler:
+    """Escalonador das chamadas sobre o `AimdLimiter`, com prioridades, prazos e pesos."""
+
+    def __init__(
+        self,
+        limiter: AimdLimiter,
+        *,
+        interactive_reserved_slots: int = 1,
+        tenant_weights: dict[str, float] | None = None,
+    ) -> None:
+        """Inicializa o escalonador sobre o limitador de concorrência informado."""
+        self.limiter = limiter
+        """Limitador que define quantas chamadas ficam em andamento."""
+
+        self.interactive_reserved_slots = interactive_reserved_slots
+        """Vagas que as classes abaixo de `INTERACTIVE` não podem ocupar."""
+
+        self.tenant_weights = tenant_weights or {}
+        """Peso de cada tenant na divisão das vagas; tenants ausentes têm peso 1."""
+
+        self._queues: dict[Priority, list[_Request]] = {priority: [] for priority in Priority}
+        """Heap das chamadas pendentes de cada classe, ordenado pelo tempo virtual."""
+
+        self._virtual_time: dict[Priority, float] = dict.fromkeys(Priority, 0.0)
+        """Tempo virtual de cada classe: o início da última chamada liberada."""
+
+        self._finish_tags: dict[tuple[Priority, str], float] = {}
+        """Tempo virtual de término da última chamada enfileirada de cada tenant."""
+
+        self._queued_by_tenant: dict[tuple[Priority, str], int] = {}
+        """Número de chamadas pendentes de cada tenant."""
+
+        self._sequence = count()
+        """Contador da ordem de chegada."""
+
+        self._counters: dict[str, int] = {"granted": 0, "refused": 0, "expired": 0}
+        """Número de chamadas liberadas, recusadas na entrada e descartadas na fila."""
+
+        self._lock = threading.Lock()
+        """Protege as filas e o tempo virtual."""
+
+    @property
+    def queued(self) -> int:
+        """Retorna o número de chamadas pendentes em todas as classes."""
+        with self._lock:
+            return sum(self._queued_by_tenant.values())
+
+    def estimated_wait(self, priority: Priority) -> float:
+        """Estima, em segundos, a espera de uma nova chamada da classe informada."""
+        with self._lock:
+            ahead = sum(
+                queued for (queue, _), queued in self._queued_by_tenant.items() if queue <= priority
+            )
+        latency = self.limiter.metrics()["baseline_latency_seconds"] or 0.0
+        # Cada "rodada" do limitador atende `limit` chamadas em cerca de uma latência de base
+        return (ahead + self.limiter.in_flight) / self.limiter.limit * latency
+
+    def acquire(
+        self,
+        priority: Priority = Priority.INTERACTIVE,
+        tenant: str = "default",
+        deadline: float | None = None,
+        cost: float = 1.0,
+    ) -> None:
+        """Aguarda uma vaga na vez da chamada; lança `DeadlineExceededError` se não couber.
+
+        O `deadline` é um instante de `time.monotonic`. O `cost` é a parcela da vaga
+        consumida no tempo virtual do tenant, ex: o número de respostas solicitadas.
+        """
+        if deadline is not None and time.monotonic() + self.estimated_wait(priority) > deadline:
+            with self._lock:
+                self._counters["refused"] += 1
+            msg = f"Chamada recusada: a espera estimada excede o prazo ({priority.name})."
+            raise DeadlineExceededError(msg)
+
+        request = self._enqueue(priority, tenant, deadline, cost)
+        self._pump()
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+        request.granted.wait(timeout)
+        with self._lock:
+            if request.state == "queued":
+                # O prazo venceu antes de a vez chegar; a chamada é removida da fila
+                request.state = "expired"
+                self._counters["expired"] += 1
+                self._forget(request)
+        if request.state != "granted":
+            msg = f"Chamada descartada: o prazo venceu na fila ({priority.name})."
+            raise DeadlineExceededError(msg)
+
+    def release(self, outcome: str, latency: float) -> None:
+        """Libera a vaga da chamada e entrega as vagas livres às próximas da fila."""
+        self.limiter.release(outcome, latency)
+        self._pump()
+
+    def call(  # noqa: PLR0913, PLR0917
+        self,
+        func: Callable[[], T],
+        classify: Callable[[T], str],
+        priority: Priority = Priority.INTERACTIVE,
+        tenant: str = "default",
+        deadline: float | None = None,
+        cost: float = 1.0,
+    ) -> T:
+        """Executa a função na vez da chamada, classificando o resultado para o limitador."""
+        self.acquire(priority, tenant, deadline, cost)
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = func()
+            outcome = classify(result)
+        finally:
+            self.release(outcome, time.perf_counter() - started)
+        return result
+
+    def _enqueue(
+        self, priority: Priority, tenant: str, deadline: float | None, cost: float
+    ) -> _Request:
+        """Enfileira a chamada com o tempo virtual de início do tenant."""
+        key = (priority, tenant)
+        with self._lock:
+            start_tag = max(self._virtual_time[priority], self._finish_tags.get(key, 0.0))
+            self._finish_tags[key] = start_tag + cost / self.tenant_weights.get(tenant, 1.0)
+            self._queued_by_tenant[key] = self._queued_by_tenant.get(key, 0) + 1
+            request = _Request(start_tag, next(self._sequence), priority, tenant, deadline)
+            heapq.heappush(self._queues[priority], request)
+        return request
+
+    def _forget(self, request: _Request) -> None:
+        """Desconta a chamada do tenant; a remoção do heap é feita ao chegar ao topo."""
+        key = (request.priority, request.tenant)
+        self._queued_by_tenant[key] -= 1
+        if not self._queued_by_tenant[key]:
+            # Tenants ociosos não acumulam crédito: voltam a partir do tempo virtual atual
+            del self._queued_by_tenant[key]
+            del self._finish_tags[key]
+
+    def _capacity(self, priority: Priority) -> int:
+        """Retorna o número de vagas que a classe informada pode ocupar."""
+        limit = self.limiter.limit
+        if priority == Priority.INTERACTIVE:
+            return limit
+        return max(limit - self.interactive_reserved_slots, 1)
+
+    def _next_request(self) -> _Request | None:
+        """Retorna a próxima chamada a ser atendida, descartando as vencidas."""
+        now = time.monotonic()
+        for priority in Priority:
+            queue = self._queues[priority]
+            while queue and queue[0].state != "queued":
+                heapq.heappop(queue)
+            while queue and queue[0].deadline is not None and queue[0].deadline < now:
+                expired = heapq.heappop(queue)
+                expired.state = "expired"
+                self._counters["expired"] += 1
+                self._forget(expired)
+                expired.granted.set()
+                while queue and queue[0].state != "queued":
+                    heapq.heappop(queue)
+            if queue:
+                return queue[0]
+        return None
+
+    def _pump(self) -> None:
+        """Entrega as vagas livres do limitador às chamadas pendentes, em ordem."""
+        with self._lock:
+            while (request := self._next_request()) is not None:
+                if self.limiter.in_flight >= self._capacity(request.priority):
+                    return
+                if not self.limiter.acquire(timeout=0):
+                    return
+                heapq.heappop(self._queues[request.priority])
+                self._virtual_time[request.priority] = request.start_tag
+                request.state = "granted"
+                self._counters["granted"] += 1
+                self._forget(request)
+                request.granted.set()
+
+    def metrics(self) -> dict[str, Any]:
+        """Retorna as métricas do escalonador e do limitador."""
+        with self._lock:
+            queued = {
+                f"queued_{priority.name.lower()}": sum(
+                    queued
+                    for (queue, _), queued in self._queued_by_tenant.items()
+                    if queue == priority
+                )
+                for priority in Priority
+            }
+            counters = {f"calls_{name}": value for name, value in self._counters.items()}
+        return {**self.limiter.metrics(), **queued, **counters}
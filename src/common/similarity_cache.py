@@ -0,0 +1,190 @@
+"""Módulo com o cache aproximado de respostas para prompts quase duplicados.
+
+Os prompts são normalizados (Unicode NFKC, caixa, pontuação e espaços) e divididos em
+shingles de caracteres. Cada prompt recebe uma assinatura MinHash, indexada por LSH em bandas:
+prompts com similaridade de Jaccard alta caem no mesmo bucket de ao menos uma banda com alta
+probabilidade. A consulta custa uma assinatura e algumas comparações, independentemente do
+número de entradas, e a memória é limitada pelo descarte das entradas menos usadas (LRU).
+"""
+
+from collections import OrderedDict
+import re
+import threading
+from typing import Any, NamedTuple
+import unicodedata
+import zlib
+
+import numpy as np
+
+MERSENNE_PRIME: int = (1 << 61) - 1
+"""Primo usado nas permutações universais do MinHash."""
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+"""Remove a pontuação na normalização."""
+
+_WHITESPACE = re.compile(r"\s+")
+"""Agrupa espaços repetidos na normalização."""
+
+
+def normalize_prompt(text: str) -> str:
+    """Normaliza o prompt para comparação: NFKC, minúsculas, sem pontuação e espaços extras."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", text)).strip()
+
+
+def shingles(text: str, size: int = 5) -> set[str]:
+    """Retorna os shingles de caracteres do texto normalizado."""
+    if len(text) <= size:
+        return {text}
+    return {text[idx : idx + size] for idx in range(len(text) - size + 1)}
+
+
+def choose_bands(num_perm: int, threshold: float) -> tuple[int, int]:
+    """Escolhe bandas e linhas do LSH cujo limiar `(1/b)^(1/r)` mais se aproxima do pedido."""
+    candidates = [(bands, num_perm // bands) for bands in range(1, num_perm + 1)]
+    candidates = [(bands, rows) for bands, rows in candidates if bands * rows == num_perm]
+    return min(candidates, key=lambda band: abs((1 / band[0]) ** (1 / band[1]) - threshold))
+
+
+class CacheHit(NamedTuple):
+    """Resposta encontrada no cache aproximado."""
+
+    response: dict[str, Any]
+    similarity: float
+
+
+class SimilarityCache:
+    """Cache de respostas por similaridade de prompts, com MinHash, LSH e descarte LRU."""
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        *,
+        num_perm: int = 64,
+        shingle_size: int = 5,
+        max_entries: int = 100_000,
+        seed: int = 1,
+    ) -> None:
+        """Inicializa o cache com o limiar de similaridade e o tamanho das assinaturas."""
+        if not 0 < threshold <= 1:
+            raise ValueError("O limiar de similaridade deve estar entre 0 e 1.")
+
+        self.threshold = threshold
+        """Similaridade de Jaccard estimada mínima para reutilizar uma resposta."""
+
+        self.shingle_size = shingle_size
+        """Tamanho dos shingles de caracteres."""
+
+        self.max_entries = max_entries
+        """Número máximo de prompts indexados."""
+
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        """Número de bandas do LSH e de linhas (valores da assinatura) por banda."""
+
+        self.hits: int = 0
+        """Número de consultas atendidas pelo cache."""
+
+        self.misses: int = 0
+        """Número de consultas sem resposta similar."""
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        """Coeficientes multiplicativos das permutações."""
+
+        self._b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        """Coeficientes aditivos das permutações."""
+
+        self._signatures = np.zeros((max_entries, num_perm), dtype=np.uint32)
+        """Assinaturas das entradas, uma linha por posição, pré-alocadas para limitar a memória."""
+
+        self._entries: OrderedDict[int, dict[str, Any]] = OrderedDict()
+        """Respostas por posição, da menos à mais recentemente usada."""
+
+        self._free_slots: list[int] = list(range(max_entries - 1, -1, -1))
+        """Posições livres de `_signatures`."""
+
+        self._buckets: list[dict[bytes, set[int]]] = [{} for _ in range(self.bands)]
+        """Buckets de cada banda, mapeando o trecho da assinatura às posições das entradas."""
+
+        self._lock = threading.Lock()
+        """Protege o índice entre threads."""
+
+    def __len__(self) -> int:
+        """Retorna o número de prompts indexados."""
+        return len(self._entries)
+
+    def signature(self, prompt: str) -> np.ndarray:
+        """Calcula a assinatura MinHash do prompt normalizado."""
+        hashed = np.fromiter(
+            (
+                zlib.crc32(shingle.encode("utf-8"))
+                for shingle in shingles(normalize_prompt(prompt), self.shingle_size)
+            ),
+            dtype=np.uint64,
+        )
+        # Hashes de 32 bits e coeficientes abaixo de 2^61: o produto pode transbordar 64 bits,
+        # o que apenas muda a família de permutações, sem afetar a estimativa de Jaccard
+        permuted = (np.outer(self._a, hashed) + self._b[:, None]) % np.uint64(MERSENNE_PRIME)
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> list[bytes]:
+        """Retorna a chave de bucket de cada banda da assinatura."""
+        return [
+            signature[band * self.rows : (band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def get(self, prompt: str) -> CacheHit | None:
+        """Retorna a resposta do prompt indexado mais similar, se acima do limiar."""
+        signature = self.signature(prompt)
+        with self._lock:
+            candidates: set[int] = set()
+            for buckets, key in zip(self._buckets, self._band_keys(signature), strict=True):
+                candidates.update(buckets.get(key, ()))
+            if not candidates:
+                self.misses += 1
+                return None
+            slots = np.fromiter(candidates, dtype=np.intp, count=len(candidates))
+            # Estimativa de Jaccard: fração de posições iguais entre as assinaturas
+            similarities = (self._signatures[slots] == signature).mean(axis=1)
+            best = int(similarities.argmax())
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+            slot = int(slots[best])
+            self._entries.move_to_end(slot)
+            self.hits += 1
+            return CacheHit(self._entries[slot], float(similarities[best]))
+
+    def put(self, prompt: str, response: dict[str, Any]) -> None:
+        """Indexa a resposta do prompt, descartando as entradas menos usadas acima do limite."""
+        signature = self.signature(prompt)
+        with self._lock:
+            if not self._free_slots:
+                self._evict()
+            slot = self._free_slots.pop()
+            self._signatures[slot] = signature
+            self._entries[slot] = response
+            for buckets, key in zip(self._buckets, self._band_keys(signature), strict=True):
+                buckets.setdefault(key, set()).add(slot)
+
+    def _evict(self) -> None:
+        """Remove a entrada menos usada recentemente e seus buckets vazios."""
+        slot, _ = self._entries.popitem(last=False)
+        for buckets, key in zip(
+            self._buckets, self._band_keys(self._signatures[slot]), strict=True
+        ):
+            bucket = buckets[key]
+            bucket.discard(slot)
+            if not bucket:
+                del buckets[key]
+        self._free_slots.append(slot)
+
+    def metrics(self) -> dict[str, int]:
+        """Retorna as métricas do cache."""
+        with self._lock:
+            return {
+                "similarity_cache_entries": len(self._entries),
+                "similarity_cache_hits": self.hits,
+                "similarity_cache_misses": self.misses,
+            }
@@ -7,3 +7,7 @@ class ProjectError(Exception):
 
 class LoggerError(ProjectError):
     """Exceção para erros relacionados à configuração do logger."""
+
+
+class DeadlineExceededError(ProjectError):
+    """Exceção para chamadas recusadas ou descartadas por não caberem no prazo."""
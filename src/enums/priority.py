@@ -0,0 +1,13 @@
+"""Módulo com as classes de prioridade das chamadas à API."""
+
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    """Classe de prioridade de uma chamada; valores menores são atendidos primeiro."""
+
+    INTERACTIVE = 0
+    """Prompts de usuários aguardando a resposta."""
+
+    BATCH = 1
+    """Execuções em lote, como reprocessamentos e backfills."""
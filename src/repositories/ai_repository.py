@@ -1,27 +1,46 @@
 """Módulo de repositório para interação com a API."""
 
-import json
+from collections import OrderedDict
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 import os
 from pathlib import Path
+import time
 from typing import Any
 
 import httpx
 
-from repositories.sqlite_repository import SQLiteRepository, UsageRecord
+from repositories.sqlite_repository import ChoiceRecord, SQLiteRepository, UsageRecord
+from src.common import json_backend
+from src.common.concurrency import AimdLimiter
+from src.common.conversation_history import ConversationHistory
 from src.common.echo import echo
 from src.common.logger import LoggerSingleton
+from src.common.output_sink import OutputSink, create_output_sink
+from src.common.profiling import profiling_enabled, profiling_session, span
+from src.common.scheduler import PriorityScheduler
+from src.common.similarity_cache import SimilarityCache
 from src.config.constants import SETTINGS_FILE
 from src.core.base_class import BaseClass
+from src.core.errors import DeadlineExceededError
+from src.enums.priority import Priority
+from src.repositories.conversation_repository import ConversationRepository
+from src.repositories.raw_archive import RawArchive
+from src.repositories.sharded_repository import ShardedSQLiteRepository
 
 
 class AiRespository(BaseClass):
     """Objeto principal da aplicação para interação com a API e persistência dos dados."""
 
-    def __init__(
+    def __init__(  # noqa: PLR0913, PLR0915
         self,
         provider: str | None = "deepseek",
         prompt: str | None = None,
         model: str | None = None,
+        output_mode: str | None = None,
+        api_url: str | None = None,
+        *,
+        profile: bool | None = None,
         # sqlite_repository: SQLiteRepository,
     ) -> None:
         """Inicializa a aplicação."""
@@ -37,10 +56,13 @@ class AiRespository(BaseClass):
         self.model_settings: dict[str, str] = self.settings_config["model_settings"]
         """Instancia o dicionário de configurações de modelos."""
 
-        self.model = model if model else self.provider_settings["model"]
+        self.json = json_backend.use_backend(self.settings_config["json_settings"]["backend"])
+        """Instancia o backend JSON usado para codificar payloads e decodificar respostas."""
+
+        self.model = model or self.provider_settings["model"]
         """Instancia o modelo a ser utilizado, ex: `deepseek-chat`."""
 
-        self.api_url = self.provider_settings["api_url"]
+        self.api_url = api_url or self.provider_settings["api_url"]
         """Instancia a URL da API, ex: `https://api.deepseek.com/v1/chat/completions`."""
 
         self.max_tokens = self.model_settings["max_tokens"]
@@ -55,7 +77,7 @@ class AiRespository(BaseClass):
         self.system_content = self.model_settings["system_content"]
         """Instancia o comportamento e o papel da IA."""
 
-        self.user_content = prompt if prompt else self.model_settings["user_content"]
+        self.user_content = prompt or self.model_settings["user_content"]
         """Instancia o prompt que será respondido pela IA."""
 
         self.api_key_name = self.provider_settings["api_key_name"]
@@ -67,12 +89,109 @@ class AiRespository(BaseClass):
         self.headers = self._create_headers()
         """Instancia os cabeçalhos para a requisição HTTP."""
 
-        self.repo = SQLiteRepository(db_path="./database/api_usages.db")
-        """Instancia o repositório SQLite para persistência de uso da API."""
+        self.concurrency_settings: dict[str, Any] = self.settings_config["concurrency_settings"]
+        """Instancia o dicionário de configurações do controle de concorrência."""
+
+        self.limiter = AimdLimiter(
+            initial_limit=self.concurrency_settings["initial_limit"],
+            min_limit=self.concurrency_settings["min_limit"],
+            max_limit=self.concurrency_settings["max_limit"],
+            decrease_factor=self.concurrency_settings["decrease_factor"],
+            latency_tolerance=self.concurrency_settings["latency_tolerance"],
+            max_latency_decreases=self.concurrency_settings["max_latency_decreases"],
+        )
+        """Instancia o limitador adaptativo (AIMD) de chamadas simultâneas à API."""
+
+        self.scheduler_settings: dict[str, Any] = self.settings_config["scheduler_settings"]
+        """Instancia o dicionário de configurações do escalonador de chamadas."""
+
+        self.scheduler = PriorityScheduler(
+            self.limiter,
+            interactive_reserved_slots=self.scheduler_settings["interactive_reserved_slots"],
+            tenant_weights=self.scheduler_settings["tenant_weights"],
+        )
+        """Instancia o escalonador das chamadas por prioridade, prazo e peso do tenant."""
+
+        self.http_client = httpx.Client(
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=self.concurrency_settings["max_limit"]),
+        )
+        """Instancia o cliente HTTP com pool de conexões compartilhado entre as chamadas."""
+
+        self.persistence_settings: dict[str, Any] = self.settings_config["persistence_settings"]
+        """Instancia o dicionário de configurações da persistência do uso da API."""
+
+        self.repo: SQLiteRepository | ShardedSQLiteRepository = (
+            ShardedSQLiteRepository(
+                self.persistence_settings["shard_dir"],
+                shards=self.persistence_settings["shards"],
+                shard_key=self.persistence_settings["shard_key"],
+                time_bucket=self.persistence_settings["time_bucket"],
+            )
+            if self.persistence_settings["mode"] == "sharded"
+            else SQLiteRepository(db_path="./database/api_usages.db")
+        )
+        """Instancia o repositório SQLite (único ou em shards) para persistência de uso da API."""
 
         self.UsageRecord = UsageRecord
         """Instancia o NamedTuple para registro de uso da API."""
 
+        self.conversation_settings: dict[str, int] = self.settings_config["conversation_settings"]
+        """Instancia o dicionário de configurações das sessões de conversa."""
+
+        self.conversations = ConversationRepository(db_path="./database/api_usages.db")
+        """Instancia o repositório SQLite para persistência das sessões de conversa."""
+
+        self.output_settings: dict[str, str] = self.settings_config["output_settings"]
+        """Instancia o dicionário de configurações de saída."""
+
+        self.output: OutputSink = create_output_sink(
+            output_mode or self.output_settings["mode"], self.output_settings["jsonl_path"]
+        )
+        """Instancia o destino de saída dos resultados, ex: `tty`, `buffered`, `jsonl`."""
+
+        self.batch_settings: dict[str, int] = self.settings_config["batch_settings"]
+        """Instancia o dicionário de configurações das execuções em lote."""
+
+        self.archive_settings: dict[str, Any] = self.settings_config["archive_settings"]
+        """Instancia o dicionário de configurações do arquivo bruto de respostas."""
+
+        self.archive: RawArchive | None = (
+            RawArchive(
+                self.archive_settings["path"],
+                segment_max_bytes=self.archive_settings["segment_max_bytes"],
+            )
+            if self.archive_settings["enabled"]
+            else None
+        )
+        """Instancia o arquivo bruto de requisições e respostas, se habilitado."""
+
+        self.similarity_cache_settings: dict[str, Any] = self.settings_config[
+            "similarity_cache_settings"
+        ]
+        """Instancia o dicionário de configurações do cache de prompts quase duplicados."""
+
+        self.similarity_cache: SimilarityCache | None = (
+            SimilarityCache(
+                self.similarity_cache_settings["threshold"],
+                num_perm=self.similarity_cache_settings["num_perm"],
+                shingle_size=self.similarity_cache_settings["shingle_size"],
+                max_entries=self.similarity_cache_settings["max_entries"],
+            )
+            if self.similarity_cache_settings["enabled"]
+            else None
+        )
+        """Instancia o cache aproximado de respostas por similaridade do prompt, se habilitado."""
+
+        self.profiling_settings: dict[str, Any] = self.settings_config["profiling_settings"]
+        """Instancia o dicionário de configurações do perfilamento das execuções."""
+
+        self.profile = profiling_enabled(flag=profile, settings=self.profiling_settings)
+        """Indica se `run` e `run_many` são perfilados (flag, `AI_API_PROFILE` ou settings)."""
+
+        self._sessions: OrderedDict[str, ConversationHistory] = OrderedDict()
+        """Históricos das sessões ativas em memória, do menos ao mais recentemente usado."""
+
     def _handle_value_error(self, error_message: str) -> None:
         """Encapsula o tratamento de ValueError com logging."""
         self.logger.exception(error_message)
@@ -89,22 +208,30 @@ class AiRespository(BaseClass):
         self.logger.info(f"Chave da API '{self.api_key_name}' obtida com sucesso.")
         return api_key
 
-    def _create_payload(self, prompt: str | None = None) -> dict[str, Any]:
-        """Cria payload para requisição à API."""
+    def _create_payload(
+        self,
+        prompt: str | None = None,
+        messages: list[dict[str, str]] | None = None,
+        n: int = 1,
+    ) -> dict[str, Any]:
+        """Cria payload para requisição à API, com prompt único ou histórico de mensagens."""
         self.logger.info("Criando payload para o prompt.")
         # TODO: validar se todos os provedores aceitam o mesmo payload.
-        return {
+        payload: dict[str, Any] = {
             "model": self.model,
-            "messages": [
+            "messages": messages
+            or [
                 {"role": "system", "content": self.system_content},
-                {"role": "user", "content": prompt if prompt else self.user_content},
+                {"role": "user", "content": prompt or self.user_content},
             ],
-            # "n": 2,  # Solicita duas respostas
             "temperature": self.temperature,
             "max_tokens": self.max_tokens,
             "top_p": self.top_p,
             # "stream": False,  # Define se a resposta será transmitida em tempo real
         }
+        if n > 1:
+            payload["n"] = n  # Solicita `n` respostas pagando o prompt uma única vez
+        return payload
 
     def _create_headers(self) -> dict[str, str]:
         """Retorna os cabeçalhos para a requisição HTTP."""
@@ -117,30 +244,77 @@ class AiRespository(BaseClass):
         try:
             self.logger.info(f"Enviando requisição para a API: '{self.api_url.capitalize()}'.")
             # print(payload, self.api_url, self.headers)
-            response = httpx.post(self.api_url, headers=self.headers, json=payload, timeout=10.0)
+            # O payload é serializado uma única vez em bytes e enviado sem nova codificação
+            with span("json.encode"):
+                body = self.json.dumps_bytes(payload)
+            with span("http.post"):
+                response = self.http_client.post(self.api_url, headers=self.headers, content=body)
             response.raise_for_status()
-            self.logger.info("Resposta recebida com sucesso.")
-            return response.json()
         except httpx.HTTPError as e:
             self.logger.exception("Erro na chamada HTTP.")
-            return {"error": str(e)}
+            return {"error": str(e), "error_type": self._classify_http_error(e)}
+        self.logger.info("Resposta recebida com sucesso.")
+        with span("json.decode"):
+            result = self.json.loads(response.content)
+        if self.archive is not None and "id" in result:
+            with span("archive.append"):
+                self.archive.append(result["id"], body, response.content)
+        return result
+
+    def _classify_http_error(self, error: httpx.HTTPError) -> str:
+        """Classifica o erro HTTP para o controle de concorrência."""
+        if isinstance(error, httpx.TimeoutException):
+            return "timeout"
+        if isinstance(error, httpx.HTTPStatusError) and error.response.status_code == 429:  # noqa: PLR2004
+            return "rate_limited"
+        return "error"
+
+    def _deadline(self, priority: Priority, timeout: float | None) -> float | None:
+        """Retorna o instante limite da chamada a partir do prazo informado ou configurado."""
+        if timeout is None:
+            timeout = self.scheduler_settings[f"{priority.name.lower()}_deadline_seconds"]
+        return None if timeout is None else time.monotonic() + timeout
+
+    def dispatch(
+        self,
+        payload: dict[str, Any],
+        priority: Priority = Priority.INTERACTIVE,
+        tenant: str = "default",
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """Chama a API na vez da chamada no escalonador, repetindo após 429 ou timeout."""
+        max_retries = self.concurrency_settings["max_retries"]
+        backoff = self.concurrency_settings["retry_backoff_seconds"]
+        deadline = self._deadline(priority, timeout)
+        for attempt in range(max_retries + 1):
+            try:
+                result = self.scheduler.call(
+                    lambda: self._call_deepseek_api(payload),
+                    lambda result: result.get("error_type", "success"),
+                    priority=priority,
+                    tenant=tenant,
+                    deadline=deadline,
+                    cost=payload.get("n", 1),
+                )
+            except DeadlineExceededError as e:
+                self.logger.warning(str(e))
+                return {"error": str(e), "error_type": "deadline_exceeded"}
+            if result.get("error_type") not in {"rate_limited", "timeout"}:
+                break
+            if attempt < max_retries:
+                time.sleep(backoff * 2**attempt)
+        return result
 
     # TODO: Melhorar a mensagem de retorno para o usuário
     def format_result_for_user(self, result: dict[str, Any]) -> str:
         """Formata o resultado da API para uma leitura amigável ao usuário."""
-        if result["choices"]:
-            completion = result["choices"][0]["message"]["content"]
-            model = result["model"]
-            total_tokens = result["usage"]["total_tokens"]
-            prompt = result["prompt"]
-
-            super()._separator_line()
-            print(f"📌 Prompt: {prompt}")
-            print(f"💡 Resposta: {completion}")
-            super()._separator_line()
-            print("🔍 Detalhes:")
-            print(f"   • Modelo: {model}")
-            print(f"   • Tokens Utilizados: {total_tokens}")
+        if result.get("choices"):
+            self.output.emit_summary(
+                prompt=result["prompt"],
+                completions=[choice["message"]["content"] for choice in result["choices"]],
+                model=result["model"],
+                total_tokens=result["usage"]["total_tokens"],
+            )
             formatted_result = ""
         else:
             formatted_result = "A resposta da API não contém os campos esperados."
@@ -149,49 +323,214 @@ class AiRespository(BaseClass):
 
     def json_to_usage_record(self, result: dict[str, Any]) -> UsageRecord:
         """Converte o dicionário de resposta da API em um objeto UsageRecord."""
-        self.json_dumps(result)
-        usage = result["usage"]
-        choices = result["choices"][0]
-        return self.UsageRecord(
-            usage_id=result["id"],
-            created=result["created"],
-            model=result["model"],
-            system_fingerprint=result["system_fingerprint"],
-            prompt=result["prompt"],
-            completion=choices["message"]["content"],
-            prompt_tokens=usage["prompt_tokens"],
-            completion_tokens=usage["completion_tokens"],
-            total_tokens=usage["total_tokens"],
-            cached_tokens=usage["prompt_tokens_details"]["cached_tokens"],
-            cache_hit_tokens=usage["prompt_cache_hit_tokens"],
-            cache_miss_tokens=usage["prompt_cache_miss_tokens"],
-            finish_reason=choices["finish_reason"],
-            logprobs=choices["logprobs"],
-        )
+        return self.UsageRecord.from_result(result)
 
     def json_dumps(self, data: dict[str, Any]) -> None:
         """Converte um dicionário em uma string JSON formatada e exibe no console."""
         try:
-            print(json.dumps(data, indent=4, ensure_ascii=False))
+            print(self.json.dumps_pretty(data))
         except TypeError:
             self.logger.exception("Erro ao converter objeto para JSON.")
             raise
 
-    def run(self, prompt: str | None = None) -> None:
-        """Executa uma consulta à API DeepSeek."""
-        self.logger.info("Iniciando execução do programa.")
-        payload = self._create_payload(prompt=prompt)
-        result = self._call_deepseek_api(payload)
-        result["prompt"] = self.user_content
-        self.logger.info("Exibindo resultado da API.")
-
-        # Persistência do uso, se resposta válida
+    def complete(
+        self,
+        prompt: str | None = None,
+        n: int = 1,
+        priority: Priority = Priority.INTERACTIVE,
+        tenant: str = "default",
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """Consulta a API com `n` respostas para o prompt e persiste o uso, sem exibir.
+
+        A chamada entra no escalonador na classe `priority`, dividindo as vagas da classe
+        com os demais tenants. Sem `timeout`, vale o prazo configurado para a classe. Com o
+        cache aproximado habilitado, prompts de uma resposta similares a um já respondido
+        reutilizam a resposta anterior, sem nova chamada nem novo registro de uso.
+        """
+        prompt = prompt or self.user_content
+        use_cache = self.similarity_cache is not None and n == 1
+        if use_cache and (hit := self.similarity_cache.get(prompt)) is not None:
+            self.logger.info(f"Resposta reutilizada do cache (similaridade {hit.similarity:.2f}).")
+            return {**hit.response, "prompt": prompt, "cache_similarity": hit.similarity}
+
+        result = self.fetch(prompt, n, priority, tenant, timeout)
+        self.persist_result(result)
+        if use_cache and result.get("choices"):
+            self.similarity_cache.put(prompt, result)
+        return result
+
+    def fetch(
+        self,
+        prompt: str,
+        n: int = 1,
+        priority: Priority = Priority.INTERACTIVE,
+        tenant: str = "default",
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """Consulta a API com `n` respostas para o prompt, sem cache, persistência nem exibição."""
+        payload = self._create_payload(prompt=prompt, n=n)
+        result = self.dispatch(payload, priority, tenant, timeout)
+        result["prompt"] = prompt
+        return result
+
+    def persist_result(self, result: dict[str, Any]) -> None:
+        """Persiste o uso e, se houver várias, as respostas de um resultado válido da API."""
         if "id" in result and "usage" in result and "choices" in result:
             record = self.json_to_usage_record(result)
-            self.repo.insert_usage(record)
+            choices = ChoiceRecord.from_result(result) if len(result["choices"]) > 1 else None
+            with span("sqlite.insert"):
+                self.repo.insert_usage(record, choices)
         else:
             self.logger.warning("Resposta da API não possui campos esperados para persistência.")
 
-        # Exibe o resultado formatado
-        self.json_dumps(result)
-        self.format_result_for_user(result)
+    def _emit(self, result: dict[str, Any]) -> None:
+        """Exibe o resultado conforme o destino de saída configurado."""
+        with span("output.emit"):
+            self.output.emit_raw(result)
+            self.format_result_for_user(result)
+
+    def run(self, prompt: str | None = None, n: int = 1) -> None:
+        """Executa uma consulta à API DeepSeek, perfilada se `profile` estiver habilitado."""
+        with profiling_session("run", enabled=self.profile, settings=self.profiling_settings):
+            self.logger.info("Iniciando execução do programa.")
+            result = self.complete(prompt=prompt, n=n)
+            self.logger.info("Exibindo resultado da API.")
+            self._emit(result)
+
+    def run_many(
+        self, prompts: Iterable[str], n: int = 1, tenant: str = "default"
+    ) -> list[dict[str, Any]]:
+        """Executa vários prompts, agrupando os repetidos em chamadas com várias respostas.
+
+        Cada ocorrência de um prompt recebe `n` respostas. Ocorrências repetidas do mesmo
+        prompt são atendidas por uma única chamada com `n * ocorrências` respostas (limitada
+        por `batch_settings.max_choices_per_request`), pagando o prompt uma única vez. As
+        chamadas entram no escalonador como `Priority.BATCH`, cedendo a vez às interativas.
+        A execução é perfilada se `profile` estiver habilitado.
+        """
+        with profiling_session("run_many", enabled=self.profile, settings=self.profiling_settings):
+            prompts = list(prompts)
+            positions: dict[str, list[int]] = {}
+            for idx, prompt in enumerate(prompts):
+                positions.setdefault(prompt, []).append(idx)
+
+            # Os prompts distintos são despachados em paralelo; o `AimdLimiter` define quantas
+            # chamadas ficam de fato em andamento a cada momento
+            results: list[dict[str, Any]] = [{} for _ in prompts]
+            with ThreadPoolExecutor(max_workers=self.concurrency_settings["max_limit"]) as executor:
+                futures = {
+                    executor.submit(self._complete_folded, prompt, len(indexes), n, tenant): indexes
+                    for prompt, indexes in positions.items()
+                }
+                for future, indexes in futures.items():
+                    for idx, result in zip(indexes, future.result(), strict=True):
+                        results[idx] = result
+
+            for result in results:
+                self._emit(result)
+        return results
+
+    def _complete_folded(
+        self, prompt: str, occurrences: int, n: int, tenant: str = "default"
+    ) -> list[dict[str, Any]]:
+        """Atende as ocorrências de um prompt com o mínimo de chamadas e divide as respostas.
+
+        Cada chamada atende ocorrências inteiras, de modo que as respostas de uma ocorrência
+        vêm sempre da mesma chamada e compartilham seu `id` e `usage`. Uma ocorrência sem as
+        `n` respostas, por falha da chamada ou resposta incompleta, recebe um resultado de erro.
+        """
+        per_call = max(self.batch_settings["max_choices_per_request"] // n, 1)
+        folded: list[dict[str, Any]] = []
+        for start in range(0, occurrences, per_call):
+            count = min(per_call, occurrences - start)
+            result = self.complete(
+                prompt=prompt, n=count * n, priority=Priority.BATCH, tenant=tenant
+            )
+            choices = result.get("choices") or []
+            for occurrence in range(count):
+                group = choices[occurrence * n : (occurrence + 1) * n]
+                if len(group) == n:
+                    folded.append({**result, "choices": group})
+                elif "error" in result:
+                    folded.append({**result, "prompt": prompt})
+                else:
+                    folded.append(
+                        {"error": "Respostas insuficientes na chamada.", "prompt": prompt}
+                    )
+        return folded
+
+    def close(self) -> None:
+        """Descarrega e fecha o destino de saída e o pool de conexões HTTP."""
+        self.output.close()
+        self.http_client.close()
+
+    def start_session(self) -> str:
+        """Cria uma nova sessão de conversa persistida e retorna seu identificador."""
+        session_id = self.conversations.create_conversation(self.model)
+        self._cache_session(session_id, self._new_history())
+        return session_id
+
+    def _new_history(self) -> ConversationHistory:
+        """Cria um histórico vazio com os limites definidos nas configurações."""
+        return ConversationHistory(
+            max_tokens=self.conversation_settings["max_history_tokens"],
+            max_messages=self.conversation_settings["max_history_messages"],
+            summary_max_tokens=self.conversation_settings["summary_max_tokens"],
+        )
+
+    def _cache_session(self, session_id: str, history: ConversationHistory) -> None:
+        """Mantém o histórico em memória, descartando as sessões menos usadas recentemente."""
+        self._sessions[session_id] = history
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.conversation_settings["max_cached_sessions"]:
+            self._sessions.popitem(last=False)
+
+    def _get_session_history(self, session_id: str) -> ConversationHistory:
+        """Retorna o histórico da sessão, carregando apenas o final da conversa do SQLite."""
+        history = self._sessions.get(session_id)
+        if history is None:
+            self.logger.info(f"Carregando histórico da sessão '{session_id}'.")
+            history = self._new_history()
+            summary, rows = self.conversations.load_recent(session_id, history.max_messages)
+            history.extend(rows)
+            history.summary = summary
+        self._cache_session(session_id, history)
+        return history
+
+    def chat(self, session_id: str, prompt: str) -> dict[str, Any]:
+        """Envia um novo turno da sessão com histórico limitado e persiste a conversa."""
+        history = self._get_session_history(session_id)
+        # O novo turno pode descartar mensagens antigas no resumo; o estado anterior é
+        # restaurado por completo se a chamada falhar
+        snapshot = history.snapshot()
+        history.append("user", prompt)
+        payload = self._create_payload(messages=history.to_messages(self.system_content))
+        try:
+            result = self.dispatch(payload)
+        except Exception:
+            history.restore(snapshot)
+            raise
+        result["prompt"] = prompt
+
+        if not ("id" in result and "usage" in result and "choices" in result):
+            # Desfaz o turno para que a próxima tentativa não repita o prompt no histórico
+            history.restore(snapshot)
+            self.logger.warning("Resposta da API não possui campos esperados para persistência.")
+            return result
+
+        user_message = history.last_message
+        completion = result["choices"][0]["message"]["content"]
+        history.append("assistant", completion)
+        assistant_message = history.last_message
+        self.repo.insert_usage(self.json_to_usage_record(result))
+        self.conversations.append_turn(
+            session_id,
+            [
+                (user_message.role, user_message.content, user_message.tokens),
+                (assistant_message.role, assistant_message.content, assistant_message.tokens),
+            ],
+            summary=history.summary,
+            usage_id=result["id"],
+        )
+        return result
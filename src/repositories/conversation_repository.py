@@ -0,0 +1,105 @@
+"""Módulo para persistência das sessões de conversa via SQLite."""
+
+import sqlite3
+import time
+import uuid
+
+from src.config.constants import SQL_DIR
+from src.repositories.sqlite_repository import SQLiteRepository
+
+
+class ConversationRepository(SQLiteRepository):
+    """Classe para persistência das sessões de conversa e de suas mensagens."""
+
+    def __init__(self, db_path: str | None = None) -> None:
+        """Inicializa o repositório de conversas."""
+        self.create_conversations_query = SQL_DIR / "create_conversations.sql"
+        """Caminho do arquivo SQL de criação das tabelas de conversa."""
+
+        super().__init__(db_path=db_path)
+
+        self.insert_message_query = self._read_sql_file(
+            SQL_DIR / "insert_conversation_messages.sql"
+        )
+        """Instancia o arquivo SQL de inserção de mensagens."""
+
+        self.select_recent_messages_query = self._read_sql_file(
+            SQL_DIR / "select_recent_conversation_messages.sql"
+        )
+        """Instancia o arquivo SQL de leitura das mensagens mais recentes."""
+
+    def _create_table(self) -> None:
+        """Cria as tabelas de uso da API e de conversas se não existirem."""
+        super()._create_table()
+        script = self._read_sql_file(self.create_conversations_query)
+        try:
+            with self.get_connection() as conn:
+                conn.executescript(script)
+        except sqlite3.Error:
+            self.logger.exception("Erro ao criar ou verificar as tabelas de conversa.")
+            raise
+
+    def create_conversation(self, model: str) -> str:
+        """Cria uma nova sessão de conversa e retorna seu identificador."""
+        conversation_id = str(uuid.uuid4())
+        now = self._format_timestamp(time.time())
+        try:
+            with self.get_connection() as conn:
+                conn.execute(
+                    "INSERT INTO conversations (id, created_at, updated_at, model) "
+                    "VALUES (?, ?, ?, ?)",
+                    (conversation_id, now, now, model),
+                )
+        except sqlite3.Error:
+            self._error("Erro ao criar a sessão de conversa.")
+        self.logger.info(f"Sessão de conversa '{conversation_id}' criada.")
+        return conversation_id
+
+    def conversation_exists(self, conversation_id: str) -> bool:
+        """Retorna True se a sessão de conversa existir."""
+        with self.get_connection() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+        return row is not None
+
+    def append_turn(
+        self,
+        conversation_id: str,
+        messages: list[tuple[str, str, int]],
+        summary: str,
+        usage_id: str | None = None,
+    ) -> None:
+        """Persiste as mensagens `(papel, conteúdo, tokens)` de um turno e o resumo atual."""
+        now = self._format_timestamp(time.time())
+        try:
+            with self.get_connection() as conn:
+                conn.executemany(
+                    self.insert_message_query,
+                    [
+                        (conversation_id, role, content, tokens, usage_id, now)
+                        for role, content, tokens in messages
+                    ],
+                )
+                conn.execute(
+                    "UPDATE conversations SET summary = ?, updated_at = ? WHERE id = ?",
+                    (summary, now, conversation_id),
+                )
+        except sqlite3.Error:
+            self._error("Erro ao persistir o turno da conversa.")
+
+    def load_recent(self, conversation_id: str, max_messages: int) -> tuple[str, list[tuple]]:
+        """Retorna o resumo e as últimas mensagens da sessão, da mais antiga à mais recente."""
+        with self.get_connection() as conn:
+            row = conn.execute(
+                "SELECT summary FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+            if row is None:
+                self._error(
+                    f"Sessão de conversa não encontrada: '{conversation_id}'", KeyError, "error"
+                )
+            rows = conn.execute(
+                self.select_recent_messages_query, (conversation_id, max_messages)
+            ).fetchall()
+        rows.reverse()
+        return row[0], rows
@@ -0,0 +1,303 @@
+"""Módulo com a fila durável de prompts em SQLite, consumida por vários workers.
+
+Cada job é um prompt com chave de idempotência: enfileirar de novo a mesma chave não cria outro
+job. Um worker arrenda (`lease`) um lote de jobs por um tempo de visibilidade; enquanto o
+arrendamento vale, nenhum outro worker recebe o job. Se o worker cair, o arrendamento expira e
+o job volta a ser entregue, até `max_attempts` tentativas.
+
+O `ack` grava o uso em `api_usages` e marca o job como concluído na mesma transação, apenas se
+o arrendamento do worker ainda for o vigente: um worker que perdeu o job (ex: travou além do
+tempo de visibilidade) tem o `ack` recusado, e o resultado entra uma única vez no banco. A
+chamada à API pode se repetir nesse caso; a gravação, não.
+
+A fila fica no mesmo arquivo de `api_usages`. Em WAL, vários processos da mesma máquina
+arrendam e confirmam jobs em paralelo; em um sistema de arquivos compartilhado entre máquinas,
+use `journal_mode: "delete"`, pois o WAL depende de memória compartilhada local.
+"""
+
+import argparse
+from collections.abc import Iterable, Iterator
+import contextlib
+from pathlib import Path
+import sqlite3
+import time
+from typing import Any, NamedTuple
+import uuid
+
+import yaml
+
+from src.config.constants import SETTINGS_FILE, SQL_DIR
+from src.config.constypes import PathLike
+from src.repositories.sqlite_repository import ChoiceRecord, SQLiteRepository, UsageRecord
+
+JOB_STATUSES: tuple[str, ...] = ("queued", "leased", "done", "failed")
+"""Estados de um job na fila."""
+
+JOURNAL_MODES: tuple[str, ...] = ("wal", "delete")
+"""Modos de journal aceitos: WAL (mesma máquina) ou DELETE (sistema de arquivos compartilhado)."""
+
+
+class Job(NamedTuple):
+    """Job arrendado por um worker."""
+
+    job_id: int
+    key: str
+    prompt: str
+    n: int
+    tenant: str
+    attempts: int
+    lease_token: str
+
+
+class JobQueue(SQLiteRepository):
+    """Fila durável de prompts com arrendamentos, tempo de visibilidade e idempotência."""
+
+    busy_timeout: float = 30.0
+    """Tempo máximo, em segundos, de espera pelo lock de escrita."""
+
+    def __init__(
+        self,
+        db_path: str | None = None,
+        *,
+        visibility_timeout: float = 300.0,
+        max_attempts: int = 5,
+        retry_backoff: float = 2.0,
+        journal_mode: str = "wal",
+    ) -> None:
+        """Inicializa a fila no banco informado, criando as tabelas se necessário."""
+        if journal_mode not in JOURNAL_MODES:
+            msg = f"Modo de journal inválido: '{journal_mode}'. Esperado: {JOURNAL_MODES}"
+            raise ValueError(msg)
+
+        self.visibility_timeout = visibility_timeout
+        """Duração padrão, em segundos, de um arrendamento."""
+
+        self.max_attempts = max_attempts
+        """Número máximo de entregas de um job antes de marcá-lo como falho."""
+
+        self.retry_backoff = retry_backoff
+        """Espera base, em segundos, antes de reentregar um job recusado (dobra a cada vez)."""
+
+        self.journal_mode = journal_mode
+        """Modo de journal do SQLite usado pela fila."""
+
+        self.create_queue_query = SQL_DIR / "create_job_queue.sql"
+        """Caminho do arquivo SQL de criação da tabela da fila."""
+
+        super().__init__(db_path=db_path)
+
+        self.insert_job_query = self._read_sql_file(SQL_DIR / "insert_job_queue.sql")
+        """Instancia o arquivo SQL de inserção de jobs."""
+
+        self.lease_query = self._read_sql_file(SQL_DIR / "lease_job_queue.sql")
+        """Instancia o arquivo SQL de arrendamento de jobs."""
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Retorna conexão sem transação implícita, aguardando o lock de escrita se necessário."""
+        return sqlite3.connect(
+            self.sqlite_database_path, timeout=self.busy_timeout, isolation_level=None
+        )
+
+    def _create_table(self) -> None:
+        """Cria as tabelas de uso da API e da fila e define o modo de journal."""
+        super()._create_table()
+        script = self._read_sql_file(self.create_queue_query)
+        try:
+            with contextlib.closing(self.get_connection()) as conn:
+                conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+                conn.executescript(script)
+        except sqlite3.Error:
+            self.logger.exception("Erro ao criar ou verificar a tabela da fila.")
+            raise
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Abre uma transação com o lock de escrita obtido no início (`BEGIN IMMEDIATE`)."""
+        with contextlib.closing(self.get_connection()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def enqueue(
+        self, prompt: str, *, n: int = 1, tenant: str = "default", key: str | None = None
+    ) -> bool:
+        """Enfileira o prompt e retorna False se a chave de idempotência já existir.
+
+        Sem `key`, uma chave aleatória é gerada e o prompt sempre entra na fila.
+        """
+        return self.enqueue_many([(key or uuid.uuid4().hex, prompt)], n=n, tenant=tenant) == 1
+
+    def enqueue_many(
+        self, items: Iterable[tuple[str, str]], *, n: int = 1, tenant: str = "default"
+    ) -> int:
+        """Enfileira pares `(chave, prompt)` em uma transação e retorna o número de jobs novos."""
+        now = time.time()
+        params = [(key, prompt, n, tenant, now, now, now) for key, prompt in items]
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(self.insert_job_query, params)
+            inserted = conn.total_changes - before
+        self.logger.info(f"{inserted} de {len(params)} jobs enfileirados.")
+        return inserted
+
+    def lease(
+        self, owner: str, limit: int = 1, visibility_timeout: float | None = None
+    ) -> list[Job]:
+        """Arrenda até `limit` jobs disponíveis ou com arrendamento expirado.
+
+        Jobs expirados que já esgotaram as tentativas são marcados como falhos em vez de
+        reentregues.
+        """
+        now = time.time()
+        token = uuid.uuid4().hex
+        timeout = self.visibility_timeout if visibility_timeout is None else visibility_timeout
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE job_queue SET status = 'failed', lease_token = NULL, updated_at = ?, "
+                "last_error = COALESCE(last_error, 'Arrendamento expirado.') "
+                "WHERE status = 'leased' AND lease_expires_at <= ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            rows = conn.execute(
+                self.lease_query,
+                {
+                    "owner": owner,
+                    "token": token,
+                    "expires_at": now + timeout,
+                    "now": now,
+                    "limit": limit,
+                },
+            ).fetchall()
+        return [Job(*row, token) for row in sorted(rows)]
+
+    def extend(self, job: Job, visibility_timeout: float | None = None) -> bool:
+        """Renova o arrendamento do job; retorna False se o worker já o perdeu."""
+        now = time.time()
+        timeout = self.visibility_timeout if visibility_timeout is None else visibility_timeout
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE job_queue SET lease_expires_at = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_token = ?",
+                (now + timeout, now, job.job_id, job.lease_token),
+            )
+        return cursor.rowcount == 1
+
+    def ack(self, job: Job, result: dict[str, Any]) -> bool:
+        """Grava o uso do resultado e conclui o job na mesma transação.
+
+        Retorna False, sem gravar nada, se o arrendamento do worker não for mais o vigente.
+        """
+        record = UsageRecord.from_result(result)
+        choices = ChoiceRecord.from_result(result) if len(result["choices"]) > 1 else ()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE job_queue SET status = 'done', usage_id = ?, lease_token = NULL, "
+                "last_error = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_token = ?",
+                (record.usage_id, time.time(), job.job_id, job.lease_token),
+            )
+            if cursor.rowcount != 1:
+                self.logger.warning(f"Arrendamento do job {job.job_id} perdido; ack recusado.")
+                return False
+            conn.execute(self.insert_query, self._usage_params(record))
+            if choices:
+                conn.executemany(self.insert_choices_query, self._choice_params(choices))
+        return True
+
+    def nack(self, job: Job, error: str) -> bool:
+        """Devolve o job à fila com espera exponencial, ou o marca como falho se esgotado."""
+        now = time.time()
+        exhausted = job.attempts >= self.max_attempts
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE job_queue SET status = ?, available_at = ?, lease_token = NULL, "
+                "lease_expires_at = NULL, last_error = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_token = ?",
+                (
+                    "failed" if exhausted else "queued",
+                    now + self.retry_backoff * 2 ** (job.attempts - 1),
+                    error,
+                    now,
+                    job.job_id,
+                    job.lease_token,
+                ),
+            )
+        return cursor.rowcount == 1
+
+    def retry_failed(self) -> int:
+        """Devolve os jobs falhos à fila, com as tentativas zeradas, e retorna quantos."""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE job_queue SET status = 'queued', attempts = 0, available_at = ?, "
+                "updated_at = ? WHERE status = 'failed'",
+                (now, now),
+            )
+        return cursor.rowcount
+
+    def stats(self) -> dict[str, int]:
+        """Retorna o número de jobs em cada estado."""
+        with contextlib.closing(self.get_connection()) as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM job_queue GROUP BY status"))
+        return {status: counts.get(status, 0) for status in JOB_STATUSES}
+
+
+def load_queue_settings(file_path: PathLike = SETTINGS_FILE) -> dict[str, Any]:
+    """Carrega a seção `queue_settings` do arquivo de configurações."""
+    with Path(file_path).open(encoding="utf-8") as file:
+        return yaml.safe_load(file)["queue_settings"]
+
+
+def create_job_queue(settings: dict[str, Any], db_path: str | None = None) -> JobQueue:
+    """Cria a fila a partir das configurações `queue_settings`."""
+    return JobQueue(
+        db_path or settings["db_path"],
+        visibility_timeout=settings["visibility_timeout_seconds"],
+        max_attempts=settings["max_attempts"],
+        retry_backoff=settings["retry_backoff_seconds"],
+        journal_mode=settings["journal_mode"],
+    )
+
+
+def main() -> None:
+    """Enfileira prompts de um arquivo ou exibe e mantém o estado da fila."""
+    parser = argparse.ArgumentParser(description="Fila durável de prompts em SQLite.")
+    parser.add_argument("--db", help="Banco SQLite da fila (padrão: queue_settings.db_path).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    enqueue = subparsers.add_parser("enqueue", help="Enfileira um prompt por linha do arquivo.")
+    enqueue.add_argument("prompts_file", help="Arquivo texto com um prompt por linha.")
+    enqueue.add_argument("--n", type=int, default=1, help="Respostas por prompt.")
+    enqueue.add_argument("--tenant", default="default", help="Tenant dos jobs.")
+    enqueue.add_argument(
+        "--key-prefix",
+        help="Prefixo das chaves `<prefixo>:<linha>` (padrão: nome do arquivo); "
+        "reenfileirar o mesmo arquivo não duplica jobs.",
+    )
+    subparsers.add_parser("stats", help="Exibe o número de jobs em cada estado.")
+    subparsers.add_parser("retry-failed", help="Devolve os jobs falhos à fila.")
+    args = parser.parse_args()
+
+    queue = create_job_queue(load_queue_settings(), args.db)
+    if args.command == "enqueue":
+        path = Path(args.prompts_file)
+        prefix = args.key_prefix or path.name
+        with path.open(encoding="utf-8") as file:
+            items = [
+                (f"{prefix}:{line_number}", line.rstrip("\n"))
+                for line_number, line in enumerate(file, start=1)
+                if line.strip()
+            ]
+        print(f"{queue.enqueue_many(items, n=args.n, tenant=args.tenant)} jobs enfileirados.")
+    elif args.command == "retry-failed":
+        print(f"{queue.retry_failed()} jobs devolvidos à fila.")
+    else:
+        for status, count in queue.stats().items():
+            print(f"{status}: {count}")
+
+
+if __name__ == "__main__":
+    main()
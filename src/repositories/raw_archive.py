@@ -0,0 +1,338 @@
+"""Módulo com o arquivo append-only das requisições e respostas brutas da API.
+
+Cada registro é gravado em segmentos binários como `cabeçalho + usage_id + requisição +
+resposta`, com o cabeçalho contendo os tamanhos de cada parte. Um índice SQLite mapeia o
+`usage_id` para o segmento e o deslocamento do registro. A leitura mapeia os segmentos em
+memória (`mmap`), permitindo reprocessar as respostas offline na velocidade do disco.
+
+Um registro incompleto no final de um segmento (ex: queda do processo durante a escrita) é
+ignorado na leitura, e a próxima abertura do arquivo inicia um novo segmento, para que os
+registros seguintes não fiquem atrás dos bytes corrompidos.
+
+O segmento atual e os deslocamentos (`file.tell()`) são controlados em memória por instância:
+apenas um processo deve escrever em um mesmo diretório de arquivo por vez.
+"""
+
+import argparse
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+import mmap
+from pathlib import Path
+import sqlite3
+import struct
+import threading
+import time
+from typing import Any, BinaryIO, NamedTuple
+
+from src.common import json_backend
+from src.common.logger import LoggerSingleton
+from src.config.constants import SQL_DIR
+from src.config.constypes import PathLike
+from src.core.base_class import BaseClass
+from src.repositories.sqlite_repository import SQLiteRepository, UsageRecord
+
+RECORD_HEADER = struct.Struct("<4sHII")
+"""Cabeçalho do registro: marcador, tamanho do id, da requisição e da resposta."""
+
+RECORD_MAGIC: bytes = b"RAW1"
+"""Marcador do início de cada registro, usado para detectar segmentos corrompidos."""
+
+SEGMENT_PATTERN: str = "segment-{:06d}.bin"
+"""Padrão de nome dos segmentos do arquivo."""
+
+
+class ArchivedRecord(NamedTuple):
+    """Registro bruto lido do arquivo."""
+
+    usage_id: str
+    request: bytes
+    response: bytes
+
+
+class ArchiveLocation(NamedTuple):
+    """Localização de um registro no arquivo."""
+
+    segment: int
+    offset: int
+    length: int
+
+
+class RawArchiveIndex(SQLiteRepository):
+    """Índice SQLite dos registros do arquivo bruto por `usage_id`."""
+
+    def _create_table(self) -> None:
+        """Cria a tabela de índice se não existir."""
+        query = self._read_sql_file(SQL_DIR / "create_raw_archive_index.sql")
+        try:
+            with self.get_connection() as conn:
+                conn.execute(query)
+        except sqlite3.Error:
+            self.logger.exception("Erro ao criar ou verificar o índice do arquivo bruto.")
+            raise
+
+    def add(self, usage_id: str, location: ArchiveLocation) -> None:
+        """Registra a localização de um registro."""
+        try:
+            with self.get_connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO raw_archive_index "
+                    "(usage_id, segment, offset, length, archived_at) VALUES (?, ?, ?, ?, ?)",
+                    (usage_id, *location, self._format_timestamp(time.time())),
+                )
+        except sqlite3.Error:
+            self._error("Erro ao indexar registro do arquivo bruto.")
+
+    def find(self, usage_id: str) -> ArchiveLocation | None:
+        """Retorna a localização do registro ou None se não estiver indexado."""
+        with self.get_connection() as conn:
+            row = conn.execute(
+                "SELECT segment, offset, length FROM raw_archive_index WHERE usage_id = ?",
+                (usage_id,),
+            ).fetchone()
+        return ArchiveLocation(*row) if row else None
+
+
+class RawArchive(BaseClass):
+    """Arquivo append-only das requisições e respostas brutas, segmentado por tamanho."""
+
+    def __init__(self, archive_dir: PathLike, segment_max_bytes: int = 256 * 1024 * 1024) -> None:
+        """Inicializa o arquivo no diretório informado, criando-o se necessário."""
+        self.archive_dir = Path(archive_dir)
+        """Diretório dos segmentos e do índice."""
+
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+
+        self.segment_max_bytes = segment_max_bytes
+        """Tamanho a partir do qual um novo segmento é iniciado."""
+
+        self.index = RawArchiveIndex(db_path=str(self.archive_dir / "index.db"))
+        """Índice dos registros por `usage_id`."""
+
+        self.logger = LoggerSingleton().logger or LoggerSingleton.get_logger()
+        """Instancia o logger da aplicação."""
+
+        self._lock = threading.Lock()
+        """Serializa as escritas entre threads."""
+
+        segments = self.segments()
+        self._segment: int = int(segments[-1].stem.split("-")[1]) if segments else 0
+        """Número do segmento atual de escrita."""
+
+        if segments and _complete_length(segments[-1]) < segments[-1].stat().st_size:
+            # O último segmento termina em um registro incompleto: as novas escritas vão para
+            # um segmento novo, em vez de ficarem atrás dos bytes corrompidos
+            self._segment += 1
+
+        self._file: BinaryIO | None = None
+        """Segmento atual aberto para escrita."""
+
+    def segments(self) -> list[Path]:
+        """Retorna os segmentos existentes, em ordem de escrita."""
+        return sorted(self.archive_dir.glob("segment-*.bin"))
+
+    def _segment_path(self, segment: int) -> Path:
+        """Retorna o caminho do segmento informado."""
+        return self.archive_dir / SEGMENT_PATTERN.format(segment)
+
+    def _open_segment(self, size: int) -> BinaryIO:
+        """Retorna o segmento de escrita, iniciando um novo se o atual estiver cheio."""
+        if self._file is None:
+            self._file = self._segment_path(self._segment).open("ab")
+        if self._file.tell() > 0 and self._file.tell() + size > self.segment_max_bytes:
+            self._file.close()
+            self._segment += 1
+            self._file = self._segment_path(self._segment).open("ab")
+        return self._file
+
+    def append(self, usage_id: str, request: bytes, response: bytes) -> ArchiveLocation:
+        """Grava um registro bruto no final do arquivo e o indexa pelo `usage_id`."""
+        id_bytes = usage_id.encode("utf-8")
+        header = RECORD_HEADER.pack(RECORD_MAGIC, len(id_bytes), len(request), len(response))
+        length = len(header) + len(id_bytes) + len(request) + len(response)
+        with self._lock:
+            file = self._open_segment(length)
+            offset = file.tell()
+            file.write(b"".join((header, id_bytes, request, response)))
+            file.flush()
+            location = ArchiveLocation(self._segment, offset, length)
+        self.index.add(usage_id, location)
+        return location
+
+    def close(self) -> None:
+        """Fecha o segmento de escrita."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def get(self, usage_id: str) -> ArchivedRecord | None:
+        """Lê um registro pelo `usage_id` usando o índice."""
+        location = self.index.find(usage_id)
+        if location is None:
+            return None
+        with self._segment_path(location.segment).open("rb") as file:
+            file.seek(location.offset)
+            return _decode_record(file.read(location.length), 0)[0]
+
+    def iter_records(self) -> Iterator[ArchivedRecord]:
+        """Percorre todos os registros, mapeando cada segmento em memória.
+
+        Um registro incompleto ou inválido encerra a leitura do segmento, que segue no próximo.
+        """
+        for path in self.segments():
+            if path.stat().st_size == 0:
+                continue
+            with (
+                path.open("rb") as file,
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+            ):
+                offset = 0
+                while offset < len(mm):
+                    try:
+                        record, offset = _decode_record(mm, offset)
+                    except ValueError:
+                        self.logger.warning(
+                            f"Registro incompleto ou inválido no deslocamento {offset} de "
+                            f"'{path}'; o restante do segmento foi ignorado."
+                        )
+                        break
+                    yield record
+
+    def iter_exchanges(self) -> Iterator[tuple[bytes, bytes]]:
+        """Percorre os pares `(requisição, resposta)` brutos, ex: para o `MockProvider`."""
+        for record in self.iter_records():
+            yield record.request, record.response
+
+
+def _record_bounds(buffer: Any, offset: int) -> tuple[int, int, int, int]:
+    """Retorna o início do id, da requisição, da resposta e o fim do registro na posição.
+
+    Levanta ValueError se o registro for inválido ou estiver incompleto no buffer.
+    """
+    if offset + RECORD_HEADER.size > len(buffer):
+        msg = f"Cabeçalho incompleto no deslocamento {offset} do arquivo bruto."
+        raise ValueError(msg)
+    magic, id_length, request_length, response_length = RECORD_HEADER.unpack_from(buffer, offset)
+    if magic != RECORD_MAGIC:
+        msg = f"Registro inválido no deslocamento {offset} do arquivo bruto."
+        raise ValueError(msg)
+    start = offset + RECORD_HEADER.size
+    request_start = start + id_length
+    response_start = request_start + request_length
+    end = response_start + response_length
+    if end > len(buffer):
+        msg = f"Registro incompleto no deslocamento {offset} do arquivo bruto."
+        raise ValueError(msg)
+    return start, request_start, response_start, end
+
+
+def _complete_length(path: Path) -> int:
+    """Retorna o tamanho do trecho inicial do segmento formado por registros completos."""
+    if path.stat().st_size == 0:
+        return 0
+    with path.open("rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        offset = 0
+        while offset < len(mm):
+            try:
+                offset = _record_bounds(mm, offset)[3]
+            except ValueError:
+                break
+        return offset
+
+
+def _decode_record(buffer: Any, offset: int) -> tuple[ArchivedRecord, int]:
+    """Decodifica o registro na posição informada e retorna a posição do próximo."""
+    start, request_start, response_start, end = _record_bounds(buffer, offset)
+    record = ArchivedRecord(
+        usage_id=bytes(buffer[start:request_start]).decode("utf-8"),
+        request=buffer[request_start:response_start],
+        response=buffer[response_start:end],
+    )
+    return record, end
+
+
+def prompt_from_request(request: bytes) -> str:
+    """Extrai o último prompt do usuário do payload bruto da requisição."""
+    messages = json_backend.loads(request)["messages"]
+    return next(
+        (message["content"] for message in reversed(messages) if message["role"] == "user"), ""
+    )
+
+
+@dataclass
+class ReplayStats:
+    """Métricas de um reprocessamento do arquivo bruto."""
+
+    records: int = 0
+    """Número de registros lidos."""
+
+    failures: int = 0
+    """Número de registros que não puderam ser convertidos."""
+
+    bytes_read: int = 0
+    """Total de bytes de requisição e resposta lidos."""
+
+    total_tokens: int = 0
+    """Soma dos tokens utilizados nos registros convertidos."""
+
+    tokens_by_model: dict[str, int] = field(default_factory=dict)
+    """Soma dos tokens utilizados por modelo."""
+
+    elapsed_seconds: float = 0.0
+    """Duração do reprocessamento em segundos."""
+
+    @property
+    def megabytes_per_second(self) -> float:
+        """Retorna a taxa de leitura em MB/s."""
+        if not self.elapsed_seconds:
+            return 0.0
+        return self.bytes_read / self.elapsed_seconds / 1_000_000
+
+
+def replay_usage_records(
+    archive: RawArchive, stats: ReplayStats | None = None
+) -> Iterator[UsageRecord]:
+    """Reprocessa o arquivo bruto, gerando um `UsageRecord` por resposta válida."""
+    stats = stats if stats is not None else ReplayStats()
+    started = time.perf_counter()
+    for record in archive.iter_records():
+        stats.records += 1
+        stats.bytes_read += len(record.request) + len(record.response)
+        try:
+            result = json_backend.loads(record.response)
+            result["prompt"] = prompt_from_request(record.request)
+            usage_record = UsageRecord.from_result(result)
+        except (ValueError, KeyError, IndexError, TypeError):
+            stats.failures += 1
+            continue
+        stats.total_tokens += usage_record.total_tokens
+        stats.tokens_by_model[usage_record.model] = (
+            stats.tokens_by_model.get(usage_record.model, 0) + usage_record.total_tokens
+        )
+        yield usage_record
+    stats.elapsed_seconds = time.perf_counter() - started
+
+
+def main() -> None:
+    """Reprocessa um arquivo bruto, exibindo as métricas e opcionalmente persistindo."""
+    parser = argparse.ArgumentParser(description="Reprocessa o arquivo bruto de respostas.")
+    parser.add_argument("archive_dir", help="Diretório do arquivo bruto.")
+    parser.add_argument("--db", help="Banco SQLite de destino para os registros reprocessados.")
+    args = parser.parse_args()
+
+    stats = ReplayStats()
+    records = replay_usage_records(RawArchive(args.archive_dir), stats)
+    if args.db:
+        SQLiteRepository(db_path=args.db).insert_usages(records)
+    else:
+        for _ in records:
+            pass
+    print(
+        json_backend.dumps_pretty(
+            {**stats.__dict__, "megabytes_per_second": round(stats.megabytes_per_second, 2)}
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,56 @@
 """Módulo com utilitários para conversão de dicionários."""
 
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
+from itertools import islice
 import json
 from pathlib import Path
-from typing import Any
+from typing import Any, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from src.common import json_backend
+from src.config.constants import BRT
+from src.config.constypes import PathLike
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = None
 
 # from src.common.logger import LoggerSingleton
 
+API_USAGES_COLUMNS: tuple[str, ...] = (
+    "id",
+    "created_at",
+    "model",
+    "system_fingerprint",
+    "prompt",
+    "completion",
+    "prompt_tokens",
+    "completion_tokens",
+    "total_tokens",
+    "cached_tokens",
+    "cache_hit_tokens",
+    "cache_miss_tokens",
+    "finish_reason",
+    "logprobs",
+)
+"""Colunas da tabela `api_usages`, na ordem do arquivo `insert_api_usages.sql`."""
+
+_TOKEN_COLUMNS: tuple[str, ...] = API_USAGES_COLUMNS[6:12]
+"""Colunas inteiras de contagem de tokens."""
+
+_MAX_TOKENS: int = 2**63
+"""Limite exclusivo das contagens de tokens, que devem caber em `int64`."""
+
+_CREATED_RANGE: tuple[float, float] = (
+    (pd.Timestamp.min + pd.Timedelta(days=1)).timestamp(),
+    (pd.Timestamp.max - pd.Timedelta(days=1)).timestamp(),
+)
+"""Faixa de `created` representável por `pd.Timestamp`, com margem para o fuso horário."""
+
 
 @dataclass
 class ResultConverter:
@@ -43,8 +87,173 @@ class ResultConverter:
             msg = f"Resultado da API malformado ou incompleto: {exc}"
             raise TypeError(msg) from exc
 
+    def api_result_choices_to_dicts(self, result: dict[str, Any]) -> list[dict[str, Any]]:
+        """Converte cada resposta (choice) do resultado em um dicionário ligado ao `usage_id`."""
+        try:
+            return [
+                {
+                    "usage_id": result["id"],
+                    "choice_index": choice["index"],
+                    "completion": choice["message"]["content"],
+                    "finish_reason": choice["finish_reason"],
+                    "logprobs": choice["logprobs"],
+                }
+                for choice in result["choices"]
+            ]
+        except (KeyError, IndexError, TypeError) as exc:
+            msg = f"Resultado da API malformado ou incompleto: {exc}"
+            raise TypeError(msg) from exc
+
+
+class RejectedRow(NamedTuple):
+    """Linha rejeitada durante a conversão em lote."""
+
+    position: int
+    reason: str
+
+
+class ConvertedBatch(NamedTuple):
+    """Lote convertido no esquema de `api_usages` e as linhas rejeitadas."""
+
+    frame: pd.DataFrame
+    rejected: list[RejectedRow]
+
+
+def _extract_row(result: dict[str, Any]) -> tuple[Any, ...]:
+    """Extrai os campos de uma resposta na ordem de `API_USAGES_COLUMNS`, sem conversões."""
+    usage = result["usage"]
+    choice = result["choices"][0]
+    return (
+        result["id"],
+        result["created"],
+        result["model"],
+        result.get("system_fingerprint"),
+        result.get("prompt", ""),
+        choice["message"]["content"],
+        usage["prompt_tokens"],
+        usage["completion_tokens"],
+        usage["total_tokens"],
+        (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0),
+        usage.get("prompt_cache_hit_tokens", 0),
+        usage.get("prompt_cache_miss_tokens", 0),
+        choice.get("finish_reason"),
+        choice.get("logprobs"),
+    )
+
+
+class BulkResultConverter:
+    """Converte respostas brutas da API em lotes colunares no esquema de `api_usages`.
+
+    Cada resposta passa por uma única extração de campos; conversões de tipo, validação
+    e formatação de datas são feitas por coluna com operações vetorizadas do pandas.
+    Linhas malformadas são rejeitadas sem interromper o lote.
+    """
+
+    def __init__(self, batch_size: int = 50_000) -> None:
+        """Inicializa o conversor com o tamanho de lote informado."""
+        if batch_size <= 0:
+            raise ValueError("O tamanho do lote deve ser maior que zero.")
+
+        self.batch_size = batch_size
+        """Número máximo de respostas por lote."""
+
+    def convert(
+        self, results: Iterable[dict[str, Any] | bytes | str], offset: int = 0
+    ) -> ConvertedBatch:
+        """Converte um conjunto de respostas em um único lote."""
+        rows: list[tuple[Any, ...]] = []
+        positions: list[int] = []
+        rejected: list[RejectedRow] = []
+        for position, raw in enumerate(results, start=offset):
+            try:
+                result = raw if isinstance(raw, dict) else json_backend.loads(raw)
+                rows.append(_extract_row(result))
+            except ValueError as exc:
+                rejected.append(RejectedRow(position, f"JSON inválido: {exc}"))
+                continue
+            except (KeyError, IndexError, TypeError) as exc:
+                rejected.append(RejectedRow(position, f"Campo ausente ou inválido: {exc!r}"))
+                continue
+            positions.append(position)
+        frame, invalid = self._build_frame(rows)
+        rejected.extend(
+            RejectedRow(
+                positions[idx], "Tipos ou valores inválidos em colunas numéricas ou obrigatórias."
+            )
+            for idx in invalid
+        )
+        rejected.sort()
+        return ConvertedBatch(frame, rejected)
+
+    def iter_batches(
+        self, results: Iterable[dict[str, Any] | bytes | str]
+    ) -> Iterator[ConvertedBatch]:
+        """Converte as respostas em lotes de até `batch_size` itens."""
+        iterator = iter(results)
+        offset = 0
+        while chunk := list(islice(iterator, self.batch_size)):
+            yield self.convert(chunk, offset=offset)
+            offset += len(chunk)
+
+    def iter_jsonl(self, file_path: PathLike) -> Iterator[ConvertedBatch]:
+        """Converte um arquivo JSONL de respostas brutas em lotes; posições são linhas."""
+        with Path(file_path).open("rb") as file:
+            yield from self.iter_batches(line for line in file if line.strip())
+
+    def _build_frame(self, rows: list[tuple[Any, ...]]) -> tuple[pd.DataFrame, list[int]]:
+        """Monta o DataFrame por colunas e retorna os índices das linhas inválidas."""
+        columns = dict(zip(API_USAGES_COLUMNS, zip(*rows, strict=True), strict=False))
+        frame = pd.DataFrame(
+            {name: pd.Series(columns.get(name, ()), dtype=object) for name in API_USAGES_COLUMNS}
+        )
+
+        numeric = {
+            name: pd.to_numeric(frame[name], errors="coerce")
+            for name in ("created_at", *_TOKEN_COLUMNS)
+        }
+        invalid_mask = pd.concat(numeric.values(), axis=1).isna().any(axis=1)
+        for name in _TOKEN_COLUMNS:
+            # Contagens fracionárias ou fora do int64 são rejeitadas em vez de truncadas
+            invalid_mask |= numeric[name].mod(1).ne(0)
+            invalid_mask |= ~(numeric[name].ge(0) & numeric[name].lt(_MAX_TOKENS))
+        invalid_mask |= ~numeric["created_at"].between(*_CREATED_RANGE)
+        for name in ("id", "model", "prompt", "completion"):
+            invalid_mask |= ~frame[name].map(type).eq(str)
+        invalid = invalid_mask.to_numpy().nonzero()[0].tolist()
+
+        valid = ~invalid_mask
+        frame = frame.loc[valid].reset_index(drop=True)
+        for name in _TOKEN_COLUMNS:
+            frame[name] = numeric[name].loc[valid].astype("int64").to_numpy()
+        # Converte para o horário local e formata em C, evitando o `strftime` elemento a elemento
+        local_times = (
+            pd.to_datetime(numeric["created_at"].loc[valid].to_numpy(), unit="s", utc=True)
+            .tz_convert(BRT)
+            .tz_localize(None)
+            .to_numpy(dtype="datetime64[s]")
+        )
+        # Sem linhas válidas, o lote vazio mantém o esquema (`np.char` falha com arrays vazios)
+        frame["created_at"] = (
+            np.char.replace(np.datetime_as_string(local_times), "T", " ")
+            if len(local_times)
+            else np.array([], dtype=object)
+        )
+        frame["logprobs"] = frame["logprobs"].map(json_backend.dumps, na_action="ignore")
+        for name in API_USAGES_COLUMNS:
+            if name not in _TOKEN_COLUMNS:
+                frame[name] = frame[name].astype("string")
+        return frame, invalid
+
+
+def frame_to_arrow(frame: pd.DataFrame) -> Any:
+    """Converte um lote para `pyarrow.Table`, se a dependência opcional estiver instalada."""
+    if pa is None:
+        raise ImportError("A conversão para Arrow requer a dependência opcional `pyarrow`.")
+    return pa.Table.from_pandas(frame, preserve_index=False)
+
 
-with Path("./data/teste.json").open("r", encoding="utf-8") as file:
-    data = json.load(file)
-    json_data = ResultConverter().api_result_to_dict(data)
-    print(json.dumps(json_data, indent=2))
+if __name__ == "__main__":
+    with Path("./data/teste.json").open("r", encoding="utf-8") as file:
+        data = json.load(file)
+        json_data = ResultConverter().api_result_to_dict(data)
+        print(json.dumps(json_data, indent=2))
@@ -0,0 +1,269 @@
+"""Módulo com a persistência do uso da API em vários arquivos SQLite (shards).
+
+O SQLite admite um único escritor por arquivo; com vários processos gravando lotes ao mesmo
+tempo, o `api_usages.db` único vira o gargalo. Aqui cada registro vai para um shard escolhido
+pelo hash do `id` (número fixo de arquivos) ou pelo período do `created_at` (um arquivo por
+hora, dia ou mês), e cada shard usa WAL com espera por lock. A leitura distribui a consulta
+entre os shards em paralelo e junta os resultados; `merge_into` consolida os shards em um
+único banco e `compact` recupera o espaço de cada shard.
+"""
+
+import argparse
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+from datetime import datetime
+from hashlib import blake2b
+from pathlib import Path
+import sqlite3
+import threading
+from typing import Any
+
+import pandas as pd
+
+from src.common import json_backend
+from src.config.constants import BRT
+from src.config.constypes import PathLike
+from src.core.base_class import BaseClass
+from src.repositories.sqlite_repository import ChoiceRecord, SQLiteRepository, UsageRecord
+
+SHARD_KEYS: tuple[str, ...] = ("hash", "time")
+"""Chaves de particionamento aceitas."""
+
+TIME_BUCKETS: dict[str, Callable[[str], str]] = {
+    "hour": lambda created_at: created_at[:13].replace("-", "").replace(" ", ""),
+    "day": lambda created_at: created_at[:10].replace("-", ""),
+    "month": lambda created_at: created_at[:7].replace("-", ""),
+}
+"""Extrai o período do shard a partir do `created_at` formatado (`AAAA-MM-DD HH:MM:SS`)."""
+
+LAYOUT_FILE: str = "shards.json"
+"""Arquivo que registra a configuração dos shards do diretório."""
+
+
+class ShardRepository(SQLiteRepository):
+    """Shard SQLite em modo WAL, que aguarda o lock em vez de falhar com escritas concorrentes."""
+
+    busy_timeout: float = 30.0
+    """Tempo máximo, em segundos, de espera pelo lock de escrita."""
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Retorna conexão com o shard, aguardando o lock de escrita se necessário."""
+        return sqlite3.connect(self.sqlite_database_path, timeout=self.busy_timeout)
+
+    def _create_table(self) -> None:
+        """Cria as tabelas do shard e habilita o WAL (persistente no arquivo)."""
+        super()._create_table()
+        with contextlib.closing(self.get_connection()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+
+
+class ShardedSQLiteRepository(BaseClass):
+    """Repositório do uso da API particionado em shards SQLite por hash ou por período."""
+
+    def __init__(
+        self,
+        shard_dir: PathLike,
+        shards: int = 8,
+        shard_key: str = "hash",
+        time_bucket: str = "day",
+    ) -> None:
+        """Inicializa o repositório no diretório informado, validando a configuração salva."""
+        if shard_key not in SHARD_KEYS:
+            msg = f"Chave de particionamento inválida: '{shard_key}'. Esperado: {SHARD_KEYS}"
+            raise ValueError(msg)
+        if time_bucket not in TIME_BUCKETS:
+            msg = f"Período inválido: '{time_bucket}'. Esperado: {list(TIME_BUCKETS)}"
+            raise ValueError(msg)
+
+        self.shard_dir = Path(shard_dir)
+        """Diretório dos arquivos de shard."""
+
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+
+        self.layout: dict[str, Any] = self._load_layout(
+            {"shard_key": shard_key, "shards": shards, "time_bucket": time_bucket}
+        )
+        """Configuração dos shards: chave, número de shards (hash) e período (time)."""
+
+        self._repositories: dict[str, ShardRepository] = {}
+        """Repositórios dos shards já abertos, por nome."""
+
+        self._lock = threading.Lock()
+        """Serializa a abertura dos shards entre threads."""
+
+    def _load_layout(self, requested: dict[str, Any]) -> dict[str, Any]:
+        """Grava a configuração na primeira execução e recusa uma configuração diferente."""
+        path = self.shard_dir / LAYOUT_FILE
+        if not path.exists():
+            path.write_bytes(json_backend.dumps_bytes(requested))
+            return requested
+        layout = json_backend.loads(path.read_bytes())
+        relevant = (
+            ("shard_key", "shards")
+            if layout["shard_key"] == "hash"
+            else ("shard_key", "time_bucket")
+        )
+        if any(layout[key] != requested[key] for key in relevant):
+            msg = f"Configuração de shards diferente da existente em '{path}': {layout}"
+            raise ValueError(msg)
+        return layout
+
+    def shard_paths(self) -> list[Path]:
+        """Retorna os arquivos de shard existentes, em ordem."""
+        return sorted(self.shard_dir.glob("shard-*.db"))
+
+    def _shard_name(self, usage_id: str, created_at: str) -> str:
+        """Retorna o nome do shard de um registro."""
+        if self.layout["shard_key"] == "hash":
+            digest = blake2b(usage_id.encode("utf-8"), digest_size=8).digest()
+            return f"shard-{int.from_bytes(digest, 'little') % self.layout['shards']:03d}"
+        return f"shard-{TIME_BUCKETS[self.layout['time_bucket']](created_at)}"
+
+    def _shard(self, name: str) -> ShardRepository:
+        """Retorna o repositório do shard, criando o arquivo se necessário."""
+        with self._lock:
+            repository = self._repositories.get(name)
+            if repository is None:
+                repository = ShardRepository(db_path=str(self.shard_dir / f"{name}.db"))
+                self._repositories[name] = repository
+            return repository
+
+    def _created_at(self, created: int) -> str:
+        """Formata o timestamp como o `created_at` gravado pelo `SQLiteRepository`."""
+        return datetime.fromtimestamp(created, tz=BRT).strftime("%Y-%m-%d %H:%M:%S")
+
+    def insert_usage(self, record: UsageRecord, choices: list[ChoiceRecord] | None = None) -> None:
+        """Insere um registro de uso e, se houver, suas respostas no shard correspondente."""
+        self.insert_usages([record], choices or ())
+
+    def insert_usages(
+        self, records: Iterable[UsageRecord], choices: Iterable[ChoiceRecord] = ()
+    ) -> int:
+        """Insere os registros agrupados por shard, em uma transação por shard."""
+        by_shard: dict[str, list[UsageRecord]] = {}
+        shard_of: dict[str, str] = {}
+        for record in records:
+            name = self._shard_name(record.usage_id, self._created_at(record.created))
+            by_shard.setdefault(name, []).append(record)
+            shard_of[record.usage_id] = name
+        choices_by_shard: dict[str, list[ChoiceRecord]] = {}
+        for choice in choices:
+            choices_by_shard.setdefault(shard_of[choice.usage_id], []).append(choice)
+        return sum(
+            self._shard(name).insert_usages(shard_records, choices_by_shard.get(name, ()))
+            for name, shard_records in by_shard.items()
+        )
+
+    def insert_usage_frame(self, frame: pd.DataFrame) -> int:
+        """Insere um lote no esquema de `api_usages`, dividido por shard."""
+        names = [
+            self._shard_name(usage_id, created_at)
+            for usage_id, created_at in zip(frame["id"], frame["created_at"], strict=True)
+        ]
+        return sum(
+            self._shard(name).insert_usage_frame(group)
+            for name, group in frame.groupby(pd.Series(names, index=frame.index), sort=False)
+        )
+
+    def query(
+        self,
+        sql: str,
+        params: tuple[Any, ...] = (),
+        *,
+        order_by: str | None = None,
+        descending: bool = False,
+        limit: int | None = None,
+    ) -> pd.DataFrame:
+        """Executa a consulta em todos os shards em paralelo e junta os resultados.
+
+        Com `order_by`, o resultado combinado é ordenado pela coluna; com `limit`, apenas as
+        primeiras linhas são mantidas (a consulta de cada shard pode aplicar o mesmo limite).
+        """
+        paths = self.shard_paths()
+        if not paths:
+            return pd.DataFrame()
+
+        def read(path: Path) -> pd.DataFrame:
+            with contextlib.closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as conn:
+                return pd.read_sql_query(sql, conn, params=params)
+
+        with ThreadPoolExecutor(max_workers=min(len(paths), 16)) as executor:
+            frames = list(executor.map(read, paths))
+        frame = pd.concat(frames, ignore_index=True)
+        if order_by is not None:
+            frame = frame.sort_values(order_by, ascending=not descending, ignore_index=True)
+        return frame.head(limit) if limit is not None else frame
+
+    def count(self) -> int:
+        """Retorna o número de registros em todos os shards."""
+        frame = self.query("SELECT COUNT(*) AS total FROM api_usages")
+        return int(frame["total"].sum()) if not frame.empty else 0
+
+    def find(self, usage_id: str) -> pd.DataFrame:
+        """Retorna o registro pelo `id`; com particionamento por hash, consulta só o seu shard."""
+        sql = "SELECT * FROM api_usages WHERE id = ?"
+        if self.layout["shard_key"] == "hash":
+            path = self.shard_dir / f"{self._shard_name(usage_id, '')}.db"
+            if not path.exists():
+                return pd.DataFrame()
+            with contextlib.closing(sqlite3.connect(path)) as conn:
+                return pd.read_sql_query(sql, conn, params=(usage_id,))
+        return self.query(sql, (usage_id,))
+
+    def merge_into(self, destination: PathLike) -> int:
+        """Consolida todos os shards em um único banco e retorna o número de registros novos."""
+        target = SQLiteRepository(db_path=str(destination))
+        merged = 0
+        with contextlib.closing(target.get_connection()) as conn:
+            for path in self.shard_paths():
+                conn.execute("ATTACH DATABASE ? AS shard", (str(path),))
+                try:
+                    with conn:
+                        cursor = conn.execute(
+                            "INSERT OR IGNORE INTO api_usages SELECT * FROM shard.api_usages"
+                        )
+                        merged += cursor.rowcount
+                        conn.execute(
+                            "INSERT OR IGNORE INTO api_usage_choices "
+                            "SELECT * FROM shard.api_usage_choices"
+                        )
+                finally:
+                    conn.execute("DETACH DATABASE shard")
+        return merged
+
+    def compact(self) -> None:
+        """Incorpora o WAL ao arquivo e recupera o espaço livre de cada shard."""
+        for path in self.shard_paths():
+            with contextlib.closing(
+                sqlite3.connect(path, timeout=ShardRepository.busy_timeout)
+            ) as conn:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                conn.execute("VACUUM")
+                conn.execute("PRAGMA optimize")
+
+
+def main() -> None:
+    """Consolida ou compacta os shards de um diretório."""
+    parser = argparse.ArgumentParser(description="Manutenção dos shards SQLite de uso da API.")
+    parser.add_argument("shard_dir", help="Diretório dos shards.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    merge = subparsers.add_parser("merge", help="Consolida os shards em um único banco.")
+    merge.add_argument("destination", help="Banco SQLite de destino.")
+    subparsers.add_parser("compact", help="Compacta cada shard (checkpoint do WAL e VACUUM).")
+    subparsers.add_parser("count", help="Exibe o número de registros em todos os shards.")
+    args = parser.parse_args()
+
+    layout = json_backend.loads((Path(args.shard_dir) / LAYOUT_FILE).read_bytes())
+    repository = ShardedSQLiteRepository(args.shard_dir, **layout)
+    if args.command == "merge":
+        print(f"{repository.merge_into(args.destination)} registros consolidados.")
+    elif args.command == "compact":
+        repository.compact()
+        print(f"{len(repository.shard_paths())} shards compactados.")
+    else:
+        print(repository.count())
+
+
+if __name__ == "__main__":
+    main()
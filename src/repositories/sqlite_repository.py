@@ -1,6 +1,7 @@
 """Módulo para persistência de uso da API DeepSeek via SQLite."""
 
-from datetime import datetime
+from collections.abc import Iterable
+from datetime import UTC, datetime
 from pathlib import Path
 import sqlite3
 import sys
@@ -8,6 +9,7 @@ from typing import Any, NamedTuple
 
 import pandas as pd
 
+from src.common import json_backend
 from src.common.logger import LoggerSingleton
 from src.config.constants import BRT, SQL_DIR
 from src.config.constypes import PathLike
@@ -32,6 +34,52 @@ class UsageRecord(NamedTuple):
     finish_reason: str | None = None
     logprobs: Any = None
 
+    @classmethod
+    def from_result(cls, result: dict[str, Any]) -> "UsageRecord":
+        """Cria o registro a partir do dicionário de resposta da API."""
+        usage = result["usage"]
+        choices = result["choices"][0]
+        return cls(
+            usage_id=result["id"],
+            created=result["created"],
+            model=result["model"],
+            system_fingerprint=result["system_fingerprint"],
+            prompt=result["prompt"],
+            completion=choices["message"]["content"],
+            prompt_tokens=usage["prompt_tokens"],
+            completion_tokens=usage["completion_tokens"],
+            total_tokens=usage["total_tokens"],
+            cached_tokens=usage["prompt_tokens_details"]["cached_tokens"],
+            cache_hit_tokens=usage["prompt_cache_hit_tokens"],
+            cache_miss_tokens=usage["prompt_cache_miss_tokens"],
+            finish_reason=choices["finish_reason"],
+            logprobs=choices["logprobs"],
+        )
+
+
+class ChoiceRecord(NamedTuple):
+    """Registro de uma das respostas (choices) de uma requisição com `n > 1`."""
+
+    usage_id: str
+    choice_index: int
+    completion: str
+    finish_reason: str | None = None
+    logprobs: Any = None
+
+    @classmethod
+    def from_result(cls, result: dict[str, Any]) -> list["ChoiceRecord"]:
+        """Cria um registro para cada resposta do dicionário de resposta da API."""
+        return [
+            cls(
+                usage_id=result["id"],
+                choice_index=choice["index"],
+                completion=choice["message"]["content"],
+                finish_reason=choice["finish_reason"],
+                logprobs=choice["logprobs"],
+            )
+            for choice in result["choices"]
+        ]
+
 
 class SQLiteRepository(BaseClass):
     """Classe para persistência de uso da API DeepSeek via SQLite."""
@@ -50,6 +98,14 @@ class SQLiteRepository(BaseClass):
         self.create_table_query = self._read_sql_file(SQL_DIR / "create_api_usages.sql")
         """Instancia o arquivo SQL de criação da tabela de registros."""
 
+        self.insert_choices_query = self._read_sql_file(SQL_DIR / "insert_api_usage_choices.sql")
+        """Instancia o arquivo SQL de inserção das respostas de requisições com `n > 1`."""
+
+        self.create_choices_table_query = self._read_sql_file(
+            SQL_DIR / "create_api_usage_choices.sql"
+        )
+        """Instancia o arquivo SQL de criação da tabela de respostas por requisição."""
+
         # Cria a conexão com o banco de dados e a tabela se não existir.
         self._create_table()
 
@@ -66,9 +122,9 @@ class SQLiteRepository(BaseClass):
 
     def _format_timestamp(self, timestamp: float) -> str:
         """Formata um timestamp em uma string legível."""
-        time_zone = BRT if BRT else "UTC"
-        if time_zone is BRT:
+        if not BRT:
             self.logger.warning("Fuso horário BRT não definido. Usando UTC como padrão.")
+        time_zone = BRT or UTC
         return datetime.fromtimestamp(timestamp, tz=time_zone).strftime("%Y-%m-%d %H:%M:%S")
 
     def get_connection(self) -> sqlite3.Connection:
@@ -85,39 +141,88 @@ class SQLiteRepository(BaseClass):
                 except sqlite3.OperationalError:
                     conn.execute(self.create_table_query)
                     self.logger.info("Tabela 'api_usages' criada com sucesso.")
+                conn.execute(self.create_choices_table_query)
         except sqlite3.Error:
             self.logger.exception("Erro ao criar ou verificar a tabela no banco de dados.")
             raise
 
-    def insert_usage(self, record: UsageRecord) -> None:
-        """Insere um registro de uso no banco de dados."""
-        created_at = self._format_timestamp(record.created)
+    def _usage_params(self, record: UsageRecord) -> tuple[Any, ...]:
+        """Retorna os parâmetros da consulta de inserção para um registro."""
+        return (
+            record.usage_id,
+            self._format_timestamp(record.created),
+            record.model,
+            record.system_fingerprint,
+            record.prompt,
+            record.completion,
+            record.prompt_tokens,
+            record.completion_tokens,
+            record.total_tokens,
+            record.cached_tokens,
+            record.cache_hit_tokens,
+            record.cache_miss_tokens,
+            record.finish_reason,
+            self._serialize_logprobs(record.logprobs),
+        )
+
+    def _choice_params(self, choices: Iterable[ChoiceRecord]) -> list[tuple[Any, ...]]:
+        """Retorna os parâmetros da consulta de inserção para as respostas informadas."""
+        return [
+            (
+                choice.usage_id,
+                choice.choice_index,
+                choice.completion,
+                choice.finish_reason,
+                self._serialize_logprobs(choice.logprobs),
+            )
+            for choice in choices
+        ]
+
+    def insert_usage(self, record: UsageRecord, choices: list[ChoiceRecord] | None = None) -> None:
+        """Insere um registro de uso e, se houver, suas respostas no banco de dados."""
         try:
             with self.get_connection() as conn:
-                conn.execute(
-                    self.insert_query,
-                    (
-                        record.usage_id,
-                        created_at,
-                        record.model,
-                        record.system_fingerprint,
-                        record.prompt,
-                        record.completion,
-                        record.prompt_tokens,
-                        record.completion_tokens,
-                        record.total_tokens,
-                        record.cached_tokens,
-                        record.cache_hit_tokens,
-                        record.cache_miss_tokens,
-                        record.finish_reason,
-                        str(record.logprobs) if record.logprobs is not None else None,
-                    ),
-                )
+                conn.execute(self.insert_query, self._usage_params(record))
+                if choices:
+                    conn.executemany(self.insert_choices_query, self._choice_params(choices))
                 conn.commit()
                 self.logger.info("Registro inserido com sucesso.")
         except sqlite3.Error:
             self._error("Erro ao inserir registro no banco de dados.")
 
+    def insert_usages(
+        self, records: Iterable[UsageRecord], choices: Iterable[ChoiceRecord] = ()
+    ) -> int:
+        """Insere vários registros de uso e respostas em uma única transação e retorna o total."""
+        params = [self._usage_params(record) for record in records]
+        choice_params = self._choice_params(choices)
+        try:
+            with self.get_connection() as conn:
+                conn.executemany(self.insert_query, params)
+                if choice_params:
+                    conn.executemany(self.insert_choices_query, choice_params)
+                conn.commit()
+        except sqlite3.Error:
+            self._error("Erro ao inserir lote de registros no banco de dados.")
+        self.logger.info(f"Lote de {len(params)} registros inserido com sucesso.")
+        return len(params)
+
+    def insert_usage_frame(self, frame: pd.DataFrame) -> int:
+        """Insere em uma única transação um lote no esquema de `api_usages` e retorna o total."""
+        rows = frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None)
+        try:
+            with self.get_connection() as conn:
+                conn.executemany(self.insert_query, rows)
+                conn.commit()
+        except sqlite3.Error:
+            self._error("Erro ao inserir lote de registros no banco de dados.")
+        self.logger.info(f"Lote de {len(frame)} registros inserido com sucesso.")
+        return len(frame)
+
+    def _serialize_logprobs(self, logprobs: Any) -> str | None:
+        """Serializa os logprobs em JSON compacto para armazenamento."""
+        return json_backend.dumps(logprobs) if logprobs is not None else None
+
     def _read_sql_file(self, file_path: PathLike) -> str:
         """Lê um arquivo .sql e retorna seu conteúdo como string."""
         path = Path(file_path)
@@ -0,0 +1,416 @@
+"""Módulo com o armazenamento colunar de registros de uso da API.
+
+Um `UsageRecord` por linha guarda o `prompt`, a `completion` e os `logprobs` completos, além de
+um objeto Python por campo; um lote de milhões de respostas custa gigabytes. `UsageColumns`
+guarda os mesmos dados por coluna:
+
+- tokens e `created` em arrays `int64` (8 bytes por valor, sem objetos Python);
+- `model`, `system_fingerprint` e `finish_reason` como códigos inteiros sobre uma lista única
+  de categorias (cada texto distinto é guardado uma única vez);
+- `prompt`, `completion` e `logprobs` opcionais, carregados sob demanda por um `TextLoader`
+  (ex: do SQLite ou do arquivo bruto) apenas para as linhas acessadas.
+
+Fatias compartilham a memória das colunas, e `to_frame` monta o DataFrame sobre os mesmos
+arrays, sem cópia.
+"""
+
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
+import contextlib
+from typing import Any, overload
+
+import numpy as np
+import pandas as pd
+
+from src.common import json_backend
+from src.repositories.raw_archive import RawArchive, prompt_from_request
+from src.repositories.sharded_repository import ShardedSQLiteRepository
+from src.repositories.sqlite_repository import SQLiteRepository, UsageRecord
+
+TOKEN_COLUMNS: tuple[str, ...] = (
+    "prompt_tokens",
+    "completion_tokens",
+    "total_tokens",
+    "cached_tokens",
+    "cache_hit_tokens",
+    "cache_miss_tokens",
+)
+"""Colunas numéricas de tokens, guardadas em arrays `int64`."""
+
+INTERNED_COLUMNS: tuple[str, ...] = ("model", "system_fingerprint", "finish_reason")
+"""Colunas de texto repetitivo, guardadas como códigos sobre categorias únicas."""
+
+TEXT_COLUMNS: tuple[str, ...] = ("prompt", "completion", "logprobs")
+"""Colunas de texto livre, mantidas em memória ou carregadas sob demanda."""
+
+TextLoader = Callable[[Sequence[str]], dict[str, tuple[str, str, Any]]]
+"""Carrega `(prompt, completion, logprobs)` pelos `usage_id` informados."""
+
+_SQLITE_MAX_VARIABLES: int = 900
+"""Número máximo de parâmetros por consulta `IN (...)` no SQLite."""
+
+
+class UsageColumnsBuilder:
+    """Acumula registros de uso diretamente em colunas compactas."""
+
+    def __init__(self, *, keep_text: bool = True) -> None:
+        """Inicializa colunas vazias; `keep_text=False` descarta os textos dos registros."""
+        self.keep_text = keep_text
+        """Indica se `prompt`, `completion` e `logprobs` são mantidos em memória."""
+
+        self._ids: list[str] = []
+        """Identificadores dos registros."""
+
+        self._created = array("q")
+        """Timestamps de criação."""
+
+        self._tokens: dict[str, array] = {column: array("q") for column in TOKEN_COLUMNS}
+        """Contagens de tokens por coluna."""
+
+        self._codes: dict[str, array] = {column: array("i") for column in INTERNED_COLUMNS}
+        """Códigos das categorias por coluna; `-1` representa `None`."""
+
+        self._lookup: dict[str, dict[str, int]] = {column: {} for column in INTERNED_COLUMNS}
+        """Código de cada categoria já vista, por coluna."""
+
+        self._text: dict[str, list[Any]] = {column: [] for column in TEXT_COLUMNS}
+        """Textos dos registros, se mantidos."""
+
+    def __len__(self) -> int:
+        """Retorna o número de registros acumulados."""
+        return len(self._ids)
+
+    def _intern(self, column: str, value: str | None) -> int:
+        """Retorna o código da categoria, registrando-a se for nova."""
+        if value is None:
+            return -1
+        lookup = self._lookup[column]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(lookup)
+        return code
+
+    def append(self, record: UsageRecord) -> None:
+        """Acrescenta um registro às colunas."""
+        self._ids.append(record.usage_id)
+        self._created.append(record.created)
+        for column in TOKEN_COLUMNS:
+            self._tokens[column].append(getattr(record, column))
+        for column in INTERNED_COLUMNS:
+            self._codes[column].append(self._intern(column, getattr(record, column)))
+        if self.keep_text:
+            for column in TEXT_COLUMNS:
+                self._text[column].append(getattr(record, column))
+
+    def extend(self, records: Iterable[UsageRecord]) -> None:
+        """Acrescenta vários registros às colunas."""
+        for record in records:
+            self.append(record)
+
+    def build(self, text_loader: TextLoader | None = None) -> "UsageColumns":
+        """Retorna as colunas acumuladas, sem copiar os arrays numéricos.
+
+        Os arrays passam a expor a memória do construtor, que não aceita novos registros.
+        """
+        text = (
+            {column: _object_array(values) for column, values in self._text.items()}
+            if self.keep_text
+            else None
+        )
+        return UsageColumns(
+            usage_id=_object_array(self._ids),
+            created=np.frombuffer(self._created, dtype=np.int64),
+            tokens={
+                column: np.frombuffer(values, dtype=np.int64)
+                for column, values in self._tokens.items()
+            },
+            codes={
+                column: np.frombuffer(values, dtype=np.int32)
+                for column, values in self._codes.items()
+            },
+            categories={column: tuple(lookup) for column, lookup in self._lookup.items()},
+            text=text,
+            text_loader=text_loader,
+        )
+
+
+class UsageColumns:
+    """Registros de uso da API em colunas, com textos opcionais carregados sob demanda."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        usage_id: np.ndarray,
+        created: np.ndarray,
+        tokens: dict[str, np.ndarray],
+        codes: dict[str, np.ndarray],
+        categories: dict[str, tuple[str, ...]],
+        *,
+        text: dict[str, np.ndarray] | None = None,
+        text_loader: TextLoader | None = None,
+        loaded: np.ndarray | None = None,
+    ) -> None:
+        """Inicializa o contêiner sobre as colunas informadas, sem copiá-las.
+
+        Sem `text`, as colunas de texto são alocadas vazias e preenchidas pelo `text_loader` na
+        primeira leitura de cada linha; `loaded` marca as linhas já preenchidas.
+        """
+        self.usage_id = usage_id
+        """Identificadores dos registros."""
+
+        self.created = created
+        """Timestamps de criação (`int64`)."""
+
+        self.tokens = tokens
+        """Contagens de tokens por coluna (`int64`)."""
+
+        self.codes = codes
+        """Códigos das categorias por coluna (`int32`); `-1` representa `None`."""
+
+        self.categories = categories
+        """Categorias únicas de cada coluna, indexadas pelos códigos."""
+
+        self.text_loader = text_loader
+        """Carrega os textos das linhas ainda não preenchidas."""
+
+        if text is None:
+            text = {column: np.empty(len(usage_id), dtype=object) for column in TEXT_COLUMNS}
+            loaded = np.zeros(len(usage_id), dtype=bool) if loaded is None else loaded
+        self.text = text
+        """Colunas de texto (`object`), preenchidas na construção ou sob demanda."""
+
+        self.loaded = loaded if loaded is not None else np.ones(len(usage_id), dtype=bool)
+        """Indica, por linha, se os textos já estão em memória."""
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[UsageRecord],
+        *,
+        keep_text: bool = True,
+        text_loader: TextLoader | None = None,
+    ) -> "UsageColumns":
+        """Cria o contêiner a partir de registros, ex: `replay_usage_records(archive)`."""
+        builder = UsageColumnsBuilder(keep_text=keep_text)
+        builder.extend(records)
+        return builder.build(text_loader)
+
+    @classmethod
+    def from_results(
+        cls,
+        results: Iterable[dict[str, Any]],
+        *,
+        keep_text: bool = True,
+        text_loader: TextLoader | None = None,
+    ) -> "UsageColumns":
+        """Cria o contêiner a partir das respostas da API, ignorando as que falharam."""
+        return cls.from_records(
+            (UsageRecord.from_result(result) for result in results if "error" not in result),
+            keep_text=keep_text,
+            text_loader=text_loader,
+        )
+
+    @classmethod
+    def from_frame(
+        cls, frame: pd.DataFrame, *, text_loader: TextLoader | None = None
+    ) -> "UsageColumns":
+        """Cria o contêiner a partir de um DataFrame no formato de `to_frame`.
+
+        Sem as colunas de texto no DataFrame, os textos ficam a cargo do `text_loader`.
+        """
+        codes: dict[str, np.ndarray] = {}
+        categories: dict[str, tuple[str, ...]] = {}
+        for column in INTERNED_COLUMNS:
+            categorical = pd.Categorical(frame[column])
+            codes[column] = categorical.codes.astype(np.int32, copy=False)
+            categories[column] = tuple(categorical.categories)
+        has_text = all(column in frame for column in TEXT_COLUMNS)
+        return cls(
+            usage_id=frame["usage_id"].to_numpy(dtype=object),
+            created=frame["created"].to_numpy(dtype=np.int64),
+            tokens={column: frame[column].to_numpy(dtype=np.int64) for column in TOKEN_COLUMNS},
+            codes=codes,
+            categories=categories,
+            text=(
+                {column: frame[column].to_numpy(dtype=object) for column in TEXT_COLUMNS}
+                if has_text
+                else None
+            ),
+            text_loader=text_loader,
+        )
+
+    def __len__(self) -> int:
+        """Retorna o número de registros."""
+        return len(self.usage_id)
+
+    @overload
+    def __getitem__(self, key: int) -> UsageRecord: ...
+
+    @overload
+    def __getitem__(self, key: slice) -> "UsageColumns": ...
+
+    def __getitem__(self, key: int | slice) -> "UsageRecord | UsageColumns":
+        """Retorna o registro da posição ou uma fatia que compartilha as colunas."""
+        if isinstance(key, slice):
+            return self._take(key)
+        index = range(len(self))[key]
+        return next(self._iter_records(index, index + 1))
+
+    def __iter__(self) -> Iterator[UsageRecord]:
+        """Percorre os registros, carregando os textos em blocos."""
+        return self._iter_records(0, len(self))
+
+    def _take(self, key: slice) -> "UsageColumns":
+        """Retorna a fatia das colunas; as views de texto são preenchidas no array original."""
+        return UsageColumns(
+            usage_id=self.usage_id[key],
+            created=self.created[key],
+            tokens={column: values[key] for column, values in self.tokens.items()},
+            codes={column: values[key] for column, values in self.codes.items()},
+            categories=self.categories,
+            text={column: values[key] for column, values in self.text.items()},
+            text_loader=self.text_loader,
+            loaded=self.loaded[key],
+        )
+
+    def _iter_records(self, start: int, stop: int, chunk_size: int = 1024) -> Iterator[UsageRecord]:
+        """Gera os registros do intervalo, carregando os textos de um bloco por vez."""
+        for chunk_start in range(start, stop, chunk_size):
+            chunk = slice(chunk_start, min(chunk_start + chunk_size, stop))
+            self._load_text(chunk)
+            values = [
+                self.usage_id[chunk].tolist(),
+                self.created[chunk].tolist(),
+                *(self._decode(column, chunk) for column in INTERNED_COLUMNS[:2]),
+                *(self.text[column][chunk].tolist() for column in TEXT_COLUMNS[:2]),
+                *(self.tokens[column][chunk].tolist() for column in TOKEN_COLUMNS),
+                self._decode("finish_reason", chunk),
+                self.text["logprobs"][chunk].tolist(),
+            ]
+            for row in zip(*values, strict=True):
+                yield UsageRecord(*row)
+
+    def column(self, name: str) -> np.ndarray | list[str | None]:
+        """Retorna a coluna pelo nome; as categóricas são expandidas para os textos."""
+        if name == "usage_id":
+            return self.usage_id
+        if name == "created":
+            return self.created
+        if name in self.tokens:
+            return self.tokens[name]
+        if name in self.codes:
+            return self._decode(name, slice(None))
+        if name in self.text:
+            self._load_text(slice(None))
+            return self.text[name]
+        msg = f"Coluna inexistente: '{name}'."
+        raise KeyError(msg)
+
+    def _decode(self, name: str, key: slice) -> list[str | None]:
+        """Expande apenas os códigos da fatia para os textos; o código `-1` vira `None`."""
+        lookup = np.asarray((*self.categories[name], None), dtype=object)
+        return lookup[self.codes[name][key]].tolist()
+
+    def _load_text(self, key: slice) -> None:
+        """Preenche, pelo `text_loader`, os textos ainda não carregados das linhas da fatia."""
+        pending = np.flatnonzero(~self.loaded[key]) + (key.start or 0)
+        if not pending.size:
+            return
+        if self.text_loader is None:
+            msg = "Textos não carregados e nenhum `text_loader` informado."
+            raise ValueError(msg)
+        ids = self.usage_id[pending].tolist()
+        texts = self.text_loader(ids)
+        for position, usage_id in zip(pending.tolist(), ids, strict=True):
+            prompt, completion, logprobs = texts.get(usage_id, (None, None, None))
+            self.text["prompt"][position] = prompt
+            self.text["completion"][position] = completion
+            self.text["logprobs"][position] = logprobs
+        self.loaded[pending] = True
+
+    def to_records(self) -> list[UsageRecord]:
+        """Converte as colunas em registros `UsageRecord`."""
+        return list(self)
+
+    def to_frame(self, *, include_text: bool = False) -> pd.DataFrame:
+        """Monta um DataFrame sobre as colunas, sem copiar os arrays.
+
+        As colunas internadas viram `Categorical` sobre os mesmos códigos. Com `include_text`,
+        os textos são carregados e incluídos.
+        """
+        data: dict[str, Any] = {"usage_id": self.usage_id, "created": self.created}
+        for column in INTERNED_COLUMNS:
+            data[column] = pd.Categorical.from_codes(
+                self.codes[column], categories=list(self.categories[column]), validate=False
+            )
+        data.update(self.tokens)
+        if include_text:
+            self._load_text(slice(None))
+            data.update(self.text)
+        return pd.DataFrame(data, copy=False)
+
+    @property
+    def nbytes(self) -> int:
+        """Retorna os bytes ocupados pelos arrays das colunas (sem os objetos de texto)."""
+        arrays = [
+            self.usage_id,
+            self.created,
+            self.loaded,
+            *self.tokens.values(),
+            *self.codes.values(),
+            *self.text.values(),
+        ]
+        return sum(values.nbytes for values in arrays)
+
+
+def _object_array(values: Sequence[Any]) -> np.ndarray:
+    """Converte a sequência em um array `object` unidimensional, mesmo com listas nos valores."""
+    result = np.empty(len(values), dtype=object)
+    result[:] = values
+    return result
+
+
+def sqlite_text_loader(
+    repository: SQLiteRepository | ShardedSQLiteRepository,
+) -> TextLoader:
+    """Retorna um `TextLoader` que lê os textos de `api_usages` pelos `id`."""
+
+    def load(usage_ids: Sequence[str]) -> dict[str, tuple[str, str, Any]]:
+        texts: dict[str, tuple[str, str, Any]] = {}
+        for start in range(0, len(usage_ids), _SQLITE_MAX_VARIABLES):
+            ids = tuple(usage_ids[start : start + _SQLITE_MAX_VARIABLES])
+            placeholders = ", ".join("?" * len(ids))
+            sql = f"SELECT id, prompt, completion, logprobs FROM api_usages WHERE id IN ({placeholders})"  # noqa: E501, S608
+            if isinstance(repository, ShardedSQLiteRepository):
+                rows = repository.query(sql, ids).itertuples(index=False, name=None)
+            else:
+                with contextlib.closing(repository.get_connection()) as conn:
+                    rows = conn.execute(sql, ids).fetchall()
+            for usage_id, prompt, completion, logprobs in rows:
+                texts[usage_id] = (
+                    prompt,
+                    completion,
+                    json_backend.loads(logprobs) if logprobs is not None else None,
+                )
+        return texts
+
+    return load
+
+
+def archive_text_loader(archive: RawArchive) -> TextLoader:
+    """Retorna um `TextLoader` que lê os textos das respostas brutas pelo índice do arquivo."""
+
+    def load(usage_ids: Sequence[str]) -> dict[str, tuple[str, str, Any]]:
+        texts: dict[str, tuple[str, str, Any]] = {}
+        for usage_id in usage_ids:
+            record = archive.get(usage_id)
+            if record is None:
+                continue
+            choice = json_backend.loads(record.response)["choices"][0]
+            texts[usage_id] = (
+                prompt_from_request(record.request),
+                choice["message"]["content"],
+                choice["logprobs"],
+            )
+        return texts
+
+    return load
@@ -0,0 +1,121 @@
+"""Módulo com a gravação assíncrona e em lotes dos resultados da API no SQLite.
+
+Os resultados são enfileirados sem bloquear o laço de eventos e gravados em uma única
+transação a cada `batch_size` resultados ou `flush_interval` segundos, o que ocorrer primeiro.
+Se o lote falhar, os resultados são gravados um a um e apenas os inválidos são descartados.
+"""
+
+import asyncio
+import sqlite3
+from typing import Any
+
+from src.common.logger import LoggerSingleton
+from src.repositories.sqlite_repository import ChoiceRecord, SQLiteRepository, UsageRecord
+
+WRITE_ERRORS: tuple[type[Exception], ...] = (sqlite3.Error, ValueError, TypeError, OverflowError)
+"""Erros de gravação de um resultado que não devem derrubar a tarefa do gravador."""
+
+
+class AsyncUsageWriter:
+    """Gravador em lotes dos resultados da API, executado como tarefa do `asyncio`."""
+
+    def __init__(
+        self, repo: SQLiteRepository, batch_size: int = 500, flush_interval: float = 0.2
+    ) -> None:
+        """Inicializa o gravador sobre o repositório SQLite informado."""
+        self.repo = repo
+        """Repositório de destino dos registros de uso."""
+
+        self.batch_size = batch_size
+        """Número máximo de resultados gravados por transação."""
+
+        self.flush_interval = flush_interval
+        """Tempo máximo, em segundos, que um resultado aguarda na fila."""
+
+        self.logger = LoggerSingleton().logger or LoggerSingleton.get_logger()
+        """Instancia o logger da aplicação."""
+
+        self.written: int = 0
+        """Número de registros gravados."""
+
+        self._queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+        """Resultados pendentes; `None` sinaliza o encerramento."""
+
+        self._task: asyncio.Task[None] | None = None
+        """Tarefa que consome a fila."""
+
+    def start(self) -> None:
+        """Inicia a tarefa de gravação no laço de eventos atual."""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def submit(self, result: dict[str, Any]) -> None:
+        """Enfileira um resultado válido da API para gravação."""
+        self._queue.put_nowait(result)
+
+    async def close(self) -> None:
+        """Grava os resultados pendentes e encerra a tarefa."""
+        if self._task is None:
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        """Consome a fila, agrupando os resultados em lotes."""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            flush_at = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = flush_at - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await asyncio.to_thread(self._write, batch)
+
+    def _write(self, batch: list[dict[str, Any]]) -> None:
+        """Grava um lote de resultados em uma única transação."""
+        rows: list[tuple[UsageRecord, list[ChoiceRecord]]] = []
+        for result in batch:
+            # Um resultado incompleto é descartado sem derrubar a tarefa e os envios seguintes
+            try:
+                record = UsageRecord.from_result(result)
+                choices = ChoiceRecord.from_result(result) if len(result["choices"]) > 1 else []
+            except (KeyError, IndexError, TypeError) as e:
+                self.logger.warning(
+                    f"Resultado '{result.get('id')}' descartado da gravação: "
+                    f"{type(e).__name__}: {e}"
+                )
+                continue
+            rows.append((record, choices))
+        if not rows:
+            return
+        try:
+            self.written += self.repo.insert_usages(
+                [record for record, _ in rows],
+                [choice for _, choices in rows for choice in choices],
+            )
+        except WRITE_ERRORS:
+            self.logger.exception(
+                f"Falha ao gravar o lote de {len(rows)} resultados; gravando um a um."
+            )
+            self._write_rows(rows)
+
+    def _write_rows(self, rows: list[tuple[UsageRecord, list[ChoiceRecord]]]) -> None:
+        """Grava os resultados um a um, descartando apenas os que falharem."""
+        for record, choices in rows:
+            try:
+                self.written += self.repo.insert_usages([record], choices)
+            except WRITE_ERRORS:
+                self.logger.exception(f"Resultado '{record.usage_id}' descartado da gravação.")
@@ -0,0 +1 @@
+"""Serviços de longa duração da aplicação."""
@@ -0,0 +1,473 @@
+"""Módulo com o gateway HTTP local que compartilha um único `AiRespository` entre processos.
+
+O gateway expõe `POST /v1/chat/completions` (compatível com a API da OpenAI) e
+`POST /v1/batch/chat/completions`, além de `GET /health` e `GET /metrics`. Todos os clientes
+passam a compartilhar o mesmo pool de conexões HTTP, cache de respostas, escalonador com
+limite adaptativo e gravador em lotes do SQLite. O servidor usa `asyncio`; as chamadas à API
+rodam em threads dedicadas por classe de prioridade, para que lotes não bloqueiem interativas.
+
+Cabeçalhos opcionais: `X-Priority` (`interactive` ou `batch`), `X-Tenant` e `X-Timeout`
+(prazo em segundos).
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+from http import HTTPStatus
+import threading
+from types import TracebackType
+from typing import Any, Self
+
+from dotenv import load_dotenv
+
+from src.common import json_backend
+from src.common.logger import LoggerSingleton
+from src.common.response_cache import ResponseCache, payload_key
+from src.enums.priority import Priority
+from src.repositories.ai_repository import AiRespository
+from src.repositories.usage_writer import AsyncUsageWriter
+
+ERROR_STATUS: dict[str, HTTPStatus] = {
+    "rate_limited": HTTPStatus.TOO_MANY_REQUESTS,
+    "timeout": HTTPStatus.GATEWAY_TIMEOUT,
+    "deadline_exceeded": HTTPStatus.GATEWAY_TIMEOUT,
+    "error": HTTPStatus.BAD_GATEWAY,
+}
+"""Status HTTP devolvido para cada tipo de erro da chamada à API."""
+
+
+class GatewayRequestError(ValueError):
+    """Requisição inválida recebida pelo gateway."""
+
+    def __init__(self, message: str, status: HTTPStatus = HTTPStatus.BAD_REQUEST) -> None:
+        """Inicializa o erro com a mensagem e o status HTTP da resposta."""
+        super().__init__(message)
+        self.status = status
+
+
+def _error_body(message: str, error_type: str) -> dict[str, Any]:
+    """Retorna o corpo de erro no formato da API da OpenAI."""
+    return {"error": {"message": message, "type": error_type}}
+
+
+def _normalize_message(message: Any) -> dict[str, Any]:
+    """Valida a mensagem e achata o conteúdo em partes de texto (formato da OpenAI) em texto."""
+    if not isinstance(message, dict) or not isinstance(message.get("role"), str):
+        raise GatewayRequestError("Cada mensagem deve ser um objeto com o campo 'role'.")
+    content = message.get("content")
+    if isinstance(content, list):
+        if not all(
+            isinstance(part, dict)
+            and part.get("type") == "text"
+            and isinstance(part.get("text"), str)
+            for part in content
+        ):
+            raise GatewayRequestError("Apenas partes de conteúdo do tipo 'text' são suportadas.")
+        return {**message, "content": "".join(part["text"] for part in content)}
+    if not isinstance(content, str):
+        raise GatewayRequestError("O campo 'content' de cada mensagem deve ser um texto.")
+    return message
+
+
+def _last_user_prompt(messages: list[dict[str, Any]]) -> str:
+    """Retorna o conteúdo da última mensagem do usuário."""
+    return next(
+        (message["content"] for message in reversed(messages) if message["role"] == "user"), ""
+    )
+
+
+class Gateway:
+    """Servidor HTTP `asyncio` que atende as chamadas de vários processos com um só cliente."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        client: AiRespository,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        cache: ResponseCache | None = None,
+        write_batch_size: int = 500,
+        write_flush_interval: float = 0.2,
+        max_request_bytes: int = 1024 * 1024,
+    ) -> None:
+        """Inicializa o gateway sobre o cliente informado; `port=0` escolhe uma porta livre."""
+        self.client = client
+        """Cliente compartilhado: pool HTTP, escalonador e repositório."""
+
+        self.host = host
+        """Endereço de escuta."""
+
+        self.port = port
+        """Porta de escuta; atualizada com a porta real ao iniciar."""
+
+        self.cache = cache
+        """Cache de respostas por payload exato, se habilitado."""
+
+        self.write_batch_size = write_batch_size
+        """Número máximo de resultados gravados por transação."""
+
+        self.write_flush_interval = write_flush_interval
+        """Tempo máximo, em segundos, que um resultado aguarda para ser gravado."""
+
+        self.max_request_bytes = max_request_bytes
+        """Tamanho máximo do corpo de uma requisição."""
+
+        self.logger = LoggerSingleton().logger or LoggerSingleton.get_logger()
+        """Instancia o logger da aplicação."""
+
+        max_workers = client.concurrency_settings["max_limit"]
+        self._executors: dict[Priority, ThreadPoolExecutor] = {
+            priority: ThreadPoolExecutor(max_workers, f"gateway-{priority.name.lower()}")
+            for priority in Priority
+        }
+        """Threads das chamadas à API, separadas por classe de prioridade."""
+
+        self.writer: AsyncUsageWriter | None = None
+        """Gravador em lotes, criado no laço de eventos do servidor."""
+
+        self._server: asyncio.Server | None = None
+        """Servidor `asyncio` subjacente."""
+
+        self._connections: set[asyncio.Task[None]] = set()
+        """Tarefas das conexões abertas, canceladas ao encerrar o servidor."""
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        """Laço de eventos do servidor, quando executado em segundo plano."""
+
+        self._thread: threading.Thread | None = None
+        """Thread do laço de eventos, quando executado em segundo plano."""
+
+        self._ready = threading.Event()
+        """Sinaliza que o servidor está escutando."""
+
+    @property
+    def url(self) -> str:
+        """Retorna a URL base do gateway."""
+        return f"http://{self.host}:{self.port}"
+
+    async def start_serving(self) -> None:
+        """Abre o socket de escuta e inicia o gravador em lotes."""
+        self.writer = AsyncUsageWriter(
+            self.client.repo, self.write_batch_size, self.write_flush_interval
+        )
+        self.writer.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.logger.info(f"Gateway escutando em {self.url}.")
+
+    async def close(self) -> None:
+        """Encerra o servidor e grava os resultados pendentes.
+
+        As conexões keep-alive ociosas são canceladas; sem isso, `wait_closed` aguardaria os
+        clientes desconectarem e os resultados pendentes não seriam gravados.
+        """
+        if self._server is not None:
+            self._server.close()
+            for task in self._connections:
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+        if self.writer is not None:
+            await self.writer.close()
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def serve_forever(self) -> None:
+        """Atende as requisições até ser cancelado."""
+        await self.start_serving()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.close()
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Atende as requisições de uma conexão, mantendo-a aberta entre elas (keep-alive)."""
+        task = asyncio.current_task()
+        if task is not None:
+            self._connections.add(task)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive = await self._handle_request(request_line, reader, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if task is not None:
+                self._connections.discard(task)
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _handle_request(
+        self, request_line: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> bool:
+        """Lê uma requisição, despacha para a rota e escreve a resposta."""
+        headers: dict[str, str] = {}
+        while (line := await reader.readline()) not in {b"\r\n", b"\n", b""}:
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            method, path, version = request_line.decode("latin-1").split()
+        except ValueError:
+            await self._send(
+                writer,
+                HTTPStatus.BAD_REQUEST,
+                _error_body("Requisição inválida.", "invalid_request"),
+                keep_alive=False,
+            )
+            return False
+        keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+        try:
+            body = await self._read_body(headers, reader)
+            status, content = await self._route(method, path, headers, body)
+        except GatewayRequestError as e:
+            status, content = e.status, _error_body(str(e), "invalid_request")
+            keep_alive = keep_alive and status != HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+        except (ConnectionError, asyncio.IncompleteReadError):
+            raise
+        except Exception:
+            # Um erro inesperado responde 500 em vez de derrubar a conexão sem resposta
+            self.logger.exception(f"Erro inesperado ao atender {method} {path}.")
+            status = HTTPStatus.INTERNAL_SERVER_ERROR
+            content = _error_body("Erro interno do gateway.", "internal_error")
+        await self._send(writer, status, content, keep_alive=keep_alive)
+        return keep_alive
+
+    async def _read_body(self, headers: dict[str, str], reader: asyncio.StreamReader) -> bytes:
+        """Lê o corpo da requisição conforme o cabeçalho `Content-Length`."""
+        length = headers.get("content-length", "0")
+        if not length.isdigit():
+            raise GatewayRequestError("Cabeçalho Content-Length inválido.")
+        if int(length) > self.max_request_bytes:
+            raise GatewayRequestError(
+                "Corpo da requisição muito grande.", HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+            )
+        return await reader.readexactly(int(length)) if int(length) else b""
+
+    async def _send(
+        self,
+        writer: asyncio.StreamWriter,
+        status: HTTPStatus,
+        content: dict[str, Any],
+        *,
+        keep_alive: bool,
+    ) -> None:
+        """Escreve a resposta JSON na conexão."""
+        body = json_backend.dumps_bytes(content)
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _route(
+        self, method: str, path: str, headers: dict[str, str], body: bytes
+    ) -> tuple[HTTPStatus, dict[str, Any]]:
+        """Despacha a requisição para a rota correspondente."""
+        routes = {
+            ("POST", "/v1/chat/completions"): self._chat_completions,
+            ("POST", "/v1/batch/chat/completions"): self._batch_chat_completions,
+            ("GET", "/health"): self._health,
+            ("GET", "/metrics"): self._metrics,
+        }
+        handler = routes.get((method, path.split("?", 1)[0]))
+        if handler is None:
+            msg = f"Rota não encontrada: {method} {path}"
+            raise GatewayRequestError(msg, HTTPStatus.NOT_FOUND)
+        return await handler(headers, body)
+
+    async def _health(
+        self, _headers: dict[str, str], _body: bytes
+    ) -> tuple[HTTPStatus, dict[str, Any]]:
+        """Indica que o gateway está no ar."""
+        return HTTPStatus.OK, {"status": "ok"}
+
+    async def _metrics(
+        self, _headers: dict[str, str], _body: bytes
+    ) -> tuple[HTTPStatus, dict[str, Any]]:
+        """Retorna as métricas do escalonador, do cache e do gravador."""
+        metrics = self.client.scheduler.metrics()
+        if self.cache is not None:
+            metrics.update(self.cache.metrics())
+        metrics["written_records"] = self.writer.written if self.writer is not None else 0
+        return HTTPStatus.OK, metrics
+
+    def _parse_body(self, body: bytes) -> Any:
+        """Decodifica o corpo JSON da requisição."""
+        try:
+            return json_backend.loads(body)
+        except ValueError:
+            raise GatewayRequestError("Corpo da requisição não é um JSON válido.") from None
+
+    def _call_options(
+        self, headers: dict[str, str], default_priority: Priority
+    ) -> tuple[Priority, str, float | None]:
+        """Extrai a prioridade, o tenant e o prazo dos cabeçalhos da requisição."""
+        try:
+            priority = Priority[headers.get("x-priority", default_priority.name).upper()]
+            timeout = float(headers["x-timeout"]) if "x-timeout" in headers else None
+        except (KeyError, ValueError):
+            raise GatewayRequestError("Cabeçalho X-Priority ou X-Timeout inválido.") from None
+        return priority, headers.get("x-tenant", "default"), timeout
+
+    def _build_payload(self, request: Any) -> dict[str, Any]:
+        """Valida a requisição antes da chamada à API e a completa com os parâmetros padrão."""
+        if not isinstance(request, dict) or not isinstance(request.get("messages"), list):
+            raise GatewayRequestError("O campo 'messages' é obrigatório.")
+        if request.get("stream"):
+            raise GatewayRequestError("Respostas em streaming não são suportadas.")
+        return {
+            "model": self.client.model,
+            "temperature": self.client.temperature,
+            "max_tokens": self.client.max_tokens,
+            "top_p": self.client.top_p,
+            **request,
+            "messages": [_normalize_message(message) for message in request["messages"]],
+        }
+
+    async def _complete(
+        self,
+        payload: dict[str, Any],
+        priority: Priority,
+        tenant: str,
+        timeout: float | None,  # noqa: ASYNC109
+    ) -> tuple[HTTPStatus, dict[str, Any]]:
+        """Atende um payload pelo cache ou pela API, enfileirando o resultado para gravação."""
+        key = payload_key(payload) if self.cache is not None else b""
+        if self.cache is not None and (cached := self.cache.get(key)) is not None:
+            return HTTPStatus.OK, cached
+
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            self._executors[priority], self.client.dispatch, payload, priority, tenant, timeout
+        )
+        if "error" in result:
+            error_type = result.get("error_type", "error")
+            return ERROR_STATUS.get(error_type, HTTPStatus.BAD_GATEWAY), _error_body(
+                str(result["error"]), error_type
+            )
+
+        if self.cache is not None:
+            self.cache.put(key, result)
+        if self.writer is not None and "id" in result and "usage" in result:
+            self.writer.submit({**result, "prompt": _last_user_prompt(payload["messages"])})
+        return HTTPStatus.OK, result
+
+    async def _chat_completions(
+        self, headers: dict[str, str], body: bytes
+    ) -> tuple[HTTPStatus, dict[str, Any]]:
+        """Atende uma requisição de chat completions, por padrão como interativa."""
+        payload = self._build_payload(self._parse_body(body))
+        return await self._complete(payload, *self._call_options(headers, Priority.INTERACTIVE))
+
+    async def _batch_chat_completions(
+        self, headers: dict[str, str], body: bytes
+    ) -> tuple[HTTPStatus, dict[str, Any]]:
+        """Atende várias requisições em paralelo, por padrão como lote.
+
+        O corpo é `{"requests": [...]}`, com cada item no formato de `/v1/chat/completions`.
+        A resposta traz, na mesma ordem, o status e o corpo de cada requisição.
+        """
+        requests = self._parse_body(body)
+        if not isinstance(requests, dict) or not isinstance(requests.get("requests"), list):
+            raise GatewayRequestError("O campo 'requests' é obrigatório.")
+        payloads = [self._build_payload(request) for request in requests["requests"]]
+        options = self._call_options(headers, Priority.BATCH)
+        responses = await asyncio.gather(
+            *(self._complete(payload, *options) for payload in payloads)
+        )
+        return HTTPStatus.OK, {
+            "object": "list",
+            "data": [
+                {"index": idx, "status": status.value, "body": content}
+                for idx, (status, content) in enumerate(responses)
+            ],
+        }
+
+    def start(self) -> Self:
+        """Inicia o gateway em um laço de eventos em segundo plano, ex: em testes."""
+
+        def run() -> None:
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start_serving())
+            self._ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.close())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self) -> None:
+        """Encerra o gateway iniciado com `start`, gravando os resultados pendentes."""
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = self._thread = None
+
+    def __enter__(self) -> Self:
+        """Inicia o gateway ao entrar no contexto."""
+        return self.start()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Encerra o gateway ao sair do contexto."""
+        self.stop()
+
+
+def create_gateway(
+    client: AiRespository, host: str | None = None, port: int | None = None
+) -> Gateway:
+    """Cria o gateway a partir das configurações `gateway_settings` do cliente."""
+    settings = client.settings_config["gateway_settings"]
+    cache = (
+        ResponseCache(settings["cache_max_entries"], settings["cache_ttl_seconds"])
+        if settings["cache_enabled"]
+        else None
+    )
+    return Gateway(
+        client,
+        host or settings["host"],
+        settings["port"] if port is None else port,
+        cache=cache,
+        write_batch_size=settings["write_batch_size"],
+        write_flush_interval=settings["write_flush_interval_seconds"],
+        max_request_bytes=settings["max_request_bytes"],
+    )
+
+
+def main() -> None:
+    """Executa o gateway até ser interrompido."""
+    parser = argparse.ArgumentParser(description="Gateway HTTP local para a API de IA.")
+    parser.add_argument("--host", help="Endereço de escuta (padrão: gateway_settings.host).")
+    parser.add_argument("--port", type=int, help="Porta de escuta (padrão: gateway_settings.port).")
+    parser.add_argument("--provider", default="deepseek", help="Provedor configurado a usar.")
+    args = parser.parse_args()
+
+    load_dotenv()
+    client = AiRespository(provider=args.provider, output_mode="quiet")
+    gateway = create_gateway(client, args.host, args.port)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(gateway.serve_forever())
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Módulo com o worker que consome a fila durável de prompts.
+
+Cada worker mantém até `batch_size` jobs em andamento: arrenda novos jobs à medida que as
+chamadas terminam, consulta a API com prioridade `batch` e confirma cada resultado na fila, que
+grava o uso em `api_usages` uma única vez. A vazão cresce com o número de processos worker
+apontando para o mesmo banco; jobs de um worker que caiu voltam à fila quando o arrendamento
+expira. Enquanto uma chamada está em andamento, o worker renova o arrendamento a cada terço de
+`visibility_timeout`, para que chamadas longas não sejam reentregues e pagas duas vezes.
+
+Uso: `python -m src.services.worker` (ver `--help`); os prompts são enfileirados com
+`python -m src.repositories.job_queue enqueue <arquivo>`.
+"""
+
+import argparse
+from collections.abc import Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import contextlib
+import os
+import signal
+import socket
+import threading
+import time
+from types import FrameType
+
+from dotenv import load_dotenv
+
+from src.common.logger import LoggerSingleton
+from src.enums.priority import Priority
+from src.repositories.ai_repository import AiRespository
+from src.repositories.job_queue import Job, JobQueue, create_job_queue
+
+
+class QueueWorker:
+    """Worker que arrenda jobs da fila, consulta a API e confirma os resultados."""
+
+    def __init__(
+        self,
+        client: AiRespository,
+        queue: JobQueue,
+        *,
+        worker_id: str | None = None,
+        batch_size: int = 8,
+        poll_interval: float = 1.0,
+    ) -> None:
+        """Inicializa o worker com o cliente da API e a fila informados."""
+        self.client = client
+        """Cliente compartilhado pelas chamadas do worker."""
+
+        self.queue = queue
+        """Fila de onde os jobs são arrendados."""
+
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        """Identificador do worker, gravado como dono dos arrendamentos."""
+
+        self.batch_size = batch_size
+        """Número máximo de jobs em andamento no worker."""
+
+        self.poll_interval = poll_interval
+        """Espera, em segundos, entre consultas à fila vazia."""
+
+        self.acked: int = 0
+        """Número de jobs confirmados."""
+
+        self.nacked: int = 0
+        """Número de jobs devolvidos à fila ou marcados como falhos."""
+
+        self.heartbeat_interval = queue.visibility_timeout / 3
+        """Intervalo, em segundos, entre as renovações dos arrendamentos em andamento."""
+
+        self._counters_lock = threading.Lock()
+        """Protege os contadores atualizados pelas threads do worker."""
+
+        self.logger = LoggerSingleton().logger or LoggerSingleton.get_logger()
+        """Instancia o logger da aplicação."""
+
+    def process(self, job: Job) -> bool:
+        """Consulta a API para o job e o confirma, ou o devolve à fila em caso de erro."""
+        try:
+            result = self.client.fetch(
+                job.prompt,
+                job.n,
+                Priority.BATCH,
+                job.tenant,
+                timeout=self.queue.visibility_timeout,
+            )
+            if result.get("choices"):
+                acked = self.queue.ack(job, result)
+                with self._counters_lock:
+                    self.acked += acked
+                return acked
+            error = f"{result.get('error_type', 'error')}: {result.get('error', 'sem respostas')}"
+        except Exception as e:
+            self.logger.exception(f"Erro ao processar o job {job.job_id}.")
+            error = f"{type(e).__name__}: {e}"
+        self.queue.nack(job, error)
+        with self._counters_lock:
+            self.nacked += 1
+        return False
+
+    def run(self, stop: threading.Event | None = None, *, drain: bool = False) -> int:
+        """Processa jobs até `stop` ser sinalizado e retorna o número de jobs confirmados.
+
+        Com `drain`, retorna assim que a fila não tiver mais jobs disponíveis nem em andamento.
+        Ao parar, os jobs em andamento são concluídos antes do retorno.
+        """
+        stop = stop or threading.Event()
+        in_flight: dict[Future[bool], Job] = {}
+        renew_at = time.monotonic() + self.heartbeat_interval
+        with ThreadPoolExecutor(self.batch_size, thread_name_prefix="queue-worker") as executor:
+            while in_flight or not stop.is_set():
+                if not stop.is_set():
+                    free = self.batch_size - len(in_flight)
+                    jobs = self.queue.lease(self.worker_id, free) if free else []
+                    in_flight.update((executor.submit(self.process, job), job) for job in jobs)
+                if not in_flight:
+                    if drain:
+                        break
+                    stop.wait(self.poll_interval)
+                    continue
+                timeout = max(min(self.poll_interval, renew_at - time.monotonic()), 0)
+                done, _ = wait(in_flight, timeout, FIRST_COMPLETED)
+                for future in done:
+                    del in_flight[future]
+                if time.monotonic() >= renew_at:
+                    self._renew_leases(in_flight.values())
+                    renew_at = time.monotonic() + self.heartbeat_interval
+        self.logger.info(
+            f"Worker '{self.worker_id}' encerrado: {self.acked} jobs confirmados, "
+            f"{self.nacked} devolvidos."
+        )
+        return self.acked
+
+    def _renew_leases(self, jobs: Iterable[Job]) -> None:
+        """Renova os arrendamentos dos jobs em andamento (heartbeat)."""
+        for job in jobs:
+            if not self.queue.extend(job):
+                self.logger.warning(
+                    f"Arrendamento do job {job.job_id} perdido; o resultado não será confirmado."
+                )
+
+
+def create_worker(client: AiRespository, db_path: str | None = None) -> QueueWorker:
+    """Cria o worker e a fila a partir das configurações `queue_settings` do cliente."""
+    settings = client.settings_config["queue_settings"]
+    return QueueWorker(
+        client,
+        create_job_queue(settings, db_path),
+        batch_size=settings["worker_batch_size"],
+        poll_interval=settings["poll_interval_seconds"],
+    )
+
+
+def main() -> None:
+    """Executa um worker da fila até ser interrompido (SIGINT ou SIGTERM)."""
+    parser = argparse.ArgumentParser(description="Worker da fila durável de prompts.")
+    parser.add_argument("--db", help="Banco SQLite da fila (padrão: queue_settings.db_path).")
+    parser.add_argument("--provider", default="deepseek", help="Provedor configurado a usar.")
+    parser.add_argument("--batch-size", type=int, help="Jobs em andamento por worker.")
+    parser.add_argument(
+        "--drain", action="store_true", help="Encerra quando não houver mais jobs disponíveis."
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    worker = create_worker(AiRespository(provider=args.provider, output_mode="quiet"), args.db)
+    if args.batch_size:
+        worker.batch_size = args.batch_size
+
+    stop = threading.Event()
+
+    def request_stop(_signum: int, _frame: FrameType | None) -> None:
+        stop.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    with contextlib.suppress(KeyboardInterrupt):
+        worker.run(stop, drain=args.drain)
+    worker.client.close()
+    print(f"{worker.acked} jobs confirmados, {worker.nacked} devolvidos.")
+
+
+if __name__ == "__main__":
+    main()
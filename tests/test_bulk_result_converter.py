@@ -0,0 +1,99 @@
+"""Testes unitários para a conversão em lote das respostas da API."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from src.repositories.result_converter import API_USAGES_COLUMNS, BulkResultConverter
+from src.repositories.sqlite_repository import SQLiteRepository, UsageRecord
+
+RESULT = json.loads(Path("./data/teste.json").read_text(encoding="utf-8"))
+
+
+def test_convert_produces_fixed_schema():
+    batch = BulkResultConverter().convert([RESULT, json.dumps(RESULT).encode()])
+    assert tuple(batch.frame.columns) == API_USAGES_COLUMNS
+    assert batch.rejected == []
+    row = batch.frame.iloc[0]
+    assert row["id"] == RESULT["id"]
+    assert row["created_at"] == "2025-06-03 19:40:39"
+    assert row["completion"] == "Brasília."
+    assert row["total_tokens"] == 28
+    assert str(batch.frame["prompt_tokens"].dtype) == "int64"
+
+
+def test_convert_rejects_malformed_rows_without_aborting():
+    missing_choices = {key: value for key, value in RESULT.items() if key != "choices"}
+    bad_tokens = {**RESULT, "usage": {**RESULT["usage"], "total_tokens": "muitos"}}
+    batch = BulkResultConverter().convert(
+        [RESULT, b"{quebrado", missing_choices, bad_tokens, RESULT]
+    )
+    assert len(batch.frame) == 2
+    assert [row.position for row in batch.rejected] == [1, 2, 3]
+
+
+def test_convert_rejects_null_prompt_and_fractional_tokens():
+    fractional = {**RESULT, "usage": {**RESULT["usage"], "total_tokens": 1.7}}
+    batch = BulkResultConverter().convert([{**RESULT, "prompt": None}, fractional, RESULT])
+    assert len(batch.frame) == 1
+    assert [row.position for row in batch.rejected] == [0, 1]
+
+
+def test_convert_rejects_out_of_range_values():
+    usage = RESULT["usage"]
+    out_of_range = [
+        {**RESULT, "created": 1e20},
+        {**RESULT, "created": -1e12},
+        {**RESULT, "usage": {**usage, "total_tokens": 2**70}},
+        {**RESULT, "usage": {**usage, "prompt_tokens": -1}},
+    ]
+    batch = BulkResultConverter().convert([*out_of_range, RESULT])
+    assert len(batch.frame) == 1
+    assert batch.frame["total_tokens"].tolist() == [usage["total_tokens"]]
+    assert [row.position for row in batch.rejected] == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize("results", [[], [b"{x", {"a": 1}]])
+def test_convert_without_valid_rows_returns_empty_frame(results, tmp_path):
+    batch = BulkResultConverter().convert(results)
+    assert batch.frame.empty
+    assert tuple(batch.frame.columns) == API_USAGES_COLUMNS
+    assert str(batch.frame["total_tokens"].dtype) == "int64"
+    assert len(batch.rejected) == len(results)
+    repo = SQLiteRepository(db_path=str(tmp_path / "usages.db"))
+    assert repo.insert_usage_frame(batch.frame) == 0
+
+
+def test_convert_serializes_logprobs_as_json():
+    choice = {**RESULT["choices"][0], "logprobs": {"content": [{"token": "Bra", "logprob": -0.1}]}}
+    batch = BulkResultConverter().convert([{**RESULT, "choices": [choice]}])
+    assert json.loads(batch.frame["logprobs"][0]) == choice["logprobs"]
+
+
+def test_iter_jsonl_batches_and_insert(tmp_path):
+    path = tmp_path / "responses.jsonl"
+    lines = [json.dumps({**RESULT, "id": f"id-{idx}"}) for idx in range(5)]
+    path.write_text("\n".join([*lines[:2], "nada", *lines[2:]]) + "\n", encoding="utf-8")
+
+    batches = list(BulkResultConverter(batch_size=2).iter_jsonl(path))
+    assert [len(batch.frame) for batch in batches] == [2, 1, 2]
+    assert [row.position for batch in batches for row in batch.rejected] == [2]
+
+    repo = SQLiteRepository(db_path=str(tmp_path / "usages.db"))
+    assert sum(repo.insert_usage_frame(batch.frame) for batch in batches) == 5
+    with repo.get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM api_usages").fetchone()[0] == 5
+
+
+def test_invalid_batch_size():
+    with pytest.raises(ValueError, match="tamanho do lote"):
+        BulkResultConverter(batch_size=0)
+
+
+def test_bulk_insert_does_not_warn_per_record(tmp_path, caplog):
+    repo = SQLiteRepository(db_path=str(tmp_path / "usages.db"))
+    records = [UsageRecord.from_result({**RESULT, "id": f"id-{idx}"}) for idx in range(3)]
+    with caplog.at_level("WARNING"):
+        assert repo.insert_usages(records) == 3
+    assert "BRT" not in caplog.text
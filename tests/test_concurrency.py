@@ -0,0 +1,106 @@
+"""Testes unitários para o controle adaptativo de concorrência (AIMD)."""
+
+import threading
+
+import pytest
+
+from repositories.ai_repository import AiRespository
+from repositories.sqlite_repository import SQLiteRepository
+from src.common.concurrency import AimdLimiter
+from src.common.mock_provider import MockProvider
+
+
+def test_limit_increases_additively_on_success():
+    limiter = AimdLimiter(initial_limit=2, max_limit=10)
+    for _ in range(2):
+        assert limiter.acquire(timeout=0)
+        limiter.release("success", 0.1)
+    assert limiter.limit == 2
+    for _ in range(10):
+        limiter.acquire(timeout=0)
+        limiter.release("success", 0.1)
+    assert limiter.limit > 2
+
+
+def test_limit_decreases_multiplicatively_on_rate_limit():
+    limiter = AimdLimiter(initial_limit=16, max_limit=16)
+    limiter.acquire(timeout=0)
+    limiter.release("rate_limited", 0.0)
+    assert limiter.limit == 8
+    assert limiter.metrics()["calls_rate_limited"] == 1
+
+
+def test_limit_converges_to_simulated_capacity():
+    capacity = 12
+    limiter = AimdLimiter(initial_limit=1, max_limit=64)
+    for _ in range(2_000):
+        in_flight = limiter.limit
+        outcome = "rate_limited" if in_flight > capacity else "success"
+        for _ in range(in_flight):
+            limiter.acquire(timeout=0)
+        for _ in range(in_flight):
+            limiter.release(outcome, 0.0)
+    assert capacity / 2 <= limiter.limit <= capacity + 1
+
+
+def test_latency_spike_counts_as_overload():
+    limiter = AimdLimiter(initial_limit=8, max_limit=8)
+    limiter.acquire(timeout=0)
+    limiter.release("success", 0.01)
+    limiter.acquire(timeout=0)
+    limiter.release("success", 1.0)
+    assert limiter.limit == 4
+
+
+def test_latency_step_change_becomes_new_baseline():
+    limiter = AimdLimiter(initial_limit=20, max_limit=20)
+    for latency in [0.1] * 50 + [0.3] * 200:
+        limiter.acquire(timeout=0)
+        limiter.release("success", latency)
+    assert limiter.metrics()["baseline_latency_seconds"] == pytest.approx(0.3, abs=0.01)
+    assert limiter.limit == 20
+
+
+def test_latency_decreases_are_bounded():
+    limiter = AimdLimiter(initial_limit=16, max_limit=16, latency_smoothing=0.0)
+    limiter.acquire(timeout=0)
+    limiter.release("success", 0.1)
+    limits = []
+    for _ in range(10):
+        limiter.acquire(timeout=0)
+        limiter.release("success", 1.0)
+        limits.append(limiter.limit)
+    assert min(limits) == 4
+    assert limits[-1] > 4
+
+
+def test_acquire_blocks_at_limit():
+    limiter = AimdLimiter(initial_limit=1, max_limit=1)
+    assert limiter.acquire(timeout=0)
+    assert not limiter.acquire(timeout=0.01)
+    threading.Timer(0.01, limiter.release, args=("success", 0.01)).start()
+    assert limiter.acquire(timeout=1)
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError, match="limites"):
+        AimdLimiter(initial_limit=10, max_limit=5)
+    with pytest.raises(ValueError, match="Resultado inválido"):
+        AimdLimiter().release("talvez", 0.0)
+
+
+def test_run_many_adapts_to_provider_capacity(monkeypatch, tmp_path):
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "teste")
+    with MockProvider(latency_seconds=0.02, max_concurrency=3) as provider:
+        client = AiRespository(api_url=provider.url, output_mode="quiet")
+        client.repo = SQLiteRepository(db_path=str(tmp_path / "usages.db"))
+        client.concurrency_settings = {
+            **client.concurrency_settings,
+            "max_retries": 10,
+            "retry_backoff_seconds": 0.01,
+        }
+        client.limiter = client.scheduler.limiter = AimdLimiter(initial_limit=8, max_limit=16)
+        results = client.run_many([f"pergunta {idx}" for idx in range(40)])
+    assert all(result.get("choices") for result in results)
+    assert provider.peak_concurrency <= 3
+    assert client.limiter.limit <= 8
@@ -0,0 +1,139 @@
+"""Testes unitários para o histórico compacto de conversas e sua persistência."""
+
+import pytest
+
+from repositories.ai_repository import AiRespository
+from repositories.sqlite_repository import SQLiteRepository
+from src.common.conversation_history import (
+    SUMMARY_PREFIX,
+    ConversationHistory,
+    estimate_tokens,
+)
+from src.common.mock_provider import MockProvider
+from src.repositories.conversation_repository import ConversationRepository
+
+
+@pytest.fixture
+def provider():
+    with MockProvider() as mock:
+        yield mock
+
+
+def _client(monkeypatch, tmp_path, provider, **conversation_settings):
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "teste")
+    client = AiRespository(api_url=provider.url, output_mode="quiet")
+    client.repo = SQLiteRepository(db_path=str(tmp_path / "usages.db"))
+    client.conversations = ConversationRepository(db_path=str(tmp_path / "usages.db"))
+    client.conversation_settings = {**client.conversation_settings, **conversation_settings}
+    return client
+
+
+def test_history_respects_token_budget():
+    history = ConversationHistory(max_tokens=30, max_messages=50, summary_max_tokens=20)
+    for idx in range(100):
+        history.append("user", f"mensagem número {idx} " * 2)
+        assert history.total_tokens <= 30 or len(history) == 1
+    assert history.messages[-1].content.startswith("mensagem número 99")
+    assert history.summary
+
+
+def test_history_respects_message_limit():
+    history = ConversationHistory(max_tokens=10_000, max_messages=3)
+    evicted = []
+    for idx in range(5):
+        evicted.extend(history.append("user", str(idx)))
+    assert [message.content for message in history.messages] == ["2", "3", "4"]
+    assert [message.content for message in evicted] == ["0", "1"]
+    assert history.summary == ""
+
+
+def test_history_keeps_latest_message_even_if_over_budget():
+    history = ConversationHistory(max_tokens=5, max_messages=10)
+    history.append("user", "x" * 400)
+    assert len(history) == 1
+    assert history.total_tokens == estimate_tokens("x" * 400)
+
+
+def test_history_to_messages_includes_system_and_summary():
+    history = ConversationHistory(max_tokens=10_000, max_messages=1, summary_max_tokens=50)
+    history.append("user", "Qual a capital do Brasil?")
+    history.append("assistant", "Brasília.")
+    messages = history.to_messages("Seja direto.")
+    assert messages[0] == {"role": "system", "content": "Seja direto."}
+    assert messages[1]["content"].startswith(SUMMARY_PREFIX)
+    assert "Qual a capital do Brasil?" in messages[1]["content"]
+    assert messages[2] == {"role": "assistant", "content": "Brasília."}
+
+
+def test_history_rejects_invalid_role():
+    history = ConversationHistory(max_tokens=10, max_messages=10)
+    with pytest.raises(ValueError, match="Papel de mensagem inválido"):
+        history.append("tool", "conteúdo")
+
+
+def test_discard_last_restores_token_count():
+    history = ConversationHistory(max_tokens=1_000, max_messages=10)
+    history.append("user", "primeira")
+    tokens = history.total_tokens
+    history.append("user", "segunda")
+    history.discard_last()
+    assert history.total_tokens == tokens
+
+
+def test_conversation_repository_round_trip(tmp_path):
+    repo = ConversationRepository(db_path=str(tmp_path / "conversations.db"))
+    conversation_id = repo.create_conversation("deepseek-chat")
+    assert repo.conversation_exists(conversation_id)
+    for idx in range(5):
+        repo.append_turn(
+            conversation_id,
+            [("user", f"pergunta {idx}", 5), ("assistant", f"resposta {idx}", 5)],
+            summary=f"resumo {idx}",
+            usage_id=f"usage-{idx}",
+        )
+    summary, rows = repo.load_recent(conversation_id, max_messages=3)
+    assert summary == "resumo 4"
+    assert [row[1] for row in rows] == ["resposta 3", "pergunta 4", "resposta 4"]
+
+
+def test_conversation_repository_unknown_session(tmp_path):
+    repo = ConversationRepository(db_path=str(tmp_path / "conversations.db"))
+    with pytest.raises(KeyError):
+        repo.load_recent("inexistente", max_messages=3)
+
+
+def test_chat_persists_turns_and_resumes_from_sqlite(monkeypatch, tmp_path, provider):
+    client = _client(monkeypatch, tmp_path, provider)
+    session_id = client.start_session()
+    for idx in range(2):
+        result = client.chat(session_id, f"pergunta {idx}")
+        assert result["choices"][0]["message"]["content"].endswith(f"pergunta {idx}")
+
+    # Um novo cliente, sem a sessão em memória, retoma o histórico gravado no SQLite
+    resumed = _client(monkeypatch, tmp_path, provider)
+    resumed.chat(session_id, "pergunta 2")
+    history = resumed._sessions[session_id]
+    assert history.messages[0].content == "pergunta 0"
+    assert len(history) == 6
+    _, rows = resumed.conversations.load_recent(session_id, max_messages=10)
+    assert len(rows) == 6
+    assert provider.requests == 3
+
+
+def test_failed_chat_turn_restores_evicted_history(monkeypatch, tmp_path, provider):
+    client = _client(monkeypatch, tmp_path, provider, max_history_messages=2, summary_max_tokens=50)
+    session_id = client.start_session()
+    client.chat(session_id, "q1")
+    history = client._sessions[session_id]
+    before = history.snapshot()
+
+    # Porta sem servidor: a chamada falha depois de o turno já ter descartado o "q1"
+    client.api_url = "http://127.0.0.1:9/v1/chat/completions"
+    result = client.chat(session_id, "q2")
+    assert "error" in result
+    assert history.snapshot() == before
+    assert history.summary == ""
+    _, rows = client.conversations.load_recent(session_id, max_messages=10)
+    assert [row[1] for row in rows][0] == "q1"
+    assert len(rows) == 2
+    assert provider.requests == 1
@@ -0,0 +1,200 @@
+"""Testes de ponta a ponta para o gateway HTTP local contra o provedor simulado."""
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from repositories.ai_repository import AiRespository
+from repositories.sqlite_repository import SQLiteRepository
+from src.common.mock_provider import MockProvider
+from src.common.response_cache import ResponseCache
+from src.repositories.usage_writer import AsyncUsageWriter
+from src.services.gateway import Gateway
+
+
+@pytest.fixture
+def gateway(monkeypatch, tmp_path):
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "teste")
+    with MockProvider() as provider:
+        client = AiRespository(api_url=provider.url, output_mode="quiet")
+        client.repo = SQLiteRepository(db_path=str(tmp_path / "usages.db"))
+        with Gateway(client, cache=ResponseCache(max_entries=8), write_flush_interval=0.01) as app:
+            yield app, provider
+
+
+def _chat(content):
+    return {"messages": [{"role": "user", "content": content}]}
+
+
+def _usage_result(usage_id):
+    return {
+        "id": usage_id,
+        "created": 1_750_000_000,
+        "model": "deepseek-chat",
+        "system_fingerprint": "fp",
+        "prompt": "pergunta",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": "resposta"},
+                "finish_reason": "stop",
+                "logprobs": None,
+            }
+        ],
+        "usage": {
+            "prompt_tokens": 5,
+            "completion_tokens": 3,
+            "total_tokens": 8,
+            "prompt_tokens_details": {"cached_tokens": 0},
+            "prompt_cache_hit_tokens": 0,
+            "prompt_cache_miss_tokens": 5,
+        },
+    }
+
+
+def _count_usages(repo):
+    with repo.get_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM api_usages").fetchone()[0]
+
+
+def test_chat_completions_is_openai_compatible(gateway):
+    app, provider = gateway
+    with httpx.Client(base_url=app.url) as http:
+        response = http.post("/v1/chat/completions", json=_chat("Capital do Brasil?"))
+    assert response.status_code == 200
+    body = response.json()
+    assert body["object"] == "chat.completion"
+    assert body["choices"][0]["message"]["content"].endswith("Capital do Brasil?")
+    assert provider.requests == 1
+
+
+def test_repeated_payload_is_served_from_cache(gateway):
+    app, provider = gateway
+    with httpx.Client(base_url=app.url) as http:
+        first = http.post("/v1/chat/completions", json=_chat("Olá"))
+        second = http.post("/v1/chat/completions", json=_chat("Olá"))
+        metrics = http.get("/metrics").json()
+    assert first.json()["id"] == second.json()["id"]
+    assert provider.requests == 1
+    assert metrics["cache_hits"] == 1
+
+
+def test_batch_endpoint_persists_in_batches(gateway):
+    app, provider = gateway
+    requests = [_chat(f"pergunta {idx}") for idx in range(20)]
+    with httpx.Client(base_url=app.url) as http:
+        response = http.post(
+            "/v1/batch/chat/completions", json={"requests": requests}, headers={"X-Tenant": "lote"}
+        )
+    data = response.json()["data"]
+    assert [item["index"] for item in data] == list(range(20))
+    assert all(item["status"] == 200 for item in data)
+    assert provider.requests == 20
+    app.stop()
+    assert _count_usages(app.client.repo) == 20
+
+
+@pytest.mark.parametrize(
+    ("method", "path", "payload", "status"),
+    [
+        ("POST", "/v1/chat/completions", {"prompt": "sem mensagens"}, 400),
+        ("POST", "/v1/chat/completions", {**_chat("x"), "stream": True}, 400),
+        ("POST", "/v1/chat/completions", {"messages": [{"content": "sem papel"}]}, 400),
+        ("POST", "/v1/chat/completions", {"messages": [{"role": "user", "content": 1}]}, 400),
+        (
+            "POST",
+            "/v1/chat/completions",
+            {"messages": [{"role": "user", "content": [{"type": "image_url"}]}]},
+            400,
+        ),
+        ("GET", "/v1/inexistente", None, 404),
+        ("GET", "/health", None, 200),
+    ],
+)
+def test_invalid_requests_are_rejected(gateway, method, path, payload, status):
+    app, _ = gateway
+    with httpx.Client(base_url=app.url) as http:
+        response = http.request(method, path, json=payload)
+    assert response.status_code == status
+
+
+def test_text_content_parts_are_flattened(gateway):
+    app, provider = gateway
+    parts = [{"type": "text", "text": "Capital "}, {"type": "text", "text": "do Brasil?"}]
+    with httpx.Client(base_url=app.url) as http:
+        response = http.post(
+            "/v1/chat/completions", json={"messages": [{"role": "user", "content": parts}]}
+        )
+    assert response.status_code == 200
+    assert response.json()["choices"][0]["message"]["content"].endswith("Capital do Brasil?")
+    app.stop()
+    with app.client.repo.get_connection() as conn:
+        assert conn.execute("SELECT prompt FROM api_usages").fetchone()[0] == "Capital do Brasil?"
+    assert provider.requests == 1
+
+
+def test_unexpected_error_returns_500(gateway, monkeypatch):
+    app, _ = gateway
+
+    def fail(*_args):
+        raise RuntimeError("falha inesperada")
+
+    monkeypatch.setattr(app.client, "dispatch", fail)
+    with httpx.Client(base_url=app.url) as http:
+        response = http.post("/v1/chat/completions", json=_chat("Olá"))
+        assert response.status_code == 500
+        assert http.get("/health").status_code == 200
+
+
+def test_stop_with_idle_keep_alive_connection_flushes_writes(gateway):
+    app, _ = gateway
+    with httpx.Client(base_url=app.url) as http:
+        response = http.post("/v1/chat/completions", json=_chat("Olá"))
+        assert response.headers["connection"] == "keep-alive"
+        # A conexão do cliente continua aberta enquanto o gateway é encerrado
+        stopper = threading.Thread(target=app.stop)
+        stopper.start()
+        stopper.join(timeout=5)
+        assert not stopper.is_alive()
+    assert _count_usages(app.client.repo) == 1
+
+
+def test_usage_writer_skips_incomplete_results(tmp_path):
+    repo = SQLiteRepository(db_path=str(tmp_path / "usages.db"))
+    complete = _usage_result("completo")
+    incomplete = {key: value for key, value in complete.items() if key != "system_fingerprint"}
+
+    async def write() -> AsyncUsageWriter:
+        writer = AsyncUsageWriter(repo, flush_interval=0.01)
+        writer.start()
+        writer.submit({**incomplete, "id": "sem-fingerprint"})
+        await asyncio.sleep(0.05)
+        # A tarefa sobrevive ao resultado incompleto e continua gravando os seguintes
+        writer.submit(complete)
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(write())
+    assert writer.written == 1
+    assert _count_usages(repo) == 1
+
+
+def test_usage_writer_keeps_valid_rows_of_failed_batch(tmp_path):
+    repo = SQLiteRepository(db_path=str(tmp_path / "usages.db"))
+    valid = _usage_result("valido")
+    invalid = {**_usage_result("invalido"), "prompt": [{"type": "text", "text": "lista"}]}
+
+    async def write() -> AsyncUsageWriter:
+        writer = AsyncUsageWriter(repo, flush_interval=1)
+        writer.start()
+        writer.submit(invalid)
+        writer.submit(valid)
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(write())
+    assert writer.written == 1
+    with repo.get_connection() as conn:
+        assert conn.execute("SELECT id FROM api_usages").fetchall() == [("valido",)]
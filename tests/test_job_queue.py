@@ -0,0 +1,130 @@
+"""Testes para a fila durável de prompts e seus workers contra o provedor simulado."""
+
+import threading
+
+import pytest
+
+from repositories.ai_repository import AiRespository
+from src.common.mock_provider import MockProvider
+from src.repositories.job_queue import JobQueue
+from src.services.worker import QueueWorker
+
+
+def _result(usage_id, prompt="pergunta"):
+    return {
+        "id": usage_id,
+        "created": 1_750_000_000,
+        "model": "deepseek-chat",
+        "system_fingerprint": "fp",
+        "prompt": prompt,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": "resposta"},
+                "finish_reason": "stop",
+                "logprobs": None,
+            }
+        ],
+        "usage": {
+            "prompt_tokens": 5,
+            "completion_tokens": 3,
+            "total_tokens": 8,
+            "prompt_tokens_details": {"cached_tokens": 0},
+            "prompt_cache_hit_tokens": 0,
+            "prompt_cache_miss_tokens": 5,
+        },
+    }
+
+
+def _count_usages(queue):
+    with queue.get_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM api_usages").fetchone()[0]
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "queue.db"), visibility_timeout=60, retry_backoff=0)
+
+
+def test_idempotency_key_deduplicates(queue):
+    assert queue.enqueue("pergunta", key="lote:1")
+    assert not queue.enqueue("pergunta", key="lote:1")
+    assert queue.enqueue_many([("lote:1", "pergunta"), ("lote:2", "outra")]) == 1
+    assert queue.stats()["queued"] == 2
+
+
+def test_leased_job_is_invisible_until_it_expires(queue):
+    queue.enqueue("pergunta", key="k")
+    (job,) = queue.lease("worker-a")
+    assert queue.lease("worker-b") == []
+
+    # Worker "a" caiu: o arrendamento expira e o job é reentregue a outro worker
+    with queue.get_connection() as conn:
+        conn.execute("UPDATE job_queue SET lease_expires_at = 0")
+    (retry,) = queue.lease("worker-b")
+    assert retry.job_id == job.job_id
+    assert retry.attempts == 2
+
+    # O worker que perdeu o arrendamento não confirma; o novo dono confirma uma única vez
+    assert not queue.ack(job, _result("id-1"))
+    assert queue.ack(retry, _result("id-1"))
+    assert not queue.ack(retry, _result("id-1"))
+    assert _count_usages(queue) == 1
+    assert queue.stats()["done"] == 1
+
+
+def test_nack_retries_until_max_attempts(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.db"), max_attempts=2, retry_backoff=0)
+    queue.enqueue("pergunta", key="k")
+    (job,) = queue.lease("worker")
+    assert queue.nack(job, "timeout")
+    (job,) = queue.lease("worker")
+    assert queue.nack(job, "timeout")
+    assert queue.stats() == {"queued": 0, "leased": 0, "done": 0, "failed": 1}
+    assert queue.retry_failed() == 1
+
+
+def test_workers_drain_queue_exactly_once(monkeypatch, queue):
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "teste")
+    queue.enqueue_many((f"k{idx}", f"pergunta {idx}") for idx in range(40))
+    with MockProvider(latency_seconds=0.005) as provider:
+        client = AiRespository(api_url=provider.url, output_mode="quiet")
+        workers = [
+            QueueWorker(client, queue, worker_id=f"w{idx}", batch_size=4, poll_interval=0.01)
+            for idx in range(3)
+        ]
+        threads = [
+            threading.Thread(target=worker.run, kwargs={"drain": True}) for worker in workers
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert sum(worker.acked for worker in workers) == 40
+    assert queue.stats()["done"] == 40
+    assert _count_usages(queue) == 40
+    assert provider.requests == 40
+
+
+def test_worker_renews_lease_of_long_call(monkeypatch, tmp_path):
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "teste")
+    queue = JobQueue(str(tmp_path / "queue.db"), visibility_timeout=0.3, retry_backoff=0)
+    queue.enqueue("pergunta", key="k")
+    stolen = []
+    with MockProvider(latency_seconds=1.0) as provider:
+        client = AiRespository(api_url=provider.url, output_mode="quiet")
+        worker = QueueWorker(client, queue, worker_id="lento", poll_interval=0.01)
+        thread = threading.Thread(target=worker.run, kwargs={"drain": True})
+        thread.start()
+        while queue.stats()["leased"] == 0:
+            thread.join(0.01)
+        # Outro worker tenta arrendar o job enquanto a chamada dura mais que o arrendamento
+        while thread.is_alive():
+            stolen.extend(queue.lease("ladrao"))
+            thread.join(0.05)
+
+    assert stolen == []
+    assert worker.acked == 1
+    assert provider.requests == 1
+    assert _count_usages(queue) == 1
@@ -0,0 +1,35 @@
+"""Testes unitários para o backend de serialização JSON."""
+
+import pytest
+
+from src.common import json_backend
+
+PAYLOAD = {"model": "deepseek-chat", "messages": [{"role": "user", "content": "Olá, ção!"}]}
+
+
+@pytest.mark.parametrize("name", ["json", "orjson"])
+def test_backend_round_trip_is_compact_utf8(name):
+    if name == "orjson":
+        pytest.importorskip("orjson")
+    backend = json_backend.get_backend(name)
+    encoded = backend.dumps_bytes(PAYLOAD)
+    assert b" " not in encoded.replace("Olá, ção!".encode(), b"")
+    assert "ção".encode() in encoded
+    assert backend.loads(encoded) == PAYLOAD
+    assert backend.loads(backend.dumps(PAYLOAD)) == PAYLOAD
+    assert "\n" in backend.dumps_pretty(PAYLOAD)
+
+
+def test_use_backend_switches_module_functions():
+    previous = json_backend.backend_name()
+    try:
+        json_backend.use_backend("json")
+        assert json_backend.backend_name() == "json"
+        assert json_backend.loads(json_backend.dumps_bytes(PAYLOAD)) == PAYLOAD
+    finally:
+        json_backend.use_backend(previous)
+
+
+def test_invalid_backend_raises():
+    with pytest.raises(ValueError, match="Backend JSON inválido"):
+        json_backend.get_backend("ujson")
@@ -0,0 +1,78 @@
+"""Testes unitários para requisições com várias respostas (`n > 1`)."""
+
+import pytest
+
+from repositories.ai_repository import AiRespository
+from repositories.sqlite_repository import SQLiteRepository
+from src.common.mock_provider import MockProvider
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "teste")
+    with MockProvider() as provider:
+        client = AiRespository(api_url=provider.url, output_mode="quiet")
+        client.repo = SQLiteRepository(db_path=str(tmp_path / "usages.db"))
+        yield client, provider
+
+
+def _count(repo, table):
+    with repo.get_connection() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]  # noqa: S608
+
+
+def test_payload_includes_n_only_when_needed(app):
+    client, _ = app
+    assert "n" not in client._create_payload(prompt="Olá")
+    assert client._create_payload(prompt="Olá", n=3)["n"] == 3
+
+
+def test_complete_persists_each_choice(app):
+    client, _ = app
+    result = client.complete(prompt="Capital do Brasil?", n=3)
+    assert len(result["choices"]) == 3
+    assert result["prompt"] == "Capital do Brasil?"
+    assert _count(client.repo, "api_usages") == 1
+    assert _count(client.repo, "api_usage_choices") == 3
+
+
+def test_run_many_folds_duplicate_prompts(app):
+    client, provider = app
+    prompts = ["a", "b", "a", "a"]
+    results = client.run_many(prompts, n=2)
+    assert provider.requests == 2
+    assert [result["prompt"] for result in results] == prompts
+    assert all(len(result["choices"]) == 2 for result in results)
+    choices_a = [choice["index"] for idx in (0, 2, 3) for choice in results[idx]["choices"]]
+    assert choices_a == list(range(6))
+    assert _count(client.repo, "api_usage_choices") == 6 + 2
+
+
+def test_run_many_splits_over_max_choices(app):
+    client, provider = app
+    client.batch_settings = {"max_choices_per_request": 4}
+    results = client.run_many(["x"] * 5, n=2)
+    assert provider.requests == 3
+    assert all(len(result["choices"]) == 2 for result in results)
+
+
+def test_run_many_reports_occurrences_of_failed_chunk(app, monkeypatch):
+    client, _ = app
+    client.batch_settings = {"max_choices_per_request": 5}
+    complete = client.complete
+    calls = []
+
+    def fail_second_call(**kwargs):
+        calls.append(kwargs["n"])
+        if len(calls) == 2:
+            return {"error": "falha simulada", "error_type": "error"}
+        return complete(**kwargs)
+
+    monkeypatch.setattr(client, "complete", fail_second_call)
+    results = client.run_many(["x"] * 5, n=2)
+    # Cada chamada atende ocorrências inteiras: 4 + 4 + 2 respostas
+    assert calls == [4, 4, 2]
+    assert [len(result.get("choices", [])) for result in results] == [2, 2, 0, 0, 2]
+    assert results[2]["error"] == results[3]["error"] == "falha simulada"
+    assert results[2]["prompt"] == "x"
+    assert results[0]["id"] == results[1]["id"] != results[4]["id"]
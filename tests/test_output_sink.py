@@ -0,0 +1,78 @@
+"""Testes unitários para os destinos de saída dos resultados da API."""
+
+import gc
+import io
+import json
+import weakref
+
+import pytest
+
+from src.common.output_sink import (
+    BufferedSink,
+    JsonlSink,
+    QuietSink,
+    TtySink,
+    create_output_sink,
+)
+
+RESULT = {"id": "abc", "model": "deepseek-chat", "choices": [{"message": {"content": "Brasília."}}]}
+
+
+def test_tty_sink_writes_summary_and_raw():
+    stream = io.StringIO()
+    sink = TtySink(stream)
+    sink.emit_raw(RESULT)
+    sink.emit_summary("Capital?", ["Brasília."], "deepseek-chat", 28)
+    output = stream.getvalue()
+    assert '"id": "abc"' in output
+    assert "💡 Resposta: Brasília." in output
+    assert "• Tokens Utilizados: 28" in output
+
+
+def test_buffered_sink_writes_only_on_flush():
+    stream = io.StringIO()
+    sink = BufferedSink(stream, buffer_size=10_000)
+    sink.emit_raw(RESULT)
+    sink.emit_summary("Capital?", ["Brasília."], "deepseek-chat", 28)
+    assert stream.getvalue() == ""
+    sink.flush()
+    assert "💡 Resposta: Brasília." in stream.getvalue()
+    assert '"id"' not in stream.getvalue()
+
+
+def test_jsonl_sink_writes_one_compact_line_per_result(tmp_path):
+    path = tmp_path / "results.jsonl"
+    sink = JsonlSink(path)
+    sink.emit_raw(RESULT)
+    sink.emit_raw(RESULT)
+    sink.emit_summary("Capital?", ["Brasília."], "deepseek-chat", 28)
+    sink.flush()
+    lines = path.read_bytes().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0]) == RESULT
+
+
+def test_create_output_sink_modes(tmp_path):
+    assert isinstance(create_output_sink("quiet"), QuietSink)
+    assert isinstance(create_output_sink("jsonl", tmp_path / "out.jsonl"), JsonlSink)
+    with pytest.raises(ValueError, match="Modo de saída inválido"):
+        create_output_sink("xml")
+
+
+def test_auto_mode_outside_terminal_skips_formatting(monkeypatch):
+    monkeypatch.setattr("src.common.output_sink.is_interactive_terminal", lambda: False)
+    sink = create_output_sink("auto")
+    assert isinstance(sink, JsonlSink)
+    assert sink.path is None
+
+
+def test_sinks_are_not_pinned_until_exit(tmp_path):
+    sink = JsonlSink(tmp_path / "results.jsonl")
+    sink.emit_raw(RESULT)
+    sink.close()
+    assert sink._file is None
+    assert json.loads((tmp_path / "results.jsonl").read_bytes()) == RESULT
+
+    reference = weakref.ref(BufferedSink(io.StringIO()))
+    gc.collect()
+    assert reference() is None
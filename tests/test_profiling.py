@@ -0,0 +1,53 @@
+"""Testes unitários para o perfilamento opcional das execuções."""
+
+import pstats
+import tracemalloc
+
+from repositories.ai_repository import AiRespository
+from repositories.sqlite_repository import SQLiteRepository
+from src.common import profiling
+from src.common.mock_provider import MockProvider
+
+
+def test_enabled_resolution_order(monkeypatch):
+    monkeypatch.setenv(profiling.PROFILE_ENV_VAR, "1")
+    assert profiling.profiling_enabled(settings={"enabled": False})
+    assert not profiling.profiling_enabled(flag=False, settings={"enabled": True})
+    monkeypatch.delenv(profiling.PROFILE_ENV_VAR)
+    assert profiling.profiling_enabled(settings={"enabled": True})
+
+
+def test_disabled_session_has_no_overhead():
+    with profiling.profiling_session("teste", enabled=False) as profiler:
+        assert profiler is None
+        assert profiling.span("etapa") is profiling.span("outra")
+        assert not tracemalloc.is_tracing()
+
+
+def test_session_writes_standard_outputs(tmp_path):
+    settings = {"output_dir": str(tmp_path), "sampling_interval_seconds": 0.001}
+    with profiling.profiling_session("teste", enabled=True, settings=settings) as profiler:
+        with profiling.span("etapa"):
+            sum(idx * idx for idx in range(200_000))
+    files = {path.name.removeprefix(profiler.name) for path in tmp_path.iterdir()}
+    assert files == {".pstats", ".folded", ".tracemalloc", "-memory.txt", "-spans.json"}
+    assert pstats.Stats(str(tmp_path / f"{profiler.name}.pstats")).total_calls > 0
+    folded = (tmp_path / f"{profiler.name}.folded").read_text(encoding="utf-8")
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded.splitlines())
+    assert tracemalloc.Snapshot.load(str(tmp_path / f"{profiler.name}.tracemalloc"))
+    assert [span[0] for span in profiler.spans] == ["etapa"]
+    assert not tracemalloc.is_tracing()
+
+
+def test_run_records_stage_spans(monkeypatch, tmp_path):
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "teste")
+    with MockProvider() as provider:
+        client = AiRespository(api_url=provider.url, output_mode="quiet", profile=True)
+        client.repo = SQLiteRepository(db_path=str(tmp_path / "usages.db"))
+        client.profiling_settings = {"output_dir": str(tmp_path / "profiling")}
+        with profiling.profiling_session(
+            "teste", enabled=True, settings=client.profiling_settings
+        ) as profiler:
+            client.run("Olá")
+    stages = {span[0] for span in profiler.spans}
+    assert {"json.encode", "http.post", "json.decode", "sqlite.insert", "output.emit"} <= stages
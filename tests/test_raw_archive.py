@@ -0,0 +1,84 @@
+"""Testes unitários para o arquivo bruto de respostas e seu reprocessamento."""
+
+import json
+from pathlib import Path
+
+import httpx
+
+from src.common.mock_provider import MockProvider
+from src.repositories.raw_archive import RawArchive, ReplayStats, replay_usage_records
+
+RESULT = json.loads(Path("./data/teste.json").read_text(encoding="utf-8"))
+
+
+def _exchange(idx: int) -> tuple[str, bytes, bytes]:
+    usage_id = f"usage-{idx}"
+    request = json.dumps(
+        {"model": "deepseek-chat", "messages": [{"role": "user", "content": f"pergunta {idx}"}]}
+    ).encode()
+    response = json.dumps({**RESULT, "id": usage_id}).encode()
+    return usage_id, request, response
+
+
+def test_append_get_and_iterate_across_segments(tmp_path):
+    archive = RawArchive(tmp_path / "archive", segment_max_bytes=1_024)
+    for idx in range(10):
+        archive.append(*_exchange(idx))
+    archive.close()
+
+    assert len(archive.segments()) > 1
+    assert archive.get("usage-7") == _exchange(7)
+    assert archive.get("inexistente") is None
+    assert [record.usage_id for record in archive.iter_records()] == [
+        f"usage-{idx}" for idx in range(10)
+    ]
+
+
+def test_replay_rebuilds_usage_records(tmp_path):
+    archive = RawArchive(tmp_path / "archive")
+    for idx in range(3):
+        archive.append(*_exchange(idx))
+    archive.append("quebrado", b"{}", b"nada")
+
+    stats = ReplayStats()
+    records = list(replay_usage_records(RawArchive(tmp_path / "archive"), stats))
+    assert [record.prompt for record in records] == ["pergunta 0", "pergunta 1", "pergunta 2"]
+    assert stats.records == 4
+    assert stats.failures == 1
+    assert stats.tokens_by_model == {"deepseek-chat": 3 * RESULT["usage"]["total_tokens"]}
+
+
+def test_mock_provider_replays_archive(tmp_path):
+    archive = RawArchive(tmp_path / "archive")
+    exchanges = [_exchange(idx) for idx in range(3)]
+    for exchange in exchanges:
+        archive.append(*exchange)
+
+    with MockProvider(replay=archive.iter_exchanges()) as provider:
+        response = httpx.post(provider.url, content=exchanges[1][1])
+        assert response.json()["id"] == "usage-1"
+        synthetic = httpx.post(provider.url, content=b'{"messages": []}')
+        assert synthetic.status_code == 200
+    assert provider.requests == 2
+
+
+def test_torn_tail_record_is_skipped_and_new_writes_stay_readable(tmp_path):
+    archive = RawArchive(tmp_path / "archive")
+    for idx in range(2):
+        archive.append(*_exchange(idx))
+    archive.close()
+    # Simula a queda do processo no meio da escrita do terceiro registro
+    segment = archive.segments()[-1]
+    usage_id, request, response = _exchange(2)
+    with segment.open("ab") as file:
+        file.write(b"RAW1" + request[:10])
+
+    reopened = RawArchive(tmp_path / "archive")
+    assert [record.usage_id for record in reopened.iter_records()] == ["usage-0", "usage-1"]
+    reopened.append(usage_id, request, response)
+    reopened.close()
+
+    assert len(reopened.segments()) == 2
+    records = list(replay_usage_records(RawArchive(tmp_path / "archive")))
+    assert [record.usage_id for record in records] == ["usage-0", "usage-1", "usage-2"]
+    assert reopened.get("usage-2") == _exchange(2)
@@ -0,0 +1,92 @@
+"""Testes unitários para o escalonador de chamadas por prioridade e prazo."""
+
+import threading
+import time
+
+import pytest
+
+from src.common.concurrency import AimdLimiter
+from src.common.scheduler import PriorityScheduler
+from src.core.errors import DeadlineExceededError
+from src.enums.priority import Priority
+
+
+def _wait_queued(scheduler, expected):
+    deadline = time.monotonic() + 2
+    while scheduler.queued < expected and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert scheduler.queued == expected
+
+
+def _run_in_order(scheduler, calls):
+    """Ocupa a única vaga, enfileira as chamadas uma a uma e retorna a ordem de execução."""
+    order = []
+    scheduler.acquire(Priority.INTERACTIVE)
+    threads = []
+    for name, priority, tenant in calls:
+        thread = threading.Thread(
+            target=scheduler.call,
+            args=(lambda name=name: order.append(name), lambda _: "success", priority, tenant),
+        )
+        thread.start()
+        threads.append(thread)
+        _wait_queued(scheduler, len(threads))
+    scheduler.release("success", 0.0)
+    for thread in threads:
+        thread.join()
+    return order
+
+
+@pytest.fixture
+def scheduler():
+    limiter = AimdLimiter(initial_limit=1, max_limit=1)
+    return PriorityScheduler(limiter, interactive_reserved_slots=0)
+
+
+def test_interactive_calls_skip_queued_batch(scheduler):
+    order = _run_in_order(
+        scheduler,
+        [
+            ("lote 1", Priority.BATCH, "backfill"),
+            ("lote 2", Priority.BATCH, "backfill"),
+            ("usuário", Priority.INTERACTIVE, "default"),
+        ],
+    )
+    assert order == ["usuário", "lote 1", "lote 2"]
+
+
+def test_tenants_share_slots_by_weight(scheduler):
+    scheduler.tenant_weights = {"pesado": 2.0}
+    calls = [(f"leve {idx}", Priority.BATCH, "leve") for idx in range(4)]
+    calls += [(f"pesado {idx}", Priority.BATCH, "pesado") for idx in range(4)]
+    order = _run_in_order(scheduler, calls)
+    # O tenant "pesado" recebe duas vagas para cada vaga do tenant "leve"
+    assert order[:6] == ["leve 0", "pesado 0", "pesado 1", "leve 1", "pesado 2", "pesado 3"]
+
+
+def test_expired_call_is_dropped(scheduler):
+    scheduler.acquire(Priority.INTERACTIVE)
+    with pytest.raises(DeadlineExceededError, match="prazo venceu"):
+        scheduler.acquire(Priority.BATCH, deadline=time.monotonic() + 0.02)
+    scheduler.release("success", 0.0)
+    assert scheduler.queued == 0
+    assert scheduler.metrics()["calls_expired"] == 1
+
+
+def test_call_that_cannot_finish_in_time_is_refused(scheduler):
+    scheduler.acquire(Priority.INTERACTIVE)
+    scheduler.release("success", 1.0)
+    scheduler.acquire(Priority.INTERACTIVE)
+    with pytest.raises(DeadlineExceededError, match="recusada"):
+        scheduler.acquire(Priority.BATCH, deadline=time.monotonic() + 0.1)
+    assert scheduler.metrics()["calls_refused"] == 1
+
+
+def test_batch_cannot_take_reserved_slots():
+    limiter = AimdLimiter(initial_limit=2, max_limit=2)
+    scheduler = PriorityScheduler(limiter, interactive_reserved_slots=1)
+    scheduler.acquire(Priority.BATCH)
+    with pytest.raises(DeadlineExceededError):
+        scheduler.acquire(Priority.BATCH, deadline=time.monotonic() + 0.02)
+    scheduler.acquire(Priority.INTERACTIVE, deadline=time.monotonic() + 0.02)
+    assert limiter.in_flight == 2
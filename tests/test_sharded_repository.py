@@ -0,0 +1,83 @@
+"""Testes unitários para a persistência do uso da API em shards SQLite."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.repositories.sharded_repository import ShardedSQLiteRepository
+from src.repositories.sqlite_repository import ChoiceRecord, SQLiteRepository, UsageRecord
+
+DAY = 86_400
+"""Segundos em um dia."""
+
+
+def _record(idx, created=1_750_000_000):
+    return UsageRecord(
+        usage_id=f"id-{idx}",
+        created=created,
+        model="deepseek-chat",
+        system_fingerprint="fp",
+        prompt=f"pergunta {idx}",
+        completion=f"resposta {idx}",
+        prompt_tokens=10,
+        completion_tokens=idx,
+        total_tokens=10 + idx,
+    )
+
+
+def test_hash_sharding_spreads_records(tmp_path):
+    repo = ShardedSQLiteRepository(tmp_path, shards=4)
+    assert repo.insert_usages([_record(idx) for idx in range(100)]) == 100
+    assert len(repo.shard_paths()) == 4
+    assert repo.count() == 100
+    assert repo.find("id-42")["completion"].tolist() == ["resposta 42"]
+
+
+def test_time_sharding_creates_one_shard_per_period(tmp_path):
+    repo = ShardedSQLiteRepository(tmp_path, shard_key="time", time_bucket="day")
+    repo.insert_usages([_record(idx, created=1_750_000_000 + idx * DAY) for idx in range(3)])
+    assert [path.stem for path in repo.shard_paths()] == [
+        "shard-20250615",
+        "shard-20250616",
+        "shard-20250617",
+    ]
+
+
+def test_query_fans_out_and_merges(tmp_path):
+    repo = ShardedSQLiteRepository(tmp_path, shards=4)
+    repo.insert_usages([_record(idx) for idx in range(50)])
+    top = repo.query(
+        "SELECT id, total_tokens FROM api_usages ORDER BY total_tokens DESC LIMIT 3",
+        order_by="total_tokens",
+        descending=True,
+        limit=3,
+    )
+    assert top["id"].tolist() == ["id-49", "id-48", "id-47"]
+
+
+def test_choices_follow_their_usage_shard(tmp_path):
+    repo = ShardedSQLiteRepository(tmp_path, shards=4)
+    choices = [ChoiceRecord("id-7", idx, f"resposta {idx}") for idx in range(3)]
+    repo.insert_usage(_record(7), choices)
+    found = repo.query("SELECT usage_id FROM api_usage_choices")
+    assert found["usage_id"].tolist() == ["id-7"] * 3
+
+
+def test_concurrent_writers_and_merge(tmp_path):
+    repo = ShardedSQLiteRepository(tmp_path / "shards", shards=4)
+    batches = [[_record(batch * 100 + idx) for idx in range(100)] for batch in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert sum(executor.map(repo.insert_usages, batches)) == 800
+    assert repo.merge_into(tmp_path / "merged.db") == 800
+    assert repo.merge_into(tmp_path / "merged.db") == 0
+    merged = SQLiteRepository(db_path=str(tmp_path / "merged.db"))
+    with merged.get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM api_usages").fetchone()[0] == 800
+    repo.compact()
+    assert repo.count() == 800
+
+
+def test_layout_mismatch_is_rejected(tmp_path):
+    ShardedSQLiteRepository(tmp_path, shards=4)
+    with pytest.raises(ValueError, match="diferente"):
+        ShardedSQLiteRepository(tmp_path, shards=8)
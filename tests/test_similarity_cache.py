@@ -0,0 +1,64 @@
+"""Testes unitários para o cache aproximado de prompts quase duplicados."""
+
+import pytest
+
+from repositories.ai_repository import AiRespository
+from repositories.sqlite_repository import SQLiteRepository
+from src.common.mock_provider import MockProvider
+from src.common.similarity_cache import SimilarityCache, choose_bands, normalize_prompt
+
+
+def test_normalize_prompt_ignores_case_spacing_and_punctuation():
+    assert normalize_prompt("  Qual é a  CAPITAL\tdo Brasil?! ") == "qual é a capital do brasil"
+
+
+def test_choose_bands_matches_threshold():
+    bands, rows = choose_bands(64, 0.9)
+    assert bands * rows == 64
+    assert abs((1 / bands) ** (1 / rows) - 0.9) < 0.1
+
+
+def test_near_duplicate_prompt_hits_cache():
+    cache = SimilarityCache(0.8)
+    cache.put("Qual é a capital do Brasil?", {"id": "1"})
+    hit = cache.get("qual é a   capital do brasil")
+    assert hit is not None
+    assert hit.response == {"id": "1"}
+    assert hit.similarity >= 0.8
+    assert cache.get("Explique a teoria da relatividade geral.") is None
+    assert cache.metrics() == {
+        "similarity_cache_entries": 1,
+        "similarity_cache_hits": 1,
+        "similarity_cache_misses": 1,
+    }
+
+
+def test_eviction_keeps_memory_bounded():
+    cache = SimilarityCache(0.9, max_entries=3)
+    for idx in range(10):
+        cache.put(f"pergunta distinta número {idx} sobre tema {idx * 7}", {"id": idx})
+    assert len(cache) == 3
+    assert cache.get("pergunta distinta número 0 sobre tema 0") is None
+    assert cache.get("pergunta distinta número 9 sobre tema 63").response == {"id": 9}
+    assert sum(len(bucket) for buckets in cache._buckets for bucket in buckets.values()) == (
+        3 * cache.bands
+    )
+
+
+def test_invalid_threshold():
+    with pytest.raises(ValueError, match="limiar"):
+        SimilarityCache(0)
+
+
+def test_complete_reuses_similar_prompt(monkeypatch, tmp_path):
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "teste")
+    with MockProvider() as provider:
+        client = AiRespository(api_url=provider.url, output_mode="quiet")
+        client.repo = SQLiteRepository(db_path=str(tmp_path / "usages.db"))
+        client.similarity_cache = SimilarityCache(0.8)
+        first = client.complete("Qual é a capital do Brasil?")
+        second = client.complete("qual é a capital do  Brasil")
+    assert provider.requests == 1
+    assert second["id"] == first["id"]
+    assert second["prompt"] == "qual é a capital do  Brasil"
+    assert second["cache_similarity"] >= 0.8
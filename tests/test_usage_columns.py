@@ -0,0 +1,73 @@
+"""Testes unitários para o armazenamento colunar de registros de uso da API."""
+
+import numpy as np
+import pytest
+
+from src.repositories.sqlite_repository import SQLiteRepository, UsageRecord
+from src.repositories.usage_columns import UsageColumns, sqlite_text_loader
+
+
+def _record(idx):
+    return UsageRecord(
+        usage_id=f"id-{idx}",
+        created=1_750_000_000 + idx,
+        model="deepseek-chat" if idx % 2 else "deepseek-reasoner",
+        system_fingerprint=None if idx % 3 == 0 else "fp",
+        prompt=f"pergunta {idx}",
+        completion=f"resposta {idx}",
+        prompt_tokens=10,
+        completion_tokens=idx,
+        total_tokens=10 + idx,
+        finish_reason="stop",
+        logprobs={"content": [{"token": "a", "logprob": -0.1}]} if idx == 1 else None,
+    )
+
+
+def test_round_trip_preserves_records():
+    records = [_record(idx) for idx in range(10)]
+    columns = UsageColumns.from_records(records)
+    assert len(columns) == 10
+    assert columns.to_records() == records
+    assert columns[-1] == records[-1]
+    assert columns.categories["model"] == ("deepseek-reasoner", "deepseek-chat")
+
+
+def test_slices_and_frame_share_memory():
+    columns = UsageColumns.from_records(_record(idx) for idx in range(10))
+    window = columns[2:5]
+    assert [record.usage_id for record in window] == ["id-2", "id-3", "id-4"]
+    assert np.shares_memory(window.tokens["total_tokens"], columns.tokens["total_tokens"])
+
+    frame = columns.to_frame()
+    assert np.shares_memory(frame["total_tokens"].to_numpy(), columns.tokens["total_tokens"])
+    assert frame["model"].dtype == "category"
+    assert frame["system_fingerprint"].isna().sum() == 4
+    assert "prompt" not in frame
+    assert UsageColumns.from_frame(columns.to_frame(include_text=True)).to_records() == list(
+        columns
+    )
+
+
+def test_text_is_loaded_lazily_from_sqlite(tmp_path):
+    repo = SQLiteRepository(db_path=str(tmp_path / "usages.db"))
+    records = [_record(idx) for idx in range(5)]
+    repo.insert_usages(records)
+
+    requested = []
+    loader = sqlite_text_loader(repo)
+    columns = UsageColumns.from_records(
+        records, keep_text=False, text_loader=lambda ids: requested.append(ids) or loader(ids)
+    )
+    assert not columns.loaded.any()
+    assert columns[1] == records[1]
+    assert requested == [["id-1"]]
+    assert list(columns) == records
+    assert requested[1] == ["id-0", "id-2", "id-3", "id-4"]
+    assert columns.loaded.all()
+
+
+def test_missing_loader_is_reported():
+    columns = UsageColumns.from_records([_record(1)], keep_text=False)
+    assert columns.to_frame()["total_tokens"].tolist() == [11]
+    with pytest.raises(ValueError, match="text_loader"):
+        columns.to_records()